@@ -4,202 +4,703 @@ Bulk Update Utilities for Pricing Management
 Provides utilities for:
 1. Daily base price updates by price type (affects all shops)
 2. Bulk discount updates for specific shops
-3. Price history tracking and audit trails
+3. Re-pricing of draft Sales Invoices after a price change
+4. Price history tracking and audit trails (Price History Entry time series)
 """
 
+import json
+
 import frappe
 from frappe import _
-from frappe.utils import getdate, today
+from frappe.utils import add_days, flt, getdate, now_datetime, today
+
+# Records updated (and committed) per chunk by background bulk pricing jobs
+BULK_JOB_CHUNK_SIZE = 200
+
+# RQ timeout for a bulk pricing job (seconds)
+BULK_JOB_TIMEOUT = 3600
 
 
 @frappe.whitelist()
-def bulk_update_price_by_type(price_type, percentage_change=0.0, absolute_change=0.0):
+def bulk_update_price_by_type(territory=None, item_codes=None, percentage_change=0.0, absolute_change=0.0):
 	"""
-	Bulk update base prices for all items of a specific price type
+	Bulk update active base prices of a territory (and its child territories)
+	and/or of specific items
 
 	This is the primary function for daily price updates.
-	Updates once per price type → affects all shops automatically
+	Updates once per territory → affects all shops of the territory automatically
+
+	The update runs as a background job (see run_bulk_pricing_job); progress is
+	streamed over the `bulk_pricing_progress` realtime event and the summary is
+	stored on the Bulk Pricing Job record.
 
 	Args:
-	    price_type: Price type to update (Wholesale/Retail/Premium/Bulk)
+	    territory: Territory whose prices are updated, including child territories
+	    item_codes: List of item codes (optional, updates all items if None)
 	    percentage_change: Percentage change (e.g., 5 for +5%, -3 for -3%)
 	    absolute_change: Absolute change in INR (e.g., 10 for +₹10, -5 for -₹5)
 
 	Returns:
-	    dict with update summary
+	    dict with the queued job name and status
 	"""
-	if not price_type:
-		frappe.throw(_("Price Type is required"))
-
-	# Get all active base prices for this price type
-	prices = frappe.get_all(
-		"Item Price Type",
-		filters={"price_type": price_type, "is_active": 1},
-		fields=["name", "item_code", "base_price_per_kg"],
+	if item_codes and isinstance(item_codes, str):
+		item_codes = [x.strip() for x in item_codes.split(",")]
+
+	if not territory and not item_codes:
+		frappe.throw(_("Please select a Territory or Items to update"))
+
+	return enqueue_bulk_pricing_job(
+		"Price Type Update",
+		{
+			"territory": territory,
+			"item_codes": item_codes or [],
+			"percentage_change": flt(percentage_change),
+			"absolute_change": flt(absolute_change),
+		},
 	)
 
-	if not prices:
-		frappe.msgprint(_("No active prices found for {0}").format(price_type))
-		return {"updated": 0, "items": []}
 
-	updated_items = []
+@frappe.whitelist()
+def bulk_update_shop_discounts(shop=None, item_codes=None, new_discount=None, percentage_change=0.0):
+	"""
+	Bulk update discounts for specific shops or items
 
-	for price in prices:
-		old_price = price.base_price_per_kg
+	Runs as a background job, like bulk_update_price_by_type.
 
-		# Calculate new price
-		new_price = old_price
-		if percentage_change:
-			new_price += old_price * percentage_change / 100
-		if absolute_change:
-			new_price += absolute_change
+	Args:
+	    shop: Customer code (optional, updates all shops if None)
+	    item_codes: List of item codes (optional, updates all items if None)
+	    new_discount: Set absolute discount value (overrides percentage_change)
+	    percentage_change: Percentage change to existing discount
 
-		# Ensure price is positive
-		if new_price <= 0:
-			frappe.msgprint(
-				_("Skipping {0}: New price would be ₹{1} (non-positive)").format(price.item_code, new_price),
-				indicator="orange",
-			)
-			continue
+	Returns:
+	    dict with the queued job name and status
+	"""
+	if item_codes and isinstance(item_codes, str):
+		item_codes = [x.strip() for x in item_codes.split(",")]
 
-		# Update price
-		doc = frappe.get_doc("Item Price Type", price.name)
-		doc.base_price_per_kg = new_price
-		doc.save(ignore_permissions=True)
+	return enqueue_bulk_pricing_job(
+		"Shop Discount Update",
+		{
+			"shop": shop,
+			"item_codes": item_codes or [],
+			"new_discount": flt(new_discount) if new_discount not in (None, "") else None,
+			"percentage_change": flt(percentage_change),
+		},
+	)
 
-		updated_items.append(
-			{
-				"item_code": price.item_code,
-				"old_price": old_price,
-				"new_price": new_price,
-				"change": new_price - old_price,
-			}
-		)
 
-		# Log to Price History
-		log_price_history(
-			doctype="Item Price Type",
-			docname=price.name,
-			field="base_price_per_kg",
-			old_value=old_price,
-			new_value=new_price,
-			change_reason=f"Bulk update: {percentage_change}% + ₹{absolute_change}",
-		)
+@frappe.whitelist()
+def reprice_draft_invoices(price_keys=None, discount_keys=None, from_date=None):
+	"""
+	Re-price draft Sales Invoices affected by a price or discount change
 
-	frappe.db.commit()
+	Drafts are affected when they contain an item whose base price changed in
+	the customer's territory, or whose discount changed for that shop. Runs as
+	a background job; drafts whose pricing fingerprint is unchanged are skipped.
 
-	summary = {
-		"updated": len(updated_items),
-		"price_type": price_type,
-		"percentage_change": percentage_change,
-		"absolute_change": absolute_change,
-		"items": updated_items,
+	Args:
+	    price_keys: list of [territory, item_code] with a changed base price
+	    discount_keys: list of [shop, item_code] with a changed discount
+	    from_date: Earliest posting date to re-price (defaults to today)
+
+	Returns:
+	    dict with the queued job name and status, or None if no draft is affected
+	"""
+	params = {
+		"price_keys": [list(key) for key in frappe.parse_json(price_keys or [])],
+		"discount_keys": [list(key) for key in frappe.parse_json(discount_keys or [])],
+		"from_date": str(getdate(from_date or today())),
 	}
 
-	frappe.msgprint(_("Updated {0} base prices for {1}").format(len(updated_items), price_type), alert=True)
+	if not get_affected_draft_invoices(frappe._dict(params)):
+		return None
+
+	return enqueue_bulk_pricing_job("Draft Invoice Repricing", params)
+
+
+def get_affected_draft_invoices(params):
+	"""
+	Names of draft Sales Invoices affected by the given price/discount keys
+
+	One query, grouped by (territory, item) and (shop, item). A price change
+	in a territory also affects customers of its child territories, which
+	fall back to it when they have no price of their own.
+
+	Args:
+	    params: dict with price_keys, discount_keys and from_date
+
+	Returns:
+	    list of Sales Invoice names
+	"""
+	conditions = []
+	values = {"from_date": params.from_date}
+
+	price_keys = expand_price_keys(params.price_keys)
+	if price_keys:
+		conditions.append("(customer.territory, sii.item_code) IN %(price_keys)s")
+		values["price_keys"] = price_keys
 
-	return summary
+	if params.discount_keys:
+		conditions.append("(si.customer, sii.item_code) IN %(discount_keys)s")
+		values["discount_keys"] = [tuple(key) for key in params.discount_keys]
+
+	if not conditions:
+		return []
+
+	return frappe.db.sql_list(
+		f"""
+		SELECT DISTINCT si.name
+		FROM `tabSales Invoice` si
+		INNER JOIN `tabSales Invoice Item` sii ON sii.parent = si.name AND sii.parenttype = 'Sales Invoice'
+		INNER JOIN `tabCustomer` customer ON customer.name = si.customer
+		WHERE si.docstatus = 0
+			AND si.posting_date >= %(from_date)s
+			AND ({" OR ".join(conditions)})
+	""",
+		values,
+	)
+
+
+def expand_price_keys(price_keys):
+	"""
+	Expand (territory, item_code) keys to every territory in each subtree
+
+	One query over the Territory nested set (lft/rgt).
+
+	Args:
+	    price_keys: list of [territory, item_code]
+
+	Returns:
+	    sorted list of (territory, item_code) tuples
+	"""
+	if not price_keys:
+		return []
+
+	descendants = {}
+	for row in frappe.db.sql(
+		"""
+		SELECT changed.name AS changed_territory, territory.name AS territory
+		FROM `tabTerritory` changed
+		INNER JOIN `tabTerritory` territory
+			ON territory.lft >= changed.lft AND territory.rgt <= changed.rgt
+		WHERE changed.name IN %(territories)s
+	""",
+		{"territories": list({key[0] for key in price_keys})},
+		as_dict=True,
+	):
+		descendants.setdefault(row.changed_territory, []).append(row.territory)
+
+	return sorted(
+		{
+			(territory, item_code)
+			for changed_territory, item_code in price_keys
+			for territory in descendants.get(changed_territory, [changed_territory])
+		}
+	)
+
+
+def enqueue_bulk_pricing_job(job_type, params):
+	"""
+	Create a Bulk Pricing Job and queue it for background processing
+
+	Args:
+	    job_type: One of BULK_PRICING_JOB_TYPES
+	    params: dict of job parameters (stored on the job record)
+
+	Returns:
+	    dict with job name and status
+	"""
+	if job_type not in BULK_PRICING_JOB_TYPES:
+		frappe.throw(_("Unknown bulk pricing job type: {0}").format(job_type))
+
+	job = frappe.get_doc(
+		{
+			"doctype": "Bulk Pricing Job",
+			"job_type": job_type,
+			"status": "Queued",
+			"parameters": json.dumps(params, default=str),
+		}
+	)
+	job.insert(ignore_permissions=True)
+
+	_enqueue_job(job.name)
+
+	frappe.msgprint(_("{0} queued as {1}").format(_(job_type), job.name), alert=True)
+
+	return {"job": job.name, "status": job.status}
 
 
 @frappe.whitelist()
-def bulk_update_shop_discounts(shop=None, item_codes=None, new_discount=None, percentage_change=0.0):
+def resume_bulk_pricing_job(job_name):
 	"""
-	Bulk update discounts for specific shops or items
+	Re-queue a failed Bulk Pricing Job
+
+	Records committed before the failure are not processed again; the job
+	continues after its last committed record.
 
 	Args:
-	    shop: Customer code (optional, updates all shops if None)
-	    item_codes: List of item codes (optional, updates all items if None)
-	    new_discount: Set absolute discount value (overrides percentage_change)
-	    percentage_change: Percentage change to existing discount
+	    job_name: Bulk Pricing Job name
 
 	Returns:
-	    dict with update summary
+	    dict with job name and status
 	"""
+	job = frappe.get_doc("Bulk Pricing Job", job_name)
+
+	if job.status != "Failed":
+		frappe.throw(_("Only failed jobs can be resumed. {0} is {1}").format(job.name, job.status))
+
+	job.db_set("status", "Queued")
+	_enqueue_job(job.name)
+
+	return {"job": job.name, "status": job.status}
+
+
+def _enqueue_job(job_name):
+	frappe.enqueue(
+		"shiva_erp.bulk_pricing_utils.run_bulk_pricing_job",
+		queue="long",
+		timeout=BULK_JOB_TIMEOUT,
+		enqueue_after_commit=True,
+		now=frappe.flags.in_test,
+		bulk_pricing_job=job_name,
+	)
+
+
+def run_bulk_pricing_job(bulk_pricing_job):
+	"""
+	Background worker: process a Bulk Pricing Job in committed chunks
+
+	Records are processed in name order, BULK_JOB_CHUNK_SIZE at a time. Each
+	chunk is committed together with the job progress and resume cursor, so a
+	failure only rolls back the chunk in flight and the job can be resumed from
+	where it stopped.
+
+	Args:
+	    bulk_pricing_job: Bulk Pricing Job name
+	"""
+	job = frappe.get_doc("Bulk Pricing Job", bulk_pricing_job)
+
+	try:
+		handler = BULK_PRICING_JOB_TYPES[job.job_type]
+		params = job.get_parameters()
+		filters = handler["filters"](params)
+
+		summary = job.get_summary() or {**params, "updated": 0, handler["summary_key"]: [], "skipped": []}
+
+		if not job.total_records:
+			job.total_records = frappe.db.count(handler["doctype"], filters)
+
+		prepare = handler.get("prepare")
+
+		job.status = "Running"
+		job.started_on = job.started_on or now_datetime()
+		job.error_log = None
+		job.save(ignore_permissions=True)
+		frappe.db.commit()
+		_publish_job_progress(job)
+
+		while True:
+			chunk_filters = _filter_list(filters)
+			if job.last_processed_name:
+				chunk_filters.append(["name", ">", job.last_processed_name])
+
+			records = frappe.get_all(
+				handler["doctype"],
+				filters=chunk_filters,
+				fields=handler["fields"],
+				order_by="name asc",
+				limit=BULK_JOB_CHUNK_SIZE,
+			)
+
+			if not records:
+				break
+
+			if prepare:
+				prepare(records, params)
+
+			# Work on a copy so a failed chunk does not leak into the stored summary
+			chunk_summary = json.loads(json.dumps(summary, default=str))
+
+			for record in records:
+				result = handler["apply"](record, params)
+
+				if result.get("skipped"):
+					chunk_summary["skipped"].append(result)
+				else:
+					chunk_summary[handler["summary_key"]].append(result)
+					chunk_summary["updated"] += 1
+
+			summary = chunk_summary
+
+			job.processed_records += len(records)
+			job.updated_records = summary["updated"]
+			job.skipped_records = len(summary["skipped"])
+			job.last_processed_name = records[-1].name
+			job.summary = json.dumps(summary, default=str)
+			job.save(ignore_permissions=True)
+			frappe.db.commit()
+
+			_publish_job_progress(job)
+
+	except Exception:
+		frappe.db.rollback()
+		job.db_set({"status": "Failed", "error_log": frappe.get_traceback()}, commit=True)
+		frappe.log_error(title=f"Bulk Pricing Job {job.name} Failed")
+		_publish_job_progress(job)
+		return
+
+	job.db_set({"status": "Completed", "completed_on": now_datetime()}, commit=True)
+	_publish_job_progress(job)
+
+
+def _publish_job_progress(job):
+	"""Stream job progress to the user who queued it"""
+	frappe.publish_realtime(
+		"bulk_pricing_progress",
+		{
+			"job": job.name,
+			"job_type": job.job_type,
+			"status": job.status,
+			"total": job.total_records,
+			"processed": job.processed_records,
+			"updated": job.updated_records,
+			"skipped": job.skipped_records,
+		},
+		user=job.owner,
+	)
+
+
+def _filter_list(filters):
+	"""Filters (dict or list) as a list, so a name condition can be appended"""
+	if isinstance(filters, dict):
+		return [
+			[field, *(value if isinstance(value, list | tuple) else ["=", value])]
+			for field, value in filters.items()
+		]
+
+	return list(filters)
+
+
+def _price_update_filters(params):
+	"""Active Item Price Type records of a territory subtree and/or items"""
+	if params.get("price_type"):
+		# Jobs queued before prices were keyed by territory
+		frappe.throw(_("Item Price Type has no Price Type. Queue the update by Territory or Items instead."))
+
+	filters = [["is_active", "=", 1]]
+
+	if params.territory:
+		filters.append(["territory", "descendants of (inclusive)", params.territory])
+
+	if params.item_codes:
+		filters.append(["item_code", "in", params.item_codes])
+
+	return filters
+
+
+def _apply_price_type_change(record, params):
+	"""Apply a percentage/absolute change to one Item Price Type record"""
+	old_price = flt(record.base_price_per_kg)
+
+	if record.valid_till and getdate(record.valid_till) < getdate(today()):
+		return {
+			"item_code": record.item_code,
+			"territory": record.territory,
+			"old_price": old_price,
+			"skipped": _("Expired on {0}").format(record.valid_till),
+		}
+
+	# Calculate new price
+	new_price = old_price
+	if params.percentage_change:
+		new_price += old_price * flt(params.percentage_change) / 100
+	if params.absolute_change:
+		new_price += flt(params.absolute_change)
+
+	# Ensure price is positive
+	if new_price <= 0:
+		return {
+			"item_code": record.item_code,
+			"old_price": old_price,
+			"new_price": new_price,
+			"skipped": _("New price would be ₹{0} (non-positive)").format(new_price),
+		}
+
+	doc = frappe.get_doc("Item Price Type", record.name)
+	doc.base_price_per_kg = new_price
+	doc.save(ignore_permissions=True)
+
+	log_price_history(
+		doctype="Item Price Type",
+		docname=record.name,
+		field="base_price_per_kg",
+		old_value=old_price,
+		new_value=new_price,
+		change_reason=f"Bulk update: {params.percentage_change}% + ₹{params.absolute_change}",
+	)
+
+	return {
+		"item_code": record.item_code,
+		"territory": record.territory,
+		"old_price": old_price,
+		"new_price": new_price,
+		"change": new_price - old_price,
+	}
+
+
+def _shop_discount_filters(params):
 	filters = {"is_active": 1}
 
-	if shop:
-		filters["shop"] = shop
+	if params.shop:
+		filters["shop"] = params.shop
+
+	if params.item_codes:
+		filters["item_code"] = ["in", params.item_codes]
+
+	return filters
+
 
-	if item_codes:
-		if isinstance(item_codes, str):
-			item_codes = [x.strip() for x in item_codes.split(",")]
-		filters["item_code"] = ["in", item_codes]
+def _apply_shop_discount_change(record, params):
+	"""Set or scale the discount on one Shop Discount record"""
+	old_discount = flt(record.discount_per_kg)
 
-	discounts = frappe.get_all(
-		"Shop Discount", filters=filters, fields=["name", "shop", "item_code", "discount_per_kg"]
+	# Calculate new discount
+	if params.new_discount is not None:
+		new_discount_value = flt(params.new_discount)
+	else:
+		new_discount_value = old_discount + (old_discount * flt(params.percentage_change) / 100)
+
+	# Ensure discount is non-negative
+	if new_discount_value < 0:
+		new_discount_value = 0
+
+	doc = frappe.get_doc("Shop Discount", record.name)
+	doc.discount_per_kg = new_discount_value
+	doc.save(ignore_permissions=True)
+
+	log_price_history(
+		doctype="Shop Discount",
+		docname=record.name,
+		field="discount_per_kg",
+		old_value=old_discount,
+		new_value=new_discount_value,
+		change_reason=f"Bulk update: {params.percentage_change}% change",
 	)
 
-	if not discounts:
-		frappe.msgprint(_("No matching discount records found"))
-		return {"updated": 0, "discounts": []}
+	return {
+		"shop": record.shop,
+		"item_code": record.item_code,
+		"old_discount": old_discount,
+		"new_discount": new_discount_value,
+		"change": new_discount_value - old_discount,
+	}
+
 
-	updated_discounts = []
+def _base_price_filters(params):
+	filters = {"is_active": 1}
 
-	for discount in discounts:
-		old_discount = discount.discount_per_kg
+	if params.item_code:
+		filters["item_code"] = params.item_code
 
-		# Calculate new discount
-		if new_discount is not None:
-			new_discount_value = float(new_discount)
-		else:
-			new_discount_value = old_discount + (old_discount * percentage_change / 100)
+	if params.territory:
+		filters["territory"] = params.territory
 
-		# Ensure discount is non-negative
-		if new_discount_value < 0:
-			new_discount_value = 0
+	return filters
 
-		# Update discount
-		doc = frappe.get_doc("Shop Discount", discount.name)
-		doc.discount_per_kg = new_discount_value
-		doc.save(ignore_permissions=True)
 
-		updated_discounts.append(
-			{
-				"shop": discount.shop,
-				"item_code": discount.item_code,
-				"old_discount": old_discount,
-				"new_discount": new_discount_value,
-				"change": new_discount_value - old_discount,
-			}
-		)
+def _apply_base_price(record, params):
+	"""Set a fixed base price on one Item Price Type record"""
+	doc = frappe.get_doc("Item Price Type", record.name)
+	doc.base_price_per_kg = flt(params.new_base_price)
+	doc.save(ignore_permissions=True)
 
-		# Log to Price History
-		log_price_history(
-			doctype="Shop Discount",
-			docname=discount.name,
-			field="discount_per_kg",
-			old_value=old_discount,
-			new_value=new_discount_value,
-			change_reason=f"Bulk update: {percentage_change}% change",
-		)
+	return {
+		"item_code": record.item_code,
+		"territory": record.territory,
+		"old_price": flt(record.base_price_per_kg),
+		"new_price": flt(params.new_base_price),
+	}
+
+
+def _discount_filters(params):
+	filters = {"is_active": 1}
+
+	if params.shop:
+		filters["shop"] = params.shop
+
+	if params.item_code:
+		filters["item_code"] = params.item_code
+
+	return filters
+
+
+def _apply_discount(record, params):
+	"""Set a fixed discount on one Shop Discount record"""
+	doc = frappe.get_doc("Shop Discount", record.name)
+	doc.discount_per_kg = flt(params.new_discount)
+	doc.save(ignore_permissions=True)
+
+	return {
+		"shop": record.shop,
+		"item_code": record.item_code,
+		"old_discount": flt(record.discount_per_kg),
+		"new_discount": flt(params.new_discount),
+	}
+
+
+def _draft_invoice_filters(params):
+	# Empty list matches nothing once the drafts have been re-priced elsewhere
+	return {"docstatus": 0, "name": ["in", get_affected_draft_invoices(params) or [""]]}
+
+
+def _prepare_draft_invoices(records, params):
+	"""Resolve prices for the chunk's posting dates in one pass (two queries per date)"""
+	from shiva_erp.pricing_cache import warm_price_cache
+
+	for posting_date in {record.posting_date for record in records}:
+		warm_price_cache(posting_date)
+
+
+def _reprice_draft_invoice(record, params):
+	"""Re-price one draft Sales Invoice and report the rows whose rate changed"""
+	from shiva_erp.sales_integration import apply_shop_pricing
+
+	doc = frappe.get_doc("Sales Invoice", record.name)
+	entry = {"invoice": doc.name, "customer": doc.customer}
 
-	frappe.db.commit()
+	if doc.docstatus != 0:
+		return {**entry, "skipped": _("No longer a draft")}
 
-	summary = {"updated": len(updated_discounts), "shop": shop, "discounts": updated_discounts}
+	old_rates = {item.name: flt(item.rate) for item in doc.items}
+	old_total = flt(doc.grand_total)
 
-	frappe.msgprint(_("Updated {0} shop discount records").format(len(updated_discounts)), alert=True)
+	result = apply_shop_pricing(doc, quiet=True)
 
-	return summary
+	if result.skipped:
+		return {**entry, "skipped": _("Pricing unchanged")}
+
+	changes = [
+		{
+			"idx": item.idx,
+			"item_code": item.item_code,
+			"old_rate": old_rates.get(item.name),
+			"new_rate": flt(item.rate),
+		}
+		for item in doc.items
+		if flt(item.rate) != old_rates.get(item.name)
+	]
+
+	if not changes:
+		# Remember the new fingerprint so the invoice is not re-priced again
+		doc.db_set("custom_pricing_fingerprint", doc.custom_pricing_fingerprint, update_modified=False)
+		return {**entry, "skipped": _("Prices unchanged")}
+
+	doc.save(ignore_permissions=True)
+
+	return {
+		**entry,
+		"territory": result.territory,
+		"old_total": old_total,
+		"new_total": flt(doc.grand_total),
+		"rows": changes,
+		"warnings": [warning["message"] for warning in result.errors + result.warnings],
+	}
+
+
+# Job type → how to select and update its records
+BULK_PRICING_JOB_TYPES = {
+	"Price Type Update": {
+		"doctype": "Item Price Type",
+		"fields": ["name", "item_code", "territory", "base_price_per_kg", "valid_till"],
+		"filters": _price_update_filters,
+		"apply": _apply_price_type_change,
+		"summary_key": "items",
+	},
+	"Shop Discount Update": {
+		"doctype": "Shop Discount",
+		"fields": ["name", "shop", "item_code", "discount_per_kg"],
+		"filters": _shop_discount_filters,
+		"apply": _apply_shop_discount_change,
+		"summary_key": "discounts",
+	},
+	"Base Price Update": {
+		"doctype": "Item Price Type",
+		"fields": ["name", "item_code", "territory", "base_price_per_kg"],
+		"filters": _base_price_filters,
+		"apply": _apply_base_price,
+		"summary_key": "items",
+	},
+	"Discount Update": {
+		"doctype": "Shop Discount",
+		"fields": ["name", "shop", "item_code", "discount_per_kg"],
+		"filters": _discount_filters,
+		"apply": _apply_discount,
+		"summary_key": "discounts",
+	},
+	"Draft Invoice Repricing": {
+		"doctype": "Sales Invoice",
+		"fields": ["name", "posting_date"],
+		"filters": _draft_invoice_filters,
+		"prepare": _prepare_draft_invoices,
+		"apply": _reprice_draft_invoice,
+		"summary_key": "invoices",
+	},
+}
 
 
 @frappe.whitelist()
-def preview_price_update(price_type, percentage_change=0.0, absolute_change=0.0):
+def preview_price_update(
+	territory=None,
+	item_codes=None,
+	percentage_change=0.0,
+	absolute_change=0.0,
+	simulate=False,
+	lookback_days=30,
+):
 	"""
 	Preview base price updates without actually updating
 
+	Selects the records bulk_update_price_by_type would update: active prices
+	of the territory subtree and/or items that have not expired. With
+	`simulate`, also projects the revenue impact per shop and territory from
+	recent sales volumes (see simulate_price_change_impact), using the prices
+	in effect today.
+
 	Args:
-	    price_type: Price type to preview
+	    territory: Territory to preview, including child territories
+	    item_codes: List of item codes (optional, previews all items if None)
 	    percentage_change: Percentage change
 	    absolute_change: Absolute change in INR
+	    simulate: Include the revenue impact simulation
+	    lookback_days: Days of Sales Invoice volume used by the simulation
 
 	Returns:
-	    list of items with old and new prices
+	    list of items with old and new prices, or with `simulate` a dict with
+	    items, shops, territories and totals
 	"""
-	prices = frappe.get_all(
-		"Item Price Type",
-		filters={"price_type": price_type, "is_active": 1},
-		fields=["item_code", "base_price_per_kg"],
-	)
+	if item_codes and isinstance(item_codes, str):
+		item_codes = [x.strip() for x in item_codes.split(",")]
+
+	if not territory and not item_codes:
+		frappe.throw(_("Please select a Territory or Items to preview"))
+
+	percentage_change = flt(percentage_change)
+	absolute_change = flt(absolute_change)
+	current_date = getdate(today())
+
+	prices = [
+		price
+		for price in frappe.get_all(
+			"Item Price Type",
+			filters=_price_update_filters(frappe._dict(territory=territory, item_codes=item_codes)),
+			fields=["item_code", "territory", "base_price_per_kg", "valid_from", "valid_till"],
+			# Oldest first: the simulation keeps the most recently modified price per territory + item
+			order_by="modified asc",
+		)
+		# Expired records are skipped by the update as well
+		if not price.valid_till or getdate(price.valid_till) >= current_date
+	]
 
 	preview_data = []
 
@@ -215,6 +716,7 @@ def preview_price_update(price_type, percentage_change=0.0, absolute_change=0.0)
 		preview_data.append(
 			{
 				"item_code": price.item_code,
+				"territory": price.territory,
 				"old_price": old_price,
 				"new_price": max(0, new_price),
 				"change": new_price - old_price,
@@ -222,13 +724,195 @@ def preview_price_update(price_type, percentage_change=0.0, absolute_change=0.0)
 			}
 		)
 
-	return preview_data
+	if not frappe.utils.cint(simulate):
+		return preview_data
+
+	return {
+		"items": preview_data,
+		**simulate_price_change_impact(
+			[price for price in prices if not price.valid_from or getdate(price.valid_from) <= current_date],
+			percentage_change,
+			absolute_change,
+			lookback_days,
+		),
+	}
+
+
+def simulate_price_change_impact(prices, percentage_change=0.0, absolute_change=0.0, lookback_days=30):
+	"""
+	Project revenue deltas of a base price change over the shop x item matrix
+
+	Volumes are the submitted Sales Invoice weights (custom_total_weight_kg)
+	per shop and item over the last `lookback_days`. Old and new effective
+	prices (base - shop discount, floored at 0) are computed with NumPy array
+	operations, so thousands of shops are simulated in one pass.
+
+	Args:
+	    prices: list of dicts with item_code, territory, base_price_per_kg
+	        (later entries win for the same territory + item); shops in a
+	        territory without a price use the nearest priced ancestor
+	    percentage_change: Percentage change
+	    absolute_change: Absolute change in INR
+	    lookback_days: Days of sales volume to use
+
+	Returns:
+	    dict with shops, territories (sorted by impact) and totals
+	"""
+	import numpy as np
+
+	lookback_days = max(frappe.utils.cint(lookback_days), 1)
+	item_codes = sorted({price.item_code for price in prices})
+	empty = {
+		"shops": [],
+		"territories": [],
+		"totals": {"weight_kg": 0, "current": 0, "projected": 0, "delta": 0},
+	}
+
+	if not item_codes:
+		return empty
+
+	volumes = frappe.db.sql(
+		"""
+		SELECT si.customer AS shop, customer.territory, sii.item_code,
+			SUM(sii.custom_total_weight_kg) AS weight_kg
+		FROM `tabSales Invoice` si
+		INNER JOIN `tabSales Invoice Item` sii ON sii.parent = si.name AND sii.parenttype = 'Sales Invoice'
+		INNER JOIN `tabCustomer` customer ON customer.name = si.customer
+		WHERE si.docstatus = 1
+			AND si.posting_date >= %(from_date)s
+			AND sii.item_code IN %(item_codes)s
+		GROUP BY si.customer, customer.territory, sii.item_code
+	""",
+		{"from_date": frappe.utils.add_days(today(), -lookback_days), "item_codes": item_codes},
+		as_dict=True,
+	)
+
+	if not volumes:
+		return empty
+
+	from shiva_erp.master_cache import get_territory_chain
+
+	# Shops without a price in their own territory fall back to the nearest priced ancestor
+	chains = {
+		territory: get_territory_chain(territory) or [territory]
+		for territory in {row.territory or "" for row in volumes}
+	}
+
+	shops = sorted({row.shop for row in volumes})
+	territories = sorted(
+		{territory for chain in chains.values() for territory in chain} | {p.territory or "" for p in prices}
+	)
+	shop_index = {shop: i for i, shop in enumerate(shops)}
+	item_index = {item_code: i for i, item_code in enumerate(item_codes)}
+	territory_index = {territory: i for i, territory in enumerate(territories)}
+
+	# Sales volume: shops x items
+	weights = np.zeros((len(shops), len(item_codes)))
+	shop_territory = np.zeros(len(shops), dtype=int)
+	for row in volumes:
+		weights[shop_index[row.shop], item_index[row.item_code]] = flt(row.weight_kg)
+		shop_territory[shop_index[row.shop]] = territory_index[row.territory or ""]
+
+	# Current and new base price: territories x items (NaN = no price)
+	old_base = np.full((len(territories), len(item_codes)), np.nan)
+	for price in prices:
+		old_base[territory_index[price.territory or ""], item_index[price.item_code]] = flt(
+			price.base_price_per_kg
+		)
+
+	# Each shop territory's row resolved through its chain, nearest priced territory first
+	resolved = old_base.copy()
+	for territory, chain in chains.items():
+		row = resolved[territory_index[territory]]
+		for ancestor in chain[1:]:
+			missing = np.isnan(row)
+			if not missing.any():
+				break
+			row[missing] = old_base[territory_index[ancestor], missing]
+	old_base = resolved
+
+	new_base = np.maximum(old_base * (1 + percentage_change / 100) + absolute_change, 0)
+
+	# Active shop discounts: shops x items
+	discounts = np.zeros_like(weights)
+	# (oldest valid_from first, so the record get_shop_discount picks is written last)
+	for row in frappe.db.sql(
+		"""
+		SELECT shop, item_code, discount_per_kg
+		FROM `tabShop Discount`
+		WHERE is_active = 1
+			AND shop IN %(shops)s
+			AND item_code IN %(item_codes)s
+			AND (valid_from IS NULL OR valid_from <= %(today)s)
+			AND (valid_till IS NULL OR valid_till >= %(today)s)
+		ORDER BY valid_from ASC
+	""",
+		{"shops": shops, "item_codes": item_codes, "today": today()},
+		as_dict=True,
+	):
+		discounts[shop_index[row.shop], item_index[row.item_code]] = flt(row.discount_per_kg)
+
+	# Effective price per shop x item, through each shop's territory row
+	old_effective = np.nan_to_num(np.maximum(old_base[shop_territory] - discounts, 0))
+	new_effective = np.nan_to_num(np.maximum(new_base[shop_territory] - discounts, 0))
+
+	current = (weights * old_effective).sum(axis=1)
+	projected = (weights * new_effective).sum(axis=1)
+	delta = projected - current
+	shop_weight = weights.sum(axis=1)
+
+	territory_count = len(territories)
+	territory_current = np.bincount(shop_territory, weights=current, minlength=territory_count)
+	territory_projected = np.bincount(shop_territory, weights=projected, minlength=territory_count)
+	territory_weight = np.bincount(shop_territory, weights=shop_weight, minlength=territory_count)
+	territory_shops = np.bincount(shop_territory, minlength=territory_count)
+
+	shop_rows = [
+		{
+			"shop": shops[i],
+			"territory": territories[shop_territory[i]],
+			"weight_kg": flt(shop_weight[i], 3),
+			"current": flt(current[i], 2),
+			"projected": flt(projected[i], 2),
+			"delta": flt(delta[i], 2),
+		}
+		for i in np.argsort(-np.abs(delta), kind="stable")
+	]
+
+	territory_rows = [
+		{
+			"territory": territories[i],
+			"shops": int(territory_shops[i]),
+			"weight_kg": flt(territory_weight[i], 3),
+			"current": flt(territory_current[i], 2),
+			"projected": flt(territory_projected[i], 2),
+			"delta": flt(territory_projected[i] - territory_current[i], 2),
+		}
+		for i in np.argsort(-np.abs(territory_projected - territory_current), kind="stable")
+		if territory_shops[i]
+	]
+
+	return {
+		"lookback_days": lookback_days,
+		"shops": shop_rows,
+		"territories": territory_rows,
+		"totals": {
+			"weight_kg": flt(shop_weight.sum(), 3),
+			"current": flt(current.sum(), 2),
+			"projected": flt(projected.sum(), 2),
+			"delta": flt(delta.sum(), 2),
+		},
+	}
 
 
 def log_price_history(doctype, docname, field, old_value, new_value, change_reason=""):
 	"""
 	Log price changes to audit trail
 
+	The entry is appended to the Price History Entry time series when the
+	current transaction commits, together with every other change logged in
+	it (one INSERT per bulk job chunk).
+
 	Args:
 	    doctype: Source DocType (Item Price Type or Shop Discount)
 	    docname: Document name
@@ -237,27 +921,21 @@ def log_price_history(doctype, docname, field, old_value, new_value, change_reas
 	    new_value: New value
 	    change_reason: Reason for change
 	"""
-	try:
-		history = frappe.get_doc(
-			{
-				"doctype": "Price Change History",
-				"reference_doctype": doctype,
-				"reference_name": docname,
-				"field_name": field,
-				"old_value": old_value,
-				"new_value": new_value,
-				"change_date": today(),
-				"change_by": frappe.session.user,
-				"change_reason": change_reason,
-			}
-		)
-		history.insert(ignore_permissions=True)
-	except Exception as e:
-		# Don't fail the main operation if history logging fails
-		frappe.log_error(
-			title="Price History Logging Failed",
-			message=f"Failed to log price change for {doctype} {docname}: {e!s}",
-		)
+	from shiva_erp.shiva_business_erp.doctype.price_history_entry.price_history_entry import (
+		queue_price_history,
+	)
+
+	queue_price_history(
+		{
+			"reference_doctype": doctype,
+			"reference_name": docname,
+			"field_name": field,
+			"value": flt(new_value),
+			"previous_value": flt(old_value),
+			"change_date": today(),
+			"change_reason": change_reason,
+		}
+	)
 
 
 @frappe.whitelist()
@@ -271,12 +949,12 @@ def get_price_history(doctype, docname, limit=10):
 	    limit: Number of records to fetch
 
 	Returns:
-	    list of price changes
+	    list of price changes, latest first
 	"""
 	history = frappe.get_all(
-		"Price Change History",
+		"Price History Entry",
 		filters={"reference_doctype": doctype, "reference_name": docname},
-		fields=["*"],
+		fields=["field_name", "change_date", "value", "previous_value", "change_reason", "owner"],
 		order_by="change_date desc, creation desc",
 		limit=limit,
 	)
@@ -289,36 +967,196 @@ def get_pricing_dashboard_data():
 	"""
 	Get dashboard data for pricing overview
 
+	Computed once per price version and day (see pricing_cache), so polling
+	viewers share one result until prices change.
+
 	Returns:
-	    dict with counts and statistics
+	    dict with counts, per-territory price and discount statistics,
+	    the price change distribution and recent changes
 	"""
-	data = {
-		"total_base_prices": frappe.db.count("Item Price Type", {"is_active": 1}),
-		"total_shop_discounts": frappe.db.count("Shop Discount", {"is_active": 1}),
-		"price_types": {},
-		"recent_changes": [],
-	}
+	from shiva_erp.pricing_cache import PRICING_DASHBOARD_CACHE_KEY, get_price_version
 
-	# Count by price type
-	price_type_counts = frappe.db.sql(
-		"""
-        SELECT price_type, COUNT(*) as count, AVG(base_price_per_kg) as avg_price
-        FROM `tabItem Price Type`
-        WHERE is_active = 1
-        GROUP BY price_type
-    """,
+	# Read the version first so a change while building leaves the result stale, not ahead
+	version = get_price_version()
+	as_of = getdate(today())
+
+	return frappe.cache().hget(
+		PRICING_DASHBOARD_CACHE_KEY,
+		f"{version}|{as_of}",
+		generator=lambda: _build_pricing_dashboard(version, as_of),
+	)
+
+
+# Price change bands (percent of a logged base price change versus the previous value)
+PRICE_CHANGE_BUCKETS = (
+	"Below -10%",
+	"-10% to -5%",
+	"-5% to 0%",
+	"No change",
+	"0% to 5%",
+	"5% to 10%",
+	"Above 10%",
+)
+
+# Window for the price change distribution (days)
+PRICE_CHANGE_LOOKBACK_DAYS = 30
+
+# Every dashboard aggregate in one round trip: one row per (section, territory/bucket)
+PRICING_DASHBOARD_QUERY = """
+	SELECT
+		'prices' AS section,
+		territory,
+		NULL AS bucket,
+		COUNT(*) AS records,
+		COUNT(DISTINCT item_code) AS keys_count,
+		SUM(base_price_per_kg) AS total,
+		MIN(base_price_per_kg) AS minimum,
+		MAX(base_price_per_kg) AS maximum
+	FROM `tabItem Price Type`
+	WHERE is_active = 1
+		AND (valid_from IS NULL OR valid_from <= %(as_of)s)
+		AND (valid_till IS NULL OR valid_till >= %(as_of)s)
+	GROUP BY territory
+
+	UNION ALL
+
+	SELECT
+		'discounts',
+		customer.territory,
+		NULL,
+		COUNT(*),
+		COUNT(DISTINCT sd.shop),
+		SUM(sd.discount_per_kg),
+		MIN(sd.discount_per_kg),
+		MAX(sd.discount_per_kg)
+	FROM `tabShop Discount` sd
+	JOIN `tabCustomer` customer ON customer.name = sd.shop
+	WHERE sd.is_active = 1
+		AND (sd.valid_from IS NULL OR sd.valid_from <= %(as_of)s)
+		AND (sd.valid_till IS NULL OR sd.valid_till >= %(as_of)s)
+	GROUP BY customer.territory
+
+	UNION ALL
+
+	SELECT
+		'changes',
+		NULL,
+		bucket,
+		COUNT(*),
+		NULL,
+		SUM(change_pct),
+		MIN(change_pct),
+		MAX(change_pct)
+	FROM (
+		SELECT
+			change_pct,
+			CASE
+				WHEN change_pct < -10 THEN 'Below -10%%'
+				WHEN change_pct < -5 THEN '-10%% to -5%%'
+				WHEN change_pct < 0 THEN '-5%% to 0%%'
+				WHEN change_pct = 0 THEN 'No change'
+				WHEN change_pct <= 5 THEN '0%% to 5%%'
+				WHEN change_pct <= 10 THEN '5%% to 10%%'
+				ELSE 'Above 10%%'
+			END AS bucket
+		FROM (
+			SELECT (value - previous_value) / previous_value * 100 AS change_pct
+			FROM `tabPrice History Entry`
+			WHERE reference_doctype = 'Item Price Type'
+				AND field_name = 'base_price_per_kg'
+				AND change_date >= %(since)s
+				AND previous_value > 0
+		) changes
+	) banded
+	GROUP BY bucket
+"""
+
+
+def _build_pricing_dashboard(version, as_of):
+	"""Aggregate the dashboard sections from PRICING_DASHBOARD_QUERY"""
+	rows = frappe.db.sql(
+		PRICING_DASHBOARD_QUERY,
+		{"as_of": as_of, "since": add_days(as_of, -PRICE_CHANGE_LOOKBACK_DAYS)},
 		as_dict=True,
 	)
 
-	for row in price_type_counts:
-		data["price_types"][row.price_type] = {"count": row.count, "average_price": row.avg_price}
+	territories = {}
+	changes = {}
 
-	# Get recent changes (if history exists)
-	try:
-		data["recent_changes"] = frappe.get_all(
-			"Price Change History", fields=["*"], order_by="change_date desc, creation desc", limit=5
+	def territory_stats(territory):
+		return territories.setdefault(
+			territory,
+			{
+				"prices": 0,
+				"items": 0,
+				"average_price": 0,
+				"min_price": 0,
+				"max_price": 0,
+				"discounts": 0,
+				"discounted_shops": 0,
+				"average_discount": 0,
+				"max_discount": 0,
+			},
+		)
+
+	for row in rows:
+		if row.section == "prices":
+			territory_stats(row.territory).update(
+				{
+					"prices": row.records,
+					"items": row.keys_count,
+					"average_price": flt(row.total) / row.records,
+					"min_price": flt(row.minimum),
+					"max_price": flt(row.maximum),
+				}
+			)
+		elif row.section == "discounts":
+			territory_stats(row.territory).update(
+				{
+					"discounts": row.records,
+					"discounted_shops": row.keys_count,
+					"average_discount": flt(row.total) / row.records,
+					"max_discount": flt(row.maximum),
+				}
+			)
+		else:
+			changes[row.bucket] = row
+
+	# Discount depth: average discount as a share of the territory's average base price
+	for stats in territories.values():
+		stats["discount_depth_pct"] = (
+			flt(stats["average_discount"] / stats["average_price"] * 100, 2) if stats["average_price"] else 0
 		)
-	except Exception:
-		pass
 
-	return data
+	return {
+		"version": version,
+		"as_of": str(as_of),
+		"total_base_prices": sum(stats["prices"] for stats in territories.values()),
+		"total_shop_discounts": sum(stats["discounts"] for stats in territories.values()),
+		"territories": territories,
+		"price_change_distribution": [
+			{
+				"bucket": bucket,
+				"count": changes[bucket].records if bucket in changes else 0,
+				"average_change_pct": (
+					flt(changes[bucket].total / changes[bucket].records, 2) if bucket in changes else 0
+				),
+			}
+			for bucket in PRICE_CHANGE_BUCKETS
+		],
+		"price_change_lookback_days": PRICE_CHANGE_LOOKBACK_DAYS,
+		"recent_changes": frappe.get_all(
+			"Price History Entry",
+			fields=[
+				"reference_doctype",
+				"reference_name",
+				"field_name",
+				"change_date",
+				"value",
+				"previous_value",
+				"owner",
+			],
+			order_by="creation desc",
+			limit=5,
+		),
+	}
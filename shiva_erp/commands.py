@@ -0,0 +1,33 @@
+"""
+Bench commands for Shiva ERP
+
+	bench --site <site> rebuild-daily-sales-facts [--from-date YYYY-MM-DD] [--to-date YYYY-MM-DD]
+"""
+
+import click
+from frappe.commands import get_site, pass_context
+
+
+@click.command("rebuild-daily-sales-facts")
+@click.option("--from-date", help="First posting date to rebuild (default: the earliest invoice)")
+@click.option("--to-date", help="Last posting date to rebuild (default: today)")
+@pass_context
+def rebuild_daily_sales_facts(context, from_date=None, to_date=None):
+	"""Rebuild the Daily Sales Fact table behind Shop Sales Analysis from the submitted invoices"""
+	import frappe
+
+	from shiva_erp.shiva_business_erp.doctype.daily_sales_fact.daily_sales_fact import (
+		rebuild_daily_sales_facts as rebuild,
+	)
+
+	frappe.init(site=get_site(context))
+	frappe.connect()
+
+	try:
+		count = rebuild(from_date, to_date, commit=True)
+		click.echo(f"Daily Sales Fact rebuilt: {count} rows")
+	finally:
+		frappe.destroy()
+
+
+commands = [rebuild_daily_sales_facts]
@@ -130,6 +130,11 @@ def fix_missing_rates():
 			errors += 1
 			print(f"✗ Error updating {entry.name}: {e!s}")
 
+	if updated:
+		from shiva_erp.report_cache import mark_source_changed
+
+		mark_source_changed("Stock Weight Ledger")
+
 	frappe.db.commit()
 
 	print(f"\n{'=' * 60}")
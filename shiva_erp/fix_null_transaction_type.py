@@ -49,6 +49,11 @@ def execute():
 		print(f"Fixed {entry.name}: Set transaction_type to {transaction_type}")
 		fixed_count += 1
 
+	if fixed_count:
+		from shiva_erp.report_cache import mark_source_changed
+
+		mark_source_changed("Stock Weight Ledger")
+
 	frappe.db.commit()
 	print(f"\n✅ Successfully fixed {fixed_count} entries")
 
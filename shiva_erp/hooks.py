@@ -44,8 +44,9 @@ app_license = "agpl-3.0"
 
 # include js in doctype views
 doctype_js = {
-	"Sales Invoice": "public/js/sales_invoice.js",
-	"Delivery Note": "public/js/delivery_note.js",
+	"Sales Invoice": ["public/js/item_pricing.js", "public/js/sales_invoice.js"],
+	"Delivery Note": ["public/js/item_pricing.js", "public/js/delivery_note.js"],
+	"Poultry Sales Invoice": "public/js/item_pricing.js",
 }
 # doctype_list_js = {"doctype" : "public/js/doctype_list.js"}
 # doctype_tree_js = {"doctype" : "public/js/doctype_tree.js"}
@@ -161,15 +162,72 @@ doc_events = {
 		"validate": "shiva_erp.sales_integration.delivery_note_validate",
 	},
 	"Sales Invoice": {
-		"on_submit": "shiva_erp.sales_integration.sales_invoice_on_submit",
-		"on_cancel": "shiva_erp.sales_integration.sales_invoice_on_cancel",
+		"on_submit": [
+			"shiva_erp.sales_integration.sales_invoice_on_submit",
+			"shiva_erp.shiva_business_erp.doctype.daily_sales_fact.daily_sales_fact.update_sales_facts",
+		],
+		"on_cancel": [
+			"shiva_erp.sales_integration.sales_invoice_on_cancel",
+			"shiva_erp.shiva_business_erp.doctype.daily_sales_fact.daily_sales_fact.reverse_sales_facts",
+		],
 		"validate": "shiva_erp.sales_integration.sales_invoice_validate",
 	},
+	# Keep the master data cache (shiva_erp.master_cache) in sync
+	"Customer": {
+		"on_update": "shiva_erp.master_cache.invalidate_master",
+		"on_trash": "shiva_erp.master_cache.invalidate_master",
+		"after_rename": "shiva_erp.master_cache.invalidate_master",
+	},
+	"Item": {
+		"on_update": "shiva_erp.master_cache.invalidate_master",
+		"on_trash": "shiva_erp.master_cache.invalidate_master",
+		"after_rename": "shiva_erp.master_cache.invalidate_master",
+	},
+	"Company": {
+		"on_update": "shiva_erp.master_cache.invalidate_master",
+		"on_trash": "shiva_erp.master_cache.invalidate_master",
+		"after_rename": "shiva_erp.master_cache.invalidate_master",
+	},
+	# Territory tree changes move price fallbacks (see item_price_type.get_base_price)
+	"Territory": {
+		"on_update": [
+			"shiva_erp.master_cache.invalidate_territory_chains",
+			"shiva_erp.pricing_cache.clear_price_cache",
+		],
+		"on_trash": [
+			"shiva_erp.master_cache.invalidate_territory_chains",
+			"shiva_erp.pricing_cache.clear_price_cache",
+		],
+		"after_rename": [
+			"shiva_erp.master_cache.invalidate_territory_chains",
+			"shiva_erp.pricing_cache.clear_price_cache",
+		],
+	},
+	# Keep month-end Party Balance Snapshots current for backdated postings
+	"GL Entry": {
+		"after_insert": "shiva_erp.shiva_business_erp.doctype.party_balance_snapshot.party_balance_snapshot.update_snapshots_for_gl_entry",
+	},
 }
 
 # Scheduled Tasks
 # ---------------
 
+scheduler_events = {
+	"cron": {
+		# Publish Scheduled Price Batches whose Publish On time has passed
+		"*/5 * * * *": [
+			"shiva_erp.shiva_business_erp.doctype.scheduled_price_batch.scheduled_price_batch.publish_due_price_batches",
+		],
+	},
+	# Snapshot closed months, then prove the snapshots against the GL weekly
+	"daily": [
+		"shiva_erp.shiva_business_erp.doctype.party_balance_snapshot.party_balance_snapshot.build_party_balance_snapshots",
+	],
+	"weekly": [
+		"shiva_erp.shiva_business_erp.doctype.party_balance_snapshot.party_balance_snapshot.reconcile_party_balance_snapshots",
+	],
+}
+
 # scheduler_events = {
 # 	"all": [
 # 		"shiva_erp.tasks.all"
@@ -0,0 +1,318 @@
+"""
+Master Data Cache for Shiva ERP
+
+Two-tier cache for slowly-changing master data read on hot paths
+(customer territory, company default accounts, party accounts, item names).
+
+1. Process-local LRU with TTL: no network round trip on a hit.
+2. Redis hash per DocType: shared by all workers of the site.
+
+When a Customer, Item or Company change is committed, its entries are
+dropped from Redis and an invalidation message is published on a Redis
+pub/sub channel. Every worker process subscribes to that channel and evicts
+its local copy; the TTL bounds staleness if a message is missed. Each drop
+also bumps a per-DocType version, so a value loaded before the drop is not
+cached again after it. Party Account rows are saved with their Customer, so
+saving the Customer also invalidates its party accounts.
+
+Territory ancestor chains are cached the same way. Any Territory change can
+move lft/rgt of many nodes, so it drops every cached chain.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from functools import partial
+
+import frappe
+
+# Fields cached per master DocType
+MASTER_FIELDS = {
+	"Customer": ("customer_name", "territory", "customer_group"),
+	"Item": ("item_name", "item_group", "stock_uom"),
+	"Company": (
+		"default_currency",
+		"default_receivable_account",
+		"default_payable_account",
+		"default_income_account",
+		"cost_center",
+	),
+}
+
+PARTY_ACCOUNT = "Party Account"
+TERRITORY_CHAIN = "Territory Chain"
+
+MASTER_CACHE_KEY = "shiva_erp:master:{0}"
+MASTER_VERSION_KEY = "shiva_erp:master_version:{0}"
+INVALIDATION_CHANNEL = "shiva_erp:master_cache"
+
+LOCAL_CACHE_SIZE = 4096
+LOCAL_CACHE_TTL = 300  # seconds
+
+# site → LRUCache, and (pid, site) pairs with a running pub/sub listener
+_local_caches = {}
+_listeners = set()
+_lock = threading.Lock()
+
+
+class LRUCache:
+	"""Thread-safe LRU cache whose entries expire after `ttl` seconds"""
+
+	def __init__(self, maxsize=LOCAL_CACHE_SIZE, ttl=LOCAL_CACHE_TTL):
+		self.maxsize = maxsize
+		self.ttl = ttl
+		self.data = OrderedDict()
+		self.lock = threading.Lock()
+
+	def get(self, key):
+		"""Return (hit, value)"""
+		with self.lock:
+			entry = self.data.get(key)
+			if entry is None:
+				return False, None
+
+			expires, value = entry
+			if expires < time.monotonic():
+				del self.data[key]
+				return False, None
+
+			self.data.move_to_end(key)
+			return True, value
+
+	def set(self, key, value):
+		with self.lock:
+			self.data[key] = (time.monotonic() + self.ttl, value)
+			self.data.move_to_end(key)
+			while len(self.data) > self.maxsize:
+				self.data.popitem(last=False)
+
+	def delete(self, key):
+		with self.lock:
+			self.data.pop(key, None)
+
+	def delete_doctype(self, doctype):
+		with self.lock:
+			for key in [key for key in self.data if key[0] == doctype]:
+				del self.data[key]
+
+	def clear(self):
+		with self.lock:
+			self.data.clear()
+
+
+def get_master(doctype, name):
+	"""
+	Cached master fields (see MASTER_FIELDS) for one record.
+
+	Returns:
+		frappe._dict of fields, or None if the record does not exist
+	"""
+	if not name:
+		return None
+
+	return _get(doctype, name, lambda: _load_master(doctype, name)) or None
+
+
+def get_master_value(doctype, name, fieldname):
+	"""Cached single field of a master record (None if missing)"""
+	master = get_master(doctype, name)
+	return master.get(fieldname) if master else None
+
+
+def get_party_account(party_type, party, company):
+	"""
+	Cached Party Account for a Customer/Supplier in a company.
+
+	Returns:
+		Account name, or None if the party has no account for the company
+	"""
+	if not party:
+		return None
+
+	accounts = _get(PARTY_ACCOUNT, f"{party_type}|{party}", lambda: _load_party_accounts(party_type, party))
+	return accounts.get(company) if accounts else None
+
+
+def get_territory_chain(territory):
+	"""
+	Cached ancestor chain of a territory from the nested set (lft/rgt).
+
+	Returns:
+		List of territory names, nearest first: [territory, parent, ..., root].
+		Unknown territories resolve to [territory].
+	"""
+	if not territory:
+		return []
+
+	return _get(TERRITORY_CHAIN, territory, lambda: _load_territory_chain(territory)) or [territory]
+
+
+def invalidate_master(doc, method=None, *args, **kwargs):
+	"""
+	Doc event handler: drop cached entries for a changed master once the
+	change is committed.
+
+	Dropping them earlier would let another worker re-cache the old row
+	before the commit. On rename the old name (first extra argument of
+	after_rename) is invalidated as well.
+	"""
+	names = {doc.name}
+	if method == "after_rename" and args:
+		names.add(args[0])
+
+	for name in names:
+		frappe.db.after_commit.add(partial(clear_master_cache, doc.doctype, name))
+		if doc.doctype in ("Customer", "Supplier"):
+			frappe.db.after_commit.add(partial(clear_master_cache, PARTY_ACCOUNT, f"{doc.doctype}|{name}"))
+
+
+def invalidate_territory_chains(doc, method=None, *args, **kwargs):
+	"""Doc event handler: drop all cached territory chains once the change is committed"""
+	frappe.db.after_commit.add(partial(clear_master_cache, TERRITORY_CHAIN))
+
+
+def clear_master_cache(doctype, name=None):
+	"""
+	Drop one record (or a whole DocType) from both tiers in every worker.
+
+	Args:
+		doctype: Master DocType (or "Party Account" / "Territory Chain")
+		name: Record key; None clears the DocType
+	"""
+	cache_key = MASTER_CACHE_KEY.format(doctype)
+
+	if name:
+		frappe.cache().hdel(cache_key, name)
+	else:
+		frappe.cache().delete_value(cache_key)
+
+	frappe.cache().incr(frappe.cache().make_key(MASTER_VERSION_KEY.format(doctype)))
+	_evict(frappe.local.site, doctype, name)
+
+	try:
+		frappe.cache().publish(_channel(), frappe.as_json({"doctype": doctype, "name": name}))
+	except Exception:
+		# Other workers fall back to the TTL
+		frappe.log_error(title="Master cache invalidation not published")
+
+
+def _get(doctype, name, loader):
+	"""Local tier, then Redis tier, then the database"""
+	_ensure_listener()
+
+	local = _get_local_cache()
+	hit, value = local.get((doctype, name))
+	if hit:
+		return value
+
+	cache = frappe.cache()
+	cache_key = MASTER_CACHE_KEY.format(doctype)
+
+	# Read the version first: a value loaded before a change committed is
+	# neither cached nor kept locally once the change has dropped the entry
+	version = _get_version(doctype)
+	value = cache.hget(cache_key, name)
+
+	if value is None:
+		# Store misses as an empty dict so they are cached too
+		value = loader() or {}
+		if _get_version(doctype) != version:
+			return value
+		cache.hset(cache_key, name, value)
+
+	if _get_version(doctype) == version:
+		local.set((doctype, name), value)
+
+	return value
+
+
+def _get_version(doctype):
+	return frappe.cache().get(frappe.cache().make_key(MASTER_VERSION_KEY.format(doctype)))
+
+
+def _load_master(doctype, name):
+	return frappe.db.get_value(doctype, name, MASTER_FIELDS[doctype], as_dict=True)
+
+
+def _load_party_accounts(party_type, party):
+	"""company → account for all Party Account rows of a party (one query)"""
+	rows = frappe.get_all(
+		PARTY_ACCOUNT,
+		filters={"parenttype": party_type, "parent": party},
+		fields=["company", "account"],
+	)
+	return {row.company: row.account for row in rows}
+
+
+def _load_territory_chain(territory):
+	"""Ancestors of a territory, including itself, nearest first (one query)"""
+	return frappe.db.sql_list(
+		"""
+		SELECT parent.name
+		FROM `tabTerritory` node
+		JOIN `tabTerritory` parent
+			ON parent.lft <= node.lft AND parent.rgt >= node.rgt
+		WHERE node.name = %s
+		ORDER BY parent.lft DESC
+	""",
+		territory,
+	)
+
+
+def _get_local_cache():
+	site = frappe.local.site
+	cache = _local_caches.get(site)
+
+	if cache is None:
+		with _lock:
+			cache = _local_caches.setdefault(site, LRUCache())
+
+	return cache
+
+
+def _evict(site, doctype, name):
+	cache = _local_caches.get(site)
+	if not cache:
+		return
+
+	if name:
+		cache.delete((doctype, name))
+	else:
+		cache.delete_doctype(doctype)
+
+
+def _channel():
+	# make_key returns bytes; pubsub handler names must be str
+	return frappe.safe_decode(frappe.cache().make_key(INVALIDATION_CHANNEL))
+
+
+def _ensure_listener():
+	"""
+	Subscribe this process to invalidation messages for the current site.
+
+	Keyed by pid so forked workers start their own listener thread.
+	"""
+	site = frappe.local.site
+	key = (os.getpid(), site)
+
+	if key in _listeners:
+		return
+
+	with _lock:
+		if key in _listeners:
+			return
+		_listeners.add(key)
+
+	def on_message(message):
+		data = json.loads(message["data"])
+		_evict(site, data.get("doctype"), data.get("name"))
+
+	try:
+		pubsub = frappe.cache().pubsub(ignore_subscribe_messages=True)
+		pubsub.subscribe(**{_channel(): on_message})
+		pubsub.run_in_thread(sleep_time=1, daemon=True)
+	except Exception:
+		# Redis unavailable: rely on the TTL and retry on a later call
+		_listeners.discard(key)
@@ -0,0 +1,8 @@
+from frappe.custom.doctype.custom_field.custom_field import create_custom_fields
+
+
+def execute():
+	"""Add the pricing fingerprint field to Sales Invoice"""
+	from shiva_erp.setup.custom_fields import get_custom_fields
+
+	create_custom_fields({"Sales Invoice": get_custom_fields()["Sales Invoice"]}, update=True)
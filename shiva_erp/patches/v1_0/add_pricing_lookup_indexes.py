@@ -0,0 +1,17 @@
+import frappe
+
+
+def execute():
+	"""Install the composite covering indexes for the as-of price and discount lookups"""
+	from shiva_erp.shiva_business_erp.doctype.item_price_type.item_price_type import (
+		on_doctype_update as add_item_price_type_index,
+	)
+	from shiva_erp.shiva_business_erp.doctype.shop_discount.shop_discount import (
+		on_doctype_update as add_shop_discount_index,
+	)
+
+	frappe.reload_doc("shiva_business_erp", "doctype", "item_price_type")
+	frappe.reload_doc("shiva_business_erp", "doctype", "shop_discount")
+
+	add_item_price_type_index()
+	add_shop_discount_index()
@@ -0,0 +1,14 @@
+import frappe
+
+
+def execute():
+	"""Install the Daily Sales Fact indexes and backfill the facts from the submitted invoices"""
+	from shiva_erp.shiva_business_erp.doctype.daily_sales_fact.daily_sales_fact import (
+		on_doctype_update,
+		rebuild_daily_sales_facts,
+	)
+
+	frappe.reload_doc("shiva_business_erp", "doctype", "daily_sales_fact")
+	on_doctype_update()
+
+	rebuild_daily_sales_facts()
@@ -0,0 +1,34 @@
+import frappe
+
+
+def execute():
+	"""
+	Install the Price History Entry index and copy existing Price Change
+	History rows (if any) into the time series. The old table is left in place.
+	"""
+	from shiva_erp.shiva_business_erp.doctype.price_history_entry.price_history_entry import (
+		on_doctype_update,
+	)
+
+	frappe.reload_doc("shiva_business_erp", "doctype", "price_history_entry")
+	on_doctype_update()
+
+	if not frappe.db.table_exists("Price Change History"):
+		return
+
+	# Set-based copy; INSERT IGNORE keeps the patch safe to re-run
+	frappe.db.sql(
+		"""
+		INSERT IGNORE INTO `tabPrice History Entry`
+			(name, owner, creation, modified, modified_by, docstatus,
+			reference_doctype, reference_name, field_name, change_date,
+			value, previous_value, change_reason)
+		SELECT
+			name, COALESCE(change_by, owner), creation, creation, modified_by, 0,
+			reference_doctype, reference_name, field_name, COALESCE(change_date, DATE(creation)),
+			CAST(new_value AS DECIMAL(21, 9)), CAST(old_value AS DECIMAL(21, 9)), change_reason
+		FROM `tabPrice Change History`
+		WHERE reference_doctype IS NOT NULL
+			AND reference_name IS NOT NULL
+	"""
+	)
@@ -0,0 +1,294 @@
+"""
+Pricing Cache for Shiva ERP
+
+Caches resolved base prices (item + territory + date) and shop discounts
+(shop + item + date) in Redis so invoice pricing does not query the pricing
+tables for every row.
+
+Every change to Item Price Type or Shop Discount clears the cache and bumps
+the price version once the change is committed. The version lets callers
+tell whether prices they priced with earlier are still current; it is also
+broadcast over realtime so open sales forms can drop their cached price books.
+Lookups, price books and warm-ups read the version before the pricing tables
+and cache nothing if it moved meanwhile, so a price read before a change
+committed is never written back after the clear.
+"""
+
+import pickle
+
+import frappe
+from frappe.utils import cint, flt, getdate, today
+
+PRICE_VERSION_KEY = "shiva_erp:price_version"
+BASE_PRICE_CACHE_KEY = "shiva_erp:base_price"
+SHOP_DISCOUNT_CACHE_KEY = "shiva_erp:shop_discount"
+PRICE_BOOK_CACHE_KEY = "shiva_erp:price_book"
+PRICING_DASHBOARD_CACHE_KEY = "shiva_erp:pricing_dashboard"
+
+# Realtime event published with the new version whenever prices change
+PRICE_VERSION_EVENT = "shiva_erp_price_version"
+
+
+def get_price_version():
+	"""Return the current price version (increments on every price change)"""
+	return cint(frappe.cache().get(frappe.cache().make_key(PRICE_VERSION_KEY)))
+
+
+def clear_price_cache(*args, **kwargs):
+	"""
+	Drop cached prices and discounts and bump the price version when the
+	current transaction commits (once per transaction; nothing on rollback).
+
+	Clearing before the commit would let a concurrent lookup re-cache the
+	old price, with the new version, until the next change.
+
+	Safe to use directly as a doc event handler.
+	"""
+	if frappe.flags.price_cache_clear_queued:
+		return
+
+	frappe.flags.price_cache_clear_queued = True
+	frappe.db.after_commit.add(_clear_price_cache)
+	frappe.db.after_rollback.add(_discard_price_cache_clear)
+
+
+def _clear_price_cache():
+	frappe.flags.price_cache_clear_queued = False
+
+	frappe.cache().delete_value(
+		[BASE_PRICE_CACHE_KEY, SHOP_DISCOUNT_CACHE_KEY, PRICE_BOOK_CACHE_KEY, PRICING_DASHBOARD_CACHE_KEY]
+	)
+	version = frappe.cache().incr(frappe.cache().make_key(PRICE_VERSION_KEY))
+
+	frappe.publish_realtime(PRICE_VERSION_EVENT, {"version": version})
+
+
+def _discard_price_cache_clear():
+	frappe.flags.price_cache_clear_queued = False
+
+
+def get_cached_base_price(item_code, territory, posting_date=None):
+	"""
+	Cached wrapper around item_price_type.get_base_price.
+
+	Returns:
+		dict with base_price_per_kg, currency, name (or None)
+	"""
+	from shiva_erp.shiva_business_erp.doctype.item_price_type.item_price_type import get_base_price
+
+	posting_date = getdate(posting_date or today())
+
+	return _get_cached(
+		BASE_PRICE_CACHE_KEY,
+		f"{item_code}|{territory}|{posting_date}",
+		lambda: get_base_price(item_code, territory, posting_date),
+	)
+
+
+def get_cached_shop_discount(shop, item_code, posting_date=None):
+	"""
+	Cached wrapper around shop_discount.get_shop_discount.
+
+	Returns:
+		float: Discount per kg (0 if no discount found)
+	"""
+	from shiva_erp.shiva_business_erp.doctype.shop_discount.shop_discount import get_shop_discount
+
+	posting_date = getdate(posting_date or today())
+
+	return _get_cached(
+		SHOP_DISCOUNT_CACHE_KEY,
+		f"{shop}|{item_code}|{posting_date}",
+		lambda: get_shop_discount(shop, item_code, posting_date),
+	)
+
+
+def _get_cached(name, key, loader):
+	"""
+	Cached hash field, loaded on a miss and cached only if the price version
+	did not change meanwhile (see get_price_book)
+	"""
+	cache = frappe.cache()
+
+	# Read the version first so a value read before a change committed is not cached after its clear
+	version = get_price_version()
+	value = cache.hget(name, key)
+	if value is not None:
+		return value
+
+	value = loader()
+	if value is not None and get_price_version() == version:
+		cache.hset(name, key, value)
+
+	return value
+
+
+def get_price_book(shop, posting_date=None):
+	"""
+	Compact price book for one shop: every item priced in the shop's territory
+	or, failing that, its nearest priced ancestor territory.
+
+	Sales forms cache the book in browser storage and price rows locally
+	until the price version changes.
+
+	Returns:
+		dict with shop, territory, posting_date, version and
+		prices (item_code → [base_price, discount, effective_price])
+	"""
+	posting_date = getdate(posting_date or today())
+	cache = frappe.cache()
+	key = f"{shop}|{posting_date}"
+
+	# A book built from prices read before a change committed carries the old
+	# version; it is neither served nor cached once the version has moved on
+	book = cache.hget(PRICE_BOOK_CACHE_KEY, key)
+	if book and book["version"] == get_price_version():
+		return book
+
+	book = _build_price_book(shop, posting_date)
+	if book["version"] == get_price_version():
+		cache.hset(PRICE_BOOK_CACHE_KEY, key, book)
+
+	return book
+
+
+def _build_price_book(shop, posting_date):
+	"""Two queries: territory base prices and the shop's discounts"""
+	# Read the version first so a change while building leaves the book stale, not ahead
+	version = get_price_version()
+	from shiva_erp.master_cache import get_master_value, get_territory_chain
+
+	territory = get_master_value("Customer", shop, "territory")
+	chain = get_territory_chain(territory) or [None]
+	params = {"shop": shop, "territories": chain, "posting_date": posting_date}
+
+	# Nearest territory in the chain wins, then the latest record (as in get_base_price)
+	rank = {name: index for index, name in enumerate(chain)}
+	nearest = {}
+	for row in frappe.db.sql(
+		"""
+		SELECT item_code, territory, base_price_per_kg
+		FROM `tabItem Price Type`
+		WHERE territory IN %(territories)s
+			AND is_active = 1
+			AND (valid_from IS NULL OR valid_from <= %(posting_date)s)
+			AND (valid_till IS NULL OR valid_till >= %(posting_date)s)
+		ORDER BY modified DESC
+	""",
+		params,
+		as_dict=True,
+	):
+		current = nearest.get(row.item_code)
+		if current is None or rank[row.territory] < rank[current.territory]:
+			nearest[row.item_code] = row
+
+	base_prices = {item_code: flt(row.base_price_per_kg) for item_code, row in nearest.items()}
+
+	discounts = {}
+	for row in frappe.db.sql(
+		"""
+		SELECT item_code, discount_per_kg
+		FROM `tabShop Discount`
+		WHERE shop = %(shop)s
+			AND is_active = 1
+			AND (valid_from IS NULL OR valid_from <= %(posting_date)s)
+			AND (valid_till IS NULL OR valid_till >= %(posting_date)s)
+		ORDER BY valid_from DESC
+	""",
+		params,
+		as_dict=True,
+	):
+		discounts.setdefault(row.item_code, flt(row.discount_per_kg))
+
+	prices = {}
+	for item_code, base_price in base_prices.items():
+		if base_price <= 0:
+			continue
+		discount = discounts.get(item_code, 0)
+		prices[item_code] = [base_price, discount, max(base_price - discount, 0)]
+
+	return {
+		"shop": shop,
+		"territory": territory,
+		"posting_date": str(posting_date),
+		"version": version,
+		"prices": prices,
+	}
+
+
+def warm_price_cache(posting_date=None):
+	"""
+	Preload every active base price and shop discount valid on posting_date.
+
+	Uses one query per pricing table and resolves the winning record per key
+	the same way get_base_price / get_shop_discount do. Territories without a
+	price of their own are resolved (via their ancestors) on first lookup.
+
+	Returns:
+		dict with number of cached prices and discounts
+	"""
+	posting_date = getdate(posting_date or today())
+	params = {"posting_date": posting_date}
+
+	# Read the version first: prices read before a change committed are not written after its clear
+	version = get_price_version()
+
+	prices = frappe.db.sql(
+		"""
+		SELECT item_code, territory, base_price_per_kg, currency, name
+		FROM `tabItem Price Type`
+		WHERE is_active = 1
+			AND (valid_from IS NULL OR valid_from <= %(posting_date)s)
+			AND (valid_till IS NULL OR valid_till >= %(posting_date)s)
+		ORDER BY modified DESC
+	""",
+		params,
+		as_dict=True,
+	)
+
+	price_map = {}
+	for row in prices:
+		key = f"{row.item_code}|{row.territory}|{posting_date}"
+		if key not in price_map:
+			price_map[key] = frappe._dict(
+				base_price_per_kg=row.base_price_per_kg, currency=row.currency, name=row.name
+			)
+
+	discounts = frappe.db.sql(
+		"""
+		SELECT shop, item_code, discount_per_kg
+		FROM `tabShop Discount`
+		WHERE is_active = 1
+			AND (valid_from IS NULL OR valid_from <= %(posting_date)s)
+			AND (valid_till IS NULL OR valid_till >= %(posting_date)s)
+		ORDER BY valid_from DESC
+	""",
+		params,
+		as_dict=True,
+	)
+
+	discount_map = {}
+	for row in discounts:
+		discount_map.setdefault(f"{row.shop}|{row.item_code}|{posting_date}", row.discount_per_kg)
+
+	if get_price_version() != version:
+		return {"prices": 0, "discounts": 0}
+
+	_hset_many(BASE_PRICE_CACHE_KEY, price_map)
+	_hset_many(SHOP_DISCOUNT_CACHE_KEY, discount_map)
+
+	return {"prices": len(price_map), "discounts": len(discount_map)}
+
+
+def _hset_many(name, mapping):
+	"""Write many hash fields in one pipelined round trip (same encoding as RedisWrapper.hset)"""
+	if not mapping:
+		return
+
+	cache = frappe.cache()
+	redis_key = cache.make_key(name)
+
+	pipe = cache.pipeline()
+	for key, value in mapping.items():
+		pipe.hset(redis_key, key, pickle.dumps(value))
+	pipe.execute()
@@ -0,0 +1,332 @@
+"""
+Pricing Sheet Import for Shiva ERP
+
+Streaming importer for Item Price Type and Shop Discount sheets (CSV or
+XLSX). Rows are read lazily and processed in chunks of IMPORT_CHUNK_SIZE:
+
+1. Validate the chunk in memory: required columns, links (one query per
+   link DocType), positive prices / non-negative discounts, dates and
+   validity overlaps (pricing_validation.validate_bulk_overlaps, one query).
+2. Bulk insert the valid rows with frappe.db.bulk_insert and commit.
+
+Rows that fail are written to a CSV error file (original values plus an
+Error column) so they can be fixed and imported again.
+"""
+
+import csv
+import datetime
+import io
+from itertools import islice
+
+import frappe
+from frappe import _
+from frappe.utils import cint, getdate, now_datetime
+
+# Rows validated and written per chunk
+IMPORT_CHUNK_SIZE = 1000
+
+# Importable columns per DocType
+IMPORT_SPECS = {
+	"Item Price Type": {
+		"required": ("item_code", "territory", "base_price_per_kg"),
+		"optional": ("currency", "valid_from", "valid_till", "is_active", "remarks"),
+		"links": {"item_code": "Item", "territory": "Territory", "currency": "Currency"},
+		"amount": "base_price_per_kg",
+	},
+	"Shop Discount": {
+		"required": ("shop", "item_code", "discount_per_kg"),
+		"optional": ("valid_from", "valid_till", "is_active", "remarks"),
+		"links": {"shop": "Customer", "item_code": "Item"},
+		"amount": "discount_per_kg",
+	},
+}
+
+
+@frappe.whitelist()
+def import_pricing_sheet(doctype, file_url):
+	"""
+	Import an uploaded pricing sheet.
+
+	Args:
+		doctype: Item Price Type or Shop Discount
+		file_url: URL of the uploaded CSV/XLSX File
+
+	Returns:
+		dict with imported and failed row counts and the error file URL (if any)
+	"""
+	if doctype not in IMPORT_SPECS:
+		frappe.throw(_("Cannot import {0} sheets").format(doctype))
+
+	frappe.has_permission(doctype, "create", throw=True)
+
+	file_doc = frappe.get_doc("File", {"file_url": file_url})
+	rows = iter_sheet(file_doc.get_full_path())
+
+	header = next(rows, None)
+	if not header:
+		frappe.throw(_("The file is empty"))
+
+	columns = map_columns(doctype, header)
+	missing = [field for field in IMPORT_SPECS[doctype]["required"] if field not in columns.values()]
+	if missing:
+		frappe.throw(_("Missing columns: {0}").format(", ".join(missing)))
+
+	imported = 0
+	errors = []
+
+	# Spreadsheet row numbers: the header is row 1
+	numbered = enumerate(rows, start=2)
+
+	while chunk := list(islice(numbered, IMPORT_CHUNK_SIZE)):
+		valid, chunk_errors = validate_chunk(doctype, columns, chunk)
+		imported += bulk_insert_rows(doctype, valid)
+		errors.extend(chunk_errors)
+		frappe.db.commit()
+
+	if imported:
+		from shiva_erp.pricing_cache import clear_price_cache
+
+		clear_price_cache()
+
+	return {
+		"imported": imported,
+		"failed": len(errors),
+		"error_file": write_error_file(doctype, header, errors) if errors else None,
+	}
+
+
+def iter_sheet(path):
+	"""Yield the rows of a CSV or XLSX file as lists, without loading the whole file"""
+	if path.lower().endswith(".xlsx"):
+		from openpyxl import load_workbook
+
+		workbook = load_workbook(path, read_only=True, data_only=True)
+		try:
+			for row in workbook.active.iter_rows(values_only=True):
+				yield list(row)
+		finally:
+			workbook.close()
+
+	elif path.lower().endswith(".csv"):
+		with open(path, newline="", encoding="utf-8-sig") as f:
+			yield from csv.reader(f)
+
+	else:
+		frappe.throw(_("Only CSV and XLSX files can be imported"))
+
+
+def map_columns(doctype, header):
+	"""
+	Map header cells (fieldname or label, any case) to importable fields.
+
+	Returns:
+		dict of column index → fieldname (unknown columns are ignored)
+	"""
+	spec = IMPORT_SPECS[doctype]
+	allowed = spec["required"] + spec["optional"]
+	meta = frappe.get_meta(doctype)
+
+	aliases = {}
+	for fieldname in allowed:
+		aliases[fieldname] = fieldname
+		aliases[(meta.get_label(fieldname) or "").strip().lower()] = fieldname
+
+	columns = {}
+	for index, cell in enumerate(header):
+		key = str(cell or "").strip().lower()
+		fieldname = aliases.get(key) or aliases.get(key.replace(" ", "_"))
+		if fieldname:
+			columns[index] = fieldname
+
+	return columns
+
+
+def validate_chunk(doctype, columns, chunk):
+	"""
+	Validate a chunk of sheet rows in memory.
+
+	Args:
+		doctype: Item Price Type or Shop Discount
+		columns: dict of column index → fieldname (see map_columns)
+		chunk: list of (row number, cell values)
+
+	Returns:
+		(valid rows as dicts with idx, errors as (row number, values, message))
+	"""
+	spec = IMPORT_SPECS[doctype]
+	amount_field = spec["amount"]
+
+	parsed = []
+	for row_no, values in chunk:
+		if not any(value not in (None, "") for value in values):
+			continue
+
+		row = frappe._dict(idx=row_no)
+		for index, fieldname in columns.items():
+			value = values[index] if index < len(values) else None
+			if isinstance(value, str):
+				value = value.strip()
+			elif fieldname in spec["links"] and isinstance(value, int | float):
+				# Numeric codes read from XLSX cells
+				value = str(int(value)) if float(value).is_integer() else str(value)
+			row[fieldname] = value
+
+		parsed.append((row_no, values, row))
+
+	known = _get_existing_links(spec["links"], [row for _row_no, _values, row in parsed])
+
+	valid = []
+	errors = []
+
+	for row_no, values, row in parsed:
+		messages = []
+
+		for fieldname in spec["required"]:
+			if row.get(fieldname) in (None, ""):
+				messages.append(_("{0} is required").format(fieldname))
+
+		for fieldname, link_doctype in spec["links"].items():
+			if row.get(fieldname) and str(row[fieldname]) not in known[fieldname]:
+				messages.append(_("{0} {1} not found").format(link_doctype, row[fieldname]))
+
+		amount = row.get(amount_field)
+		if amount not in (None, ""):
+			try:
+				row[amount_field] = float(amount)
+			except (TypeError, ValueError):
+				messages.append(_("{0} must be a number").format(amount_field))
+			else:
+				if amount_field == "base_price_per_kg" and row[amount_field] <= 0:
+					messages.append(_("Base Price per Kg must be greater than 0"))
+				elif row[amount_field] < 0:
+					messages.append(_("Discount per Kg cannot be negative"))
+
+		for fieldname in ("valid_from", "valid_till"):
+			if row.get(fieldname) in (None, ""):
+				row[fieldname] = None
+				continue
+			try:
+				row[fieldname] = getdate(row[fieldname])
+			except Exception:
+				messages.append(_("{0} is not a valid date").format(fieldname))
+
+		if (
+			isinstance(row.get("valid_from"), datetime.date)
+			and isinstance(row.get("valid_till"), datetime.date)
+			and row.valid_till < row.valid_from
+		):
+			messages.append(_("Valid Till cannot be before Valid From"))
+
+		row["is_active"] = cint(row.get("is_active")) if row.get("is_active") not in (None, "") else 1
+
+		if messages:
+			errors.append((row_no, values, "; ".join(messages)))
+		else:
+			valid.append(row)
+
+	# Overlaps within the chunk and against saved records (including earlier chunks)
+	from shiva_erp.pricing_validation import validate_bulk_overlaps
+
+	overlaps = {error["idx"]: error["message"] for error in validate_bulk_overlaps(doctype, valid)}
+	if overlaps:
+		values_by_row = dict(chunk)
+		errors.extend(
+			(row.idx, values_by_row[row.idx], overlaps[row.idx]) for row in valid if row.idx in overlaps
+		)
+		valid = [row for row in valid if row.idx not in overlaps]
+
+	errors.sort(key=lambda error: error[0])
+
+	return valid, errors
+
+
+def bulk_insert_rows(doctype, rows):
+	"""
+	Insert validated rows with one multi-row INSERT.
+
+	Names come from the DocType's own naming rule (one series update per
+	row); defaults (currency, is_active) from the DocType.
+
+	Returns:
+		Number of inserted rows
+	"""
+	if not rows:
+		return 0
+
+	meta = frappe.get_meta(doctype)
+	data_fields = [
+		df.fieldname for df in meta.get("fields") if df.fieldtype not in frappe.model.no_value_fields
+	]
+	fields = ["name", "owner", "creation", "modified", "modified_by", "docstatus", *data_fields]
+
+	item_names = {}
+	if meta.has_field("item_name"):
+		item_names = dict(
+			frappe.get_all(
+				"Item",
+				filters={"name": ["in", list({row.item_code for row in rows})]},
+				fields=["name", "item_name"],
+				as_list=True,
+			)
+		)
+
+	now = now_datetime()
+	values = []
+
+	for row in rows:
+		doc = frappe.new_doc(doctype)
+		doc.update({key: value for key, value in row.items() if key != "idx"})
+		if meta.has_field("item_name"):
+			doc.item_name = item_names.get(doc.item_code)
+		doc.set_new_name()
+
+		doc.owner = doc.modified_by = frappe.session.user
+		doc.creation = doc.modified = now
+		doc.docstatus = 0
+
+		values.append([doc.get(fieldname) for fieldname in fields])
+
+	frappe.db.bulk_insert(doctype, fields, values)
+
+	return len(values)
+
+
+def write_error_file(doctype, header, errors):
+	"""
+	Save failed rows (original values plus an Error column) as a private CSV.
+
+	Returns:
+		File URL
+	"""
+	output = io.StringIO()
+	writer = csv.writer(output)
+	writer.writerow(["Row", *header, "Error"])
+
+	for row_no, values, message in errors:
+		writer.writerow([row_no, *values, message])
+
+	file_doc = frappe.get_doc(
+		{
+			"doctype": "File",
+			"file_name": f"{frappe.scrub(doctype)}_import_errors_{now_datetime():%Y%m%d%H%M%S}.csv",
+			"content": output.getvalue(),
+			"is_private": 1,
+		}
+	).insert(ignore_permissions=True)
+
+	return file_doc.file_url
+
+
+def _get_existing_links(links, rows):
+	"""fieldname → set of linked names that exist (one query per link DocType)"""
+	known = {}
+
+	for fieldname, link_doctype in links.items():
+		names = list({str(row[fieldname]) for row in rows if row.get(fieldname)})
+		known[fieldname] = (
+			set(frappe.get_all(link_doctype, filters={"name": ["in", names]}, pluck="name"))
+			if names
+			else set()
+		)
+
+	return known
@@ -0,0 +1,194 @@
+"""
+Pricing Validation Utilities for Shiva ERP
+
+Overlap checks for validity periods of Item Price Type and Shop Discount.
+
+A record's validity is the closed interval [valid_from, valid_till]; a
+missing date is open-ended. Two active records for the same key overlap when
+each one starts on or before the day the other ends.
+"""
+
+import datetime
+
+import frappe
+from frappe import _
+from frappe.utils import getdate
+
+# Fields that identify "the same price" per pricing DocType
+PRICING_OVERLAP_KEYS = {
+	"Item Price Type": ("item_code", "territory"),
+	"Shop Discount": ("shop", "item_code"),
+}
+
+
+def find_overlapping_record(doctype, key_values, valid_from=None, valid_till=None, exclude_name=None):
+	"""
+	Find an active record whose validity overlaps [valid_from, valid_till].
+
+	One query on the key columns plus the interval condition.
+
+	Args:
+		doctype: Item Price Type or Shop Discount
+		key_values: dict of key field → value (see PRICING_OVERLAP_KEYS)
+		valid_from: Start of the period (None = open)
+		valid_till: End of the period (None = open)
+		exclude_name: Record to ignore (the one being saved)
+
+	Returns:
+		Name of the first overlapping record, or None
+	"""
+	conditions = [f"`{field}` = %({field})s" for field in PRICING_OVERLAP_KEYS[doctype]]
+	conditions.append("is_active = 1")
+	params = dict(key_values)
+
+	if exclude_name:
+		conditions.append("name != %(exclude_name)s")
+		params["exclude_name"] = exclude_name
+
+	# Existing record starts on or before our end ...
+	if valid_till:
+		conditions.append("(valid_from IS NULL OR valid_from <= %(valid_till)s)")
+		params["valid_till"] = valid_till
+
+	# ... and ends on or after our start
+	if valid_from:
+		conditions.append("(valid_till IS NULL OR valid_till >= %(valid_from)s)")
+		params["valid_from"] = valid_from
+
+	result = frappe.db.sql(
+		f"""
+		SELECT name
+		FROM `tab{doctype}`
+		WHERE {" AND ".join(conditions)}
+		LIMIT 1
+	""",
+		params,
+	)
+
+	return result[0][0] if result else None
+
+
+def find_overlaps(rows, key_fields):
+	"""
+	Find overlapping validity periods within a list of rows, in memory.
+
+	Rows are grouped by key and sorted by valid_from (O(n log n)); a single
+	sweep then compares each row with the furthest-reaching earlier row of
+	the same key.
+
+	Args:
+		rows: list of dicts with the key fields, valid_from and valid_till.
+			Rows with is_active = 0 are ignored.
+		key_fields: tuple of key field names
+
+	Returns:
+		list of (row, conflicting_row) tuples
+	"""
+	active = [row for row in rows if row.get("is_active", 1)]
+	active.sort(key=lambda row: (tuple(row.get(f) or "" for f in key_fields), _start(row)))
+
+	overlaps = []
+	current_key = None
+	reach_row = None
+	reach_till = None
+
+	for row in active:
+		key = tuple(row.get(f) or "" for f in key_fields)
+
+		if key != current_key:
+			current_key = key
+			reach_row = row
+			reach_till = _end(row)
+			continue
+
+		if _start(row) <= reach_till:
+			overlaps.append((row, reach_row))
+
+		if _end(row) > reach_till:
+			reach_row = row
+			reach_till = _end(row)
+
+	return overlaps
+
+
+def validate_bulk_overlaps(doctype, rows, include_existing=True):
+	"""
+	Check a whole batch of pricing rows for overlaps before writing anything.
+
+	Existing active records for the batch's keys are loaded with one query
+	and checked together with the batch.
+
+	Args:
+		doctype: Item Price Type or Shop Discount
+		rows: list of dicts (key fields, valid_from, valid_till, is_active);
+			an optional `idx` identifies the row in errors
+		include_existing: Also check against saved active records
+
+	Returns:
+		list of dicts with idx and message, one per overlapping batch row
+	"""
+	key_fields = PRICING_OVERLAP_KEYS[doctype]
+	batch = [frappe._dict(row, idx=row.get("idx", i + 1)) for i, row in enumerate(rows)]
+
+	candidates = list(batch)
+	if include_existing and batch:
+		candidates.extend(_get_existing_records(doctype, key_fields, batch))
+
+	errors = []
+	for row, other in find_overlaps(candidates, key_fields):
+		# Report each conflict against the batch row that caused it
+		if row.get("idx") is None:
+			row, other = other, row
+		if row.get("idx") is None:
+			continue
+
+		conflict = other.get("name") or _("Row #{0}").format(other.idx)
+		errors.append(
+			{
+				"idx": row.idx,
+				"message": _("Validity period overlaps with {0} for {1}").format(
+					conflict, ", ".join(str(row.get(f)) for f in key_fields)
+				),
+			}
+		)
+
+	return errors
+
+
+def _get_existing_records(doctype, key_fields, batch):
+	"""Active saved records for the keys present in the batch (one query)"""
+	params = {}
+	conditions = ["is_active = 1"]
+
+	for field in key_fields:
+		params[field] = list({row.get(field) for row in batch if row.get(field)})
+		if not params[field]:
+			return []
+		conditions.append(f"`{field}` IN %({field})s")
+
+	keys = {tuple(row.get(f) for f in key_fields) for row in batch}
+	names = {row.name for row in batch if row.get("name")}
+
+	records = frappe.db.sql(
+		f"""
+		SELECT name, {", ".join(f"`{f}`" for f in key_fields)}, valid_from, valid_till
+		FROM `tab{doctype}`
+		WHERE {" AND ".join(conditions)}
+	""",
+		params,
+		as_dict=True,
+	)
+
+	return [
+		frappe._dict(record, idx=None)
+		for record in records
+		if tuple(record.get(f) for f in key_fields) in keys and record.name not in names
+	]
+
+
+def _start(row):
+	return getdate(row.get("valid_from")) if row.get("valid_from") else datetime.date.min
+
+
+def _end(row):
+	return getdate(row.get("valid_till")) if row.get("valid_till") else datetime.date.max
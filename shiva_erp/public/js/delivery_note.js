@@ -32,6 +32,13 @@ frappe.ui.form.on("Delivery Note Item", {
 	}
 });
 
+// Pricing fields on the standard item table (custom fields)
+var ITEM_PRICING_OPTIONS = {
+	weight_field: "custom_total_weight_kg",
+	base_price_field: "custom_base_price_per_kg",
+	discount_field: "custom_discount_per_kg"
+};
+
 function apply_pricing_for_item(frm, item) {
 	// Get customer territory
 	if (!frm.doc.customer) {
@@ -39,41 +46,8 @@ function apply_pricing_for_item(frm, item) {
 		return;
 	}
 	
-	// Call server to get base price and shop discount
-	frappe.call({
-		method: "shiva_erp.sales_integration.get_item_pricing",
-		args: {
-			customer: frm.doc.customer,
-			item_code: item.item_code,
-			posting_date: frm.doc.posting_date || frappe.datetime.get_today(),
-			weight_kg: item.custom_total_weight_kg || 0
-		},
-		callback: function(r) {
-			if (r.message) {
-				let pricing = r.message;
-				
-				// Update item with pricing
-				frappe.model.set_value(item.doctype, item.name, "custom_base_price_per_kg", pricing.base_price);
-				frappe.model.set_value(item.doctype, item.name, "custom_discount_per_kg", pricing.discount);
-				frappe.model.set_value(item.doctype, item.name, "rate", pricing.effective_price);
-				
-				// Calculate amount = effective_price * weight_kg
-				if (item.custom_total_weight_kg > 0) {
-					let amount = pricing.effective_price * item.custom_total_weight_kg;
-					frappe.model.set_value(item.doctype, item.name, "amount", amount);
-				}
-				
-				frm.refresh_field("items");
-				
-				if (pricing.message) {
-					frappe.show_alert({
-						message: pricing.message,
-						indicator: "green"
-					});
-				}
-			}
-		}
-	});
+	// Queued and priced together with other recent row edits
+	shiva_erp.pricing.queue_row(frm, item, ITEM_PRICING_OPTIONS);
 }
 
 function apply_pricing_to_all_items(frm) {
@@ -87,10 +61,6 @@ function apply_pricing_to_all_items(frm) {
 		return;
 	}
 	
-	// Apply pricing to each item
-	frm.doc.items.forEach(function(item) {
-		if (item.item_code) {
-			apply_pricing_for_item(frm, item);
-		}
-	});
+	// All rows are priced in a single server call
+	shiva_erp.pricing.queue_all_rows(frm, ITEM_PRICING_OPTIONS);
 }
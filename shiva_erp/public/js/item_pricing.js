@@ -0,0 +1,304 @@
+// Shared item pricing for sales forms
+//
+// Rows are priced locally from a per-shop price book kept in browser storage.
+// The book is refetched only when the server's price version moves past the
+// stored one (realtime "shiva_erp_price_version" event or a periodic check).
+// Without a book, row edits are debounced and coalesced into one
+// get_items_pricing call.
+frappe.provide("shiva_erp.pricing");
+
+// Wait this long after the last row edit before pricing the queued rows
+shiva_erp.pricing.DEBOUNCE_MS = 300;
+
+// Re-check the server's price version at most this often (realtime covers the rest)
+shiva_erp.pricing.VERSION_CHECK_MS = 15 * 60 * 1000;
+
+shiva_erp.pricing.STORAGE_PREFIX = "shiva_erp:price_book:";
+
+// Latest price version known to this browser tab
+shiva_erp.pricing.known_version = 0;
+shiva_erp.pricing.version_checked_at = 0;
+
+shiva_erp.pricing.queue_row = function(frm, item, options) {
+	// options: weight_field, base_price_field, discount_field, after_apply (optional)
+	if (!frm.doc.customer || !item.item_code) {
+		return;
+	}
+
+	let queue = shiva_erp.pricing.get_queue(frm);
+	queue.rows[item.name] = item;
+	queue.options = options;
+
+	// Track the latest edit per row so a slow response cannot overwrite a newer one
+	queue.versions[item.name] = (queue.versions[item.name] || 0) + 1;
+
+	clearTimeout(queue.timer);
+	queue.timer = setTimeout(function() {
+		shiva_erp.pricing.flush(frm);
+	}, shiva_erp.pricing.DEBOUNCE_MS);
+};
+
+shiva_erp.pricing.queue_all_rows = function(frm, options) {
+	(frm.doc.items || []).forEach(function(item) {
+		shiva_erp.pricing.queue_row(frm, item, options);
+	});
+};
+
+shiva_erp.pricing.flush = function(frm) {
+	let queue = shiva_erp.pricing.get_queue(frm);
+	let rows = Object.values(queue.rows);
+	let options = queue.options;
+	let versions = Object.assign({}, queue.versions);
+
+	queue.rows = {};
+	queue.timer = null;
+
+	if (!rows.length || !frm.doc.customer) {
+		return;
+	}
+
+	let posting_date = frm.doc.posting_date || frappe.datetime.get_today();
+	let apply = function(results) {
+		shiva_erp.pricing.apply_results(frm, rows, results, versions, options);
+	};
+
+	shiva_erp.pricing.get_price_book(frm.doc.customer, posting_date)
+		.then(function(book) {
+			let results = {};
+			rows.forEach(function(item) {
+				results[item.name] = shiva_erp.pricing.price_from_book(book, item.item_code, item[options.weight_field]);
+			});
+			apply(results);
+		})
+		.catch(function() {
+			// No usable price book: ask the server for these rows only
+			frappe.call({
+				method: "shiva_erp.sales_integration.get_items_pricing",
+				args: {
+					customer: frm.doc.customer,
+					posting_date: posting_date,
+					items: rows.map(function(item) {
+						return {
+							row_id: item.name,
+							item_code: item.item_code,
+							weight_kg: item[options.weight_field] || 0
+						};
+					})
+				},
+				callback: function(r) {
+					apply(r.message || {});
+				}
+			});
+		});
+};
+
+shiva_erp.pricing.apply_results = function(frm, rows, results, versions, options) {
+	let queue = shiva_erp.pricing.get_queue(frm);
+	let priced = 0;
+	let missing = [];
+
+	rows.forEach(function(item) {
+		let pricing = results[item.name];
+
+		// Row removed or edited again since pricing started
+		if (!pricing || !locals[item.doctype][item.name] || queue.versions[item.name] !== versions[item.name]) {
+			return;
+		}
+
+		frappe.model.set_value(item.doctype, item.name, options.base_price_field, pricing.base_price);
+		frappe.model.set_value(item.doctype, item.name, options.discount_field, pricing.discount);
+		frappe.model.set_value(item.doctype, item.name, "rate", pricing.effective_price);
+
+		// Calculate amount = effective_price * weight_kg
+		let weight = item[options.weight_field];
+		if (weight > 0) {
+			frappe.model.set_value(item.doctype, item.name, "amount", pricing.effective_price * weight);
+		}
+
+		if (pricing.base_price) {
+			priced += 1;
+		} else {
+			missing.push(pricing.message);
+		}
+	});
+
+	if (options.after_apply) {
+		options.after_apply(frm);
+	}
+	frm.refresh_field("items");
+
+	if (priced) {
+		let single = rows.length === 1 && results[rows[0].name];
+		frappe.show_alert({
+			message: single ? single.message : __("Territory pricing applied to {0} rows", [priced]),
+			indicator: "green"
+		});
+	}
+
+	if (missing.length) {
+		frappe.show_alert({
+			message: [...new Set(missing)].join("<br>"),
+			indicator: "orange"
+		});
+	}
+};
+
+shiva_erp.pricing.show_summary = function(result) {
+	// Render a server pricing result (sales_integration.apply_shop_pricing) as one message
+	if (!result || result.skipped) {
+		return;
+	}
+
+	let lines = [];
+	if (result.rows.length) {
+		let total = result.rows.reduce(function(sum, row) {
+			return sum + flt(row.amount);
+		}, 0);
+		lines.push(__("Applied {0} pricing to {1} rows: {2}", [
+			result.territory, result.rows.length, format_currency(total)
+		]));
+	}
+	result.errors.concat(result.warnings).forEach(function(entry) {
+		lines.push(entry.message);
+	});
+
+	if (!lines.length) {
+		return;
+	}
+
+	if (result.errors.length || result.warnings.length) {
+		frappe.msgprint({
+			title: __("Territory Pricing"),
+			message: lines.join("<br>"),
+			indicator: result.errors.length ? "red" : "orange"
+		});
+	} else {
+		frappe.show_alert({message: lines[0], indicator: "green"});
+	}
+};
+
+shiva_erp.pricing.price_from_book = function(book, item_code, weight_kg) {
+	// Same result shape as sales_integration.get_item_pricing
+	let price = book.prices[item_code];
+
+	if (!book.territory) {
+		return {
+			base_price: 0,
+			discount: 0,
+			effective_price: 0,
+			message: __("Customer {0} has no territory assigned", [book.shop])
+		};
+	}
+
+	if (!price) {
+		return {
+			base_price: 0,
+			discount: 0,
+			effective_price: 0,
+			message: __("No base price found for {0} in territory {1}", [item_code, book.territory])
+		};
+	}
+
+	let [base_price, discount, effective_price] = price;
+	return {
+		base_price: base_price,
+		discount: discount,
+		effective_price: effective_price,
+		territory: book.territory,
+		amount: weight_kg > 0 ? effective_price * weight_kg : 0,
+		message: __("Applied {0} pricing: ₹{1}/kg - ₹{2}/kg discount = ₹{3}/kg", [
+			book.territory, base_price, discount, effective_price
+		])
+	};
+};
+
+shiva_erp.pricing.get_price_book = function(shop, posting_date) {
+	// Resolves with a current price book; rejects when none is available
+	let key = shiva_erp.pricing.STORAGE_PREFIX + shop + ":" + posting_date;
+	let stored = shiva_erp.pricing.read_book(key);
+
+	return shiva_erp.pricing.check_version()
+		.then(function() {
+			if (stored && stored.version >= shiva_erp.pricing.known_version) {
+				return stored;
+			}
+
+			return frappe.xcall("shiva_erp.sales_integration.get_price_book", {
+				shop: shop,
+				posting_date: posting_date
+			}).then(function(book) {
+				shiva_erp.pricing.note_version(book.version);
+				shiva_erp.pricing.write_book(key, book);
+				return book;
+			});
+		})
+		.catch(function(error) {
+			// Flaky link: price from the last stored book, the server re-prices on save
+			if (stored) {
+				return stored;
+			}
+			throw error;
+		});
+};
+
+shiva_erp.pricing.check_version = function() {
+	shiva_erp.pricing.listen_for_price_changes();
+
+	if (Date.now() - shiva_erp.pricing.version_checked_at < shiva_erp.pricing.VERSION_CHECK_MS) {
+		return Promise.resolve(shiva_erp.pricing.known_version);
+	}
+
+	return frappe.xcall("shiva_erp.sales_integration.get_price_version").then(function(version) {
+		shiva_erp.pricing.version_checked_at = Date.now();
+		shiva_erp.pricing.note_version(version);
+		return shiva_erp.pricing.known_version;
+	});
+};
+
+shiva_erp.pricing.note_version = function(version) {
+	shiva_erp.pricing.known_version = Math.max(shiva_erp.pricing.known_version, cint(version));
+};
+
+shiva_erp.pricing.listen_for_price_changes = function() {
+	if (shiva_erp.pricing.listening) {
+		return;
+	}
+	shiva_erp.pricing.listening = true;
+
+	frappe.realtime.on("shiva_erp_price_version", function(data) {
+		shiva_erp.pricing.note_version(data.version);
+	});
+};
+
+shiva_erp.pricing.read_book = function(key) {
+	try {
+		return JSON.parse(localStorage.getItem(key));
+	} catch (e) {
+		return null;
+	}
+};
+
+shiva_erp.pricing.write_book = function(key, book) {
+	try {
+		// Keep one book per shop: drop books for other dates
+		let shop_prefix = key.slice(0, key.lastIndexOf(":") + 1);
+		Object.keys(localStorage)
+			.filter(function(k) {
+				return k.startsWith(shop_prefix) && k !== key;
+			})
+			.forEach(function(k) {
+				localStorage.removeItem(k);
+			});
+
+		localStorage.setItem(key, JSON.stringify(book));
+	} catch (e) {
+		// Storage full or disabled: the book is simply not cached
+	}
+};
+
+shiva_erp.pricing.get_queue = function(frm) {
+	if (!frm.__pricing_queue) {
+		frm.__pricing_queue = {rows: {}, versions: {}, options: null, timer: null};
+	}
+	return frm.__pricing_queue;
+};
@@ -0,0 +1,404 @@
+"""
+Report Result Cache for Shiva ERP
+
+Heavy script reports (stock ledger, stock balance, shop sales) are cached in
+Redis keyed by report name + normalized filters. Each cached result carries
+the change counters of its source tables (Redis counters bumped after every
+committed write, see mark_source_changed) and the ledger watermark it was
+built at: row count and latest modified time of every source table. A cached
+result is served without touching the database as long as the counters are
+unchanged; the watermark is read only when they moved.
+
+Reports that pass a `refresh` function are refreshed incrementally: the rows
+inserted (modified after the cached watermark) or deleted (see
+log_deleted_rows) since the cached build are handed to the refresh, which
+folds them into the cached result and its state. The result is rebuilt in
+full when the changes do not add up to the new row count, when there are too
+many, or when the refresh declines (e.g. a backdated posting inside the
+cached range).
+
+Large filter ranges are prepared in a background job instead of inline: the
+viewer gets the last cached result (or an empty report) with a note, and a
+message when the fresh result is ready.
+"""
+
+import hashlib
+import json
+from functools import partial
+
+import frappe
+from frappe import _
+from frappe.utils import cint, get_datetime, getdate, now_datetime
+
+REPORT_CACHE_KEY = "shiva_erp:report:{0}:{1}"
+
+# Cached results expire after a day even without new postings
+REPORT_CACHE_TTL = 24 * 60 * 60
+
+# Filter ranges spanning more days than this are prepared in the background
+LARGE_RANGE_DAYS = 92
+
+# RQ timeout for a background report run (seconds)
+REPORT_JOB_TIMEOUT = 1800
+
+# Committed writes per source DocType (cheap staleness check)
+CHANGE_SEQ_KEY = "shiva_erp:report_changes:{0}"
+
+# Rows deleted from a source DocType, one entry per committed deletion
+DELETION_LOG_KEY = "shiva_erp:report_deletions:{0}"
+DELETION_SEQ_KEY = "shiva_erp:report_deletions_seq:{0}"
+
+# Deletion entries kept per DocType; older caches rebuild in full
+DELETION_LOG_SIZE = 1000
+
+# Above this many changed rows a full rebuild is cheaper than a refresh
+MAX_REFRESH_CHANGES = 5000
+
+
+def get_cached_report(report_name, filters, method, sources, columns, background=False, refresh=None):
+	"""
+	Serve a script report result from the cache, refresh it or (re)build it.
+
+	Args:
+		report_name: Report name (cache namespace)
+		filters: Report filters
+		method: Dotted path of the function building the result from filters.
+			With `refresh`, it returns a dict with the result and its state.
+		sources: DocTypes whose changes invalidate the result
+		columns: Report columns, used while a background run is pending
+		background: Build in a background job instead of inline
+		refresh: Dotted path of refresh(filters, cached, changes) folding the
+			changed rows into the cached result and state (see refresh_report)
+
+	Returns:
+		Report result (columns, data, ...)
+	"""
+	key = get_cache_key(report_name, filters)
+	cached = frappe.cache().get_value(key)
+
+	# Counters first: a write committing meanwhile leaves the result stale rather than ahead
+	changes = get_change_counters(sources)
+	if cached and cached.get("changes") == changes:
+		return cached["result"]
+
+	watermark = get_watermark(sources)
+
+	if cached and cached["watermark"] == watermark:
+		frappe.cache().set_value(key, {**cached, "changes": changes}, expires_in_sec=REPORT_CACHE_TTL)
+		return cached["result"]
+
+	if cached and refresh:
+		refreshed = refresh_report(key, cached, refresh, filters, sources, watermark, changes)
+		if refreshed:
+			return refreshed["result"]
+
+	if not background:
+		return build_report(
+			key, method, filters, sources, watermark, incremental=bool(refresh), changes=changes
+		)["result"]
+
+	frappe.enqueue(
+		"shiva_erp.report_cache.run_report_job",
+		queue="long",
+		timeout=REPORT_JOB_TIMEOUT,
+		job_id=f"shiva_erp_report::{key}",
+		deduplicate=True,
+		report_name=report_name,
+		key=key,
+		method=method,
+		filters=dict(filters),
+		sources=list(sources),
+		incremental=bool(refresh),
+		user=frappe.session.user,
+	)
+
+	if cached:
+		return with_message(
+			cached["result"],
+			_("Showing results as of {0}. Updated results are being prepared in the background.").format(
+				frappe.format(cached["built_on"], "Datetime")
+			),
+		)
+
+	return [
+		columns,
+		[],
+		_("This report is being prepared in the background. You will be notified when it is ready."),
+	]
+
+
+def build_report(key, method, filters, sources, watermark=None, incremental=False, changes=None):
+	"""
+	Run the report and cache the result with the change counters and
+	watermark read before the run
+
+	With `incremental`, the method returns {"result": ..., "state": ...} and
+	the state is cached for the refresh function.
+	"""
+	# A posting during the run leaves the result stale rather than ahead
+	if not watermark:
+		changes = get_change_counters(sources)
+		watermark = get_watermark(sources)
+
+	built = frappe.get_attr(method)(frappe._dict(filters))
+
+	if incremental:
+		result, state = built["result"], built["state"]
+	else:
+		result, state = list(built), None
+
+	cached = {
+		"changes": changes,
+		"watermark": watermark,
+		"built_on": now_datetime(),
+		"result": result,
+		"state": state,
+	}
+	frappe.cache().set_value(key, cached, expires_in_sec=REPORT_CACHE_TTL)
+
+	return cached
+
+
+def refresh_report(key, cached, refresh, filters, sources, watermark, changes=None):
+	"""
+	Fold the rows changed since the cached watermark into the cached result
+
+	The refresh function is called as refresh(filters, cached, changes) and
+	returns {"result": ..., "state": ...}, or None to ask for a full rebuild.
+	It must not mutate `cached`.
+
+	Returns:
+		The updated cache entry, or None when the result has to be rebuilt
+	"""
+	changes = get_changes(sources, cached["watermark"], watermark)
+	if changes is None:
+		return None
+
+	refreshed = frappe.get_attr(refresh)(frappe._dict(filters), cached, changes)
+	if not refreshed:
+		return None
+
+	refreshed = {**refreshed, "changes": changes, "watermark": watermark, "built_on": now_datetime()}
+	frappe.cache().set_value(key, refreshed, expires_in_sec=REPORT_CACHE_TTL)
+
+	return refreshed
+
+
+def get_changes(sources, old_watermark, new_watermark):
+	"""
+	Rows inserted and deleted per source DocType between two watermarks
+
+	Inserted rows are those modified after the old watermark (up to the new
+	one); deleted rows come from the deletion log. None is returned when
+	something was changed that cannot be folded: a modified row created
+	before the old watermark (an edit), or changes that do not account for
+	the new row count exactly (a deletion that was not logged, a trimmed log).
+
+	Returns:
+		dict of DocType → frappe._dict(inserted=[...], deleted=[...]), or None
+	"""
+	changes = {}
+	changed_rows = 0
+
+	for doctype in sources:
+		old = old_watermark.get(doctype)
+		new = new_watermark[doctype]
+
+		if not old or len(old) < 3:
+			return None
+
+		if old == new:
+			changes[doctype] = frappe._dict(inserted=[], deleted=[])
+			continue
+
+		old_count, old_modified, old_seq = old
+		new_count, new_modified, new_seq = new
+
+		deleted = get_deleted_rows(doctype, old_seq, new_seq)
+		if deleted is None:
+			return None
+
+		# Rows inserted and deleted again since the old watermark were never in the result
+		if old_modified:
+			deleted = [row for row in deleted if get_datetime(row.modified) <= get_datetime(old_modified)]
+
+		expected_inserts = new_count - old_count + len(deleted)
+		changed_rows += expected_inserts + len(deleted)
+		if expected_inserts < 0 or changed_rows > MAX_REFRESH_CHANGES:
+			return None
+
+		# Queried whenever rows were modified, even if the count is unchanged: an
+		# edited row (created before the old watermark) cannot be folded
+		inserted = []
+		if old_modified != new_modified:
+			inserted = frappe.db.sql(
+				f"""
+				SELECT *
+				FROM `tab{doctype}`
+				WHERE modified > %(old_modified)s AND modified <= %(new_modified)s
+				ORDER BY creation, name
+				LIMIT %(limit)s
+			""",
+				{
+					"old_modified": old_modified or "1900-01-01",
+					"new_modified": new_modified,
+					"limit": expected_inserts + 1,
+				},
+				as_dict=1,
+			)
+
+		if old_modified and any(get_datetime(row.creation) <= get_datetime(old_modified) for row in inserted):
+			return None
+
+		if len(inserted) != expected_inserts:
+			return None
+
+		changes[doctype] = frappe._dict(inserted=inserted, deleted=deleted)
+
+	return changes
+
+
+def log_deleted_rows(doctype, rows):
+	"""
+	Record rows deleted from a source DocType (e.g. ledger entries removed on
+	cancel) once the transaction commits, so cached results can fold them out
+
+	Args:
+		doctype: Source DocType
+		rows: Deleted rows, with the fields the refresh functions read plus
+			`modified`
+	"""
+	if not rows:
+		return
+
+	frappe.db.after_commit.add(partial(_append_deletions, doctype, [dict(row) for row in rows]))
+	mark_source_changed(doctype)
+
+
+def _append_deletions(doctype, rows):
+	cache = frappe.cache()
+	seq = cache.incr(cache.make_key(DELETION_SEQ_KEY.format(doctype)))
+
+	log_key = DELETION_LOG_KEY.format(doctype)
+	cache.rpush(log_key, frappe.as_json({"seq": seq, "rows": rows}, indent=None))
+	cache.ltrim(log_key, -DELETION_LOG_SIZE, -1)
+
+
+def get_deleted_rows(doctype, old_seq, new_seq):
+	"""
+	Rows deleted between two deletion sequence numbers
+
+	Returns:
+		list of rows, or None when the log no longer (or not yet) holds every
+		entry in the range
+	"""
+	if new_seq == old_seq:
+		return []
+
+	entries = [json.loads(entry) for entry in frappe.cache().lrange(DELETION_LOG_KEY.format(doctype), 0, -1)]
+	entries = [entry for entry in entries if old_seq < entry["seq"] <= new_seq]
+
+	if len(entries) != new_seq - old_seq:
+		return None
+
+	return [frappe._dict(row) for entry in entries for row in entry["rows"]]
+
+
+def run_report_job(report_name, key, method, filters, sources, user, incremental=False):
+	"""Background job: build a large report and tell the user it is ready"""
+	build_report(key, method, filters, sources, incremental=incremental)
+
+	frappe.publish_realtime(
+		"msgprint",
+		_("{0} is ready. Refresh the report to see the results.").format(_(report_name)),
+		user=user,
+	)
+
+
+def mark_source_changed(doctype):
+	"""
+	Bump the change counter of a report source DocType once the current
+	transaction commits (once per DocType and transaction; nothing on
+	rollback). Every write to a source must call it, or cached results of
+	the source are served until they expire.
+	"""
+	pending = getattr(frappe.local, "report_changed_sources", None)
+
+	if not pending:
+		pending = frappe.local.report_changed_sources = set()
+		frappe.db.after_commit.add(_bump_change_counters)
+		frappe.db.after_rollback.add(_discard_changed_sources)
+
+	pending.add(doctype)
+
+
+def _bump_change_counters():
+	cache = frappe.cache()
+	pending = getattr(frappe.local, "report_changed_sources", None) or set()
+	frappe.local.report_changed_sources = set()
+
+	for doctype in pending:
+		cache.incr(cache.make_key(CHANGE_SEQ_KEY.format(doctype)))
+
+
+def _discard_changed_sources():
+	frappe.local.report_changed_sources = set()
+
+
+def get_change_counters(sources):
+	"""Change counter per source DocType (Redis reads only)"""
+	cache = frappe.cache()
+	return {doctype: cint(cache.get(cache.make_key(CHANGE_SEQ_KEY.format(doctype)))) for doctype in sources}
+
+
+def get_watermark(sources):
+	"""
+	Current ledger watermark: row count, latest modified and deletion log
+	sequence per source DocType, plus one Redis read per source
+
+	COUNT(*) is a full scan of the smallest index on InnoDB, so this is read
+	only when the change counters moved (see get_cached_report).
+	"""
+	cache = frappe.cache()
+	watermark = {}
+
+	for doctype in sources:
+		count, modified = frappe.db.sql(f"SELECT COUNT(*), MAX(modified) FROM `tab{doctype}`")[0]
+		deletions = cint(cache.get(cache.make_key(DELETION_SEQ_KEY.format(doctype))))
+		watermark[doctype] = [count, str(modified) if modified else None, deletions]
+
+	return watermark
+
+
+def get_cache_key(report_name, filters):
+	"""Cache key for a report and its normalized filters"""
+	normalized = frappe.as_json(
+		{
+			fieldname: str(value)
+			for fieldname, value in sorted((filters or {}).items())
+			if value not in (None, "", [])
+		},
+		indent=None,
+	)
+	digest = hashlib.sha1(normalized.encode()).hexdigest()
+
+	return REPORT_CACHE_KEY.format(frappe.scrub(report_name), digest)
+
+
+def is_large_range(filters, days=LARGE_RANGE_DAYS):
+	"""Whether the from_date / to_date filters span more than `days` (open ranges count as large)"""
+	if not filters.get("from_date"):
+		return True
+
+	to_date = getdate(filters.get("to_date") or now_datetime())
+	return (to_date - getdate(filters["from_date"])).days > days
+
+
+def with_message(result, message):
+	"""Add a message to a report result, after any message it already has"""
+	result = list(result)
+	while len(result) < 3:
+		result.append(None)
+
+	result[2] = f"{result[2]}<br>{message}" if result[2] else message
+	return result
@@ -7,7 +7,7 @@ Applies shop-wise pricing and discounts based on area and price type.
 
 import frappe
 from frappe import _
-from frappe.utils import flt
+from frappe.utils import flt, getdate
 
 
 def sales_invoice_on_submit(doc, method):
@@ -20,8 +20,8 @@ def sales_invoice_on_submit(doc, method):
 	# Update stock weight ledger for sales
 	update_sales_stock_ledger(doc, "Sales Invoice")
 
-	# Apply shop pricing if not already applied
-	apply_shop_pricing(doc)
+	# Apply shop pricing if not already applied (skipped when the fingerprint matches)
+	apply_shop_pricing(doc, quiet=True)
 
 
 def delivery_note_on_submit(doc, method):
@@ -143,13 +143,9 @@ def reverse_sales_stock_ledger(doc):
 	Args:
 		doc: Sales Invoice or Delivery Note
 	"""
-	frappe.db.sql(
-		"""
-		DELETE FROM `tabStock Weight Ledger`
-		WHERE voucher_type = %s AND voucher_no = %s
-	""",
-		(doc.doctype, doc.name),
-	)
+	from shiva_erp.stock_logic import delete_weight_ledger_entries
+
+	delete_weight_ledger_entries(doc.name, doc.doctype)
 
 	frappe.msgprint(
 		_("Reversed Stock Weight Ledger entries for {0} {1}").format(doc.doctype, doc.name),
@@ -157,7 +153,7 @@ def reverse_sales_stock_ledger(doc):
 	)
 
 
-def apply_shop_pricing(doc):
+def apply_shop_pricing(doc, force=False, quiet=False):
 	"""
 	Apply shop-wise pricing and discounts to Sales Invoice.
 
@@ -168,28 +164,52 @@ def apply_shop_pricing(doc):
 	4. Calculate effective_price = base_price - discount
 	5. Apply: amount = effective_price * weight_kg
 
+	The pricing fingerprint of the result is stored on the invoice; when
+	nothing that affects pricing has changed since (same fingerprint), the
+	invoice is not priced again.
+
 	Args:
 		doc: Sales Invoice document
+		force: Re-price even if the fingerprint matches
+		quiet: Do not show the summary message (bulk and background use)
+
+	Returns:
+		dict with territory, skipped, rows (idx, item_code, weight_kg,
+		base_price, discount, effective_price, amount), warnings and
+		errors (idx, message)
 	"""
+	result = frappe._dict(territory=None, skipped=False, rows=[], warnings=[], errors=[])
+
 	if doc.doctype != "Sales Invoice":
-		return
+		return result
 
 	# Get customer's territory
 	if not doc.customer:
-		return
+		return result
+
+	from shiva_erp.master_cache import get_master_value
 
-	customer = frappe.get_doc("Customer", doc.customer)
-	territory = customer.territory
+	territory = result.territory = get_master_value("Customer", doc.customer, "territory")
 
 	if not territory:
-		frappe.msgprint(
-			_("Customer {0} has no territory assigned. Cannot apply territory-based pricing.").format(
-				doc.customer
-			),
-			indicator="red",
-			alert=True,
+		result.errors.append(
+			{
+				"idx": None,
+				"message": _(
+					"Customer {0} has no territory assigned. Cannot apply territory-based pricing."
+				).format(doc.customer),
+			}
 		)
-		return
+		return show_pricing_summary(result, quiet)
+
+	from shiva_erp.pricing_cache import get_price_version
+
+	price_version = get_price_version()
+	if not force and doc.get("custom_pricing_fingerprint") == get_pricing_fingerprint(
+		doc, territory, price_version
+	):
+		result.skipped = True
+		return result
 
 	for item in doc.items:
 		# Get custom fields
@@ -199,48 +219,51 @@ def apply_shop_pricing(doc):
 			continue
 
 		# 1. Get base price from Item Price Type (by territory)
-		from shiva_erp.shiva_business_erp.doctype.item_price_type.item_price_type import get_base_price
+		from shiva_erp.pricing_cache import get_cached_base_price
 
-		base_price_record = get_base_price(item.item_code, territory, doc.posting_date)
+		base_price_record = get_cached_base_price(item.item_code, territory, doc.posting_date)
 
 		if not base_price_record:
-			frappe.msgprint(
-				_("Row #{0}: No base price found for {1} in territory {2}").format(
-					item.idx, item.item_code, territory
-				),
-				indicator="orange",
-				alert=True,
+			result.warnings.append(
+				{
+					"idx": item.idx,
+					"message": _("Row #{0}: No base price found for {1} in territory {2}").format(
+						item.idx, item.item_code, territory
+					),
+				}
 			)
 			continue
 
 		base_price = flt(base_price_record.get("base_price_per_kg", 0))
 
 		if base_price <= 0:
-			frappe.msgprint(
-				_("Row #{0}: Invalid base price for {1} in territory {2}").format(
-					item.idx, item.item_code, territory
-				),
-				indicator="orange",
-				alert=True,
+			result.warnings.append(
+				{
+					"idx": item.idx,
+					"message": _("Row #{0}: Invalid base price for {1} in territory {2}").format(
+						item.idx, item.item_code, territory
+					),
+				}
 			)
 			continue
 
 		# 2. Get shop-specific discount from Shop Discount
-		from shiva_erp.shiva_business_erp.doctype.shop_discount.shop_discount import get_shop_discount
+		from shiva_erp.pricing_cache import get_cached_shop_discount
 
-		discount = get_shop_discount(doc.customer, item.item_code, doc.posting_date)
+		discount = flt(get_cached_shop_discount(doc.customer, item.item_code, doc.posting_date))
 
 		# 3. Calculate effective price
 		effective_price = base_price - discount
 
 		# Ensure effective price is not negative
 		if effective_price < 0:
-			frappe.msgprint(
-				_(
-					"Row #{0}: Discount (₹{1}/kg) exceeds base price (₹{2}/kg). Setting effective price to 0."
-				).format(item.idx, discount, base_price),
-				indicator="red",
-				alert=True,
+			result.errors.append(
+				{
+					"idx": item.idx,
+					"message": _(
+						"Row #{0}: Discount (₹{1}/kg) exceeds base price (₹{2}/kg). Setting effective price to 0."
+					).format(item.idx, discount, base_price),
+				}
 			)
 			effective_price = 0
 
@@ -258,12 +281,88 @@ def apply_shop_pricing(doc):
 		item.qty = weight_kg  # Override qty to weight for billing
 		item.amount = effective_price * weight_kg
 
-		frappe.msgprint(
-			_("Row #{0}: Applied {1} pricing - ₹{2}/kg (discount: ₹{3}/kg) for {4} kg = ₹{5}").format(
-				item.idx, territory, base_price, discount, weight_kg, item.amount
-			),
-			alert=True,
+		result.rows.append(
+			{
+				"idx": item.idx,
+				"item_code": item.item_code,
+				"weight_kg": weight_kg,
+				"base_price": base_price,
+				"discount": discount,
+				"effective_price": effective_price,
+				"amount": item.amount,
+			}
+		)
+
+	doc.custom_pricing_fingerprint = get_pricing_fingerprint(doc, territory, price_version)
+
+	return show_pricing_summary(result, quiet)
+
+
+def show_pricing_summary(result, quiet=False):
+	"""
+	Show one summary message for a pricing result (unless quiet).
+
+	Args:
+		result: dict returned by apply_shop_pricing
+		quiet: Only return the result
+
+	Returns:
+		The result, unchanged
+	"""
+	if quiet or not (result.rows or result.warnings or result.errors):
+		return result
+
+	lines = []
+	if result.rows:
+		lines.append(
+			_("Applied {0} pricing to {1} rows: ₹{2}").format(
+				result.territory, len(result.rows), flt(sum(row["amount"] for row in result.rows), 2)
+			)
 		)
+	lines.extend(entry["message"] for entry in result.errors + result.warnings)
+
+	frappe.msgprint(
+		"<br>".join(lines),
+		indicator="red" if result.errors else "orange" if result.warnings else "green",
+		alert=True,
+	)
+
+	return result
+
+
+def get_pricing_fingerprint(doc, territory, price_version):
+	"""
+	Hash of everything that determines territory pricing of an invoice.
+
+	Covers customer, territory, posting date, price version and each row's
+	item, weight and rate (so a manually edited rate is priced again).
+
+	Args:
+		doc: Sales Invoice document
+		territory: Customer's territory
+		price_version: Current price version (pricing_cache.get_price_version)
+
+	Returns:
+		str: SHA-1 hex digest
+	"""
+	import hashlib
+
+	payload = [
+		doc.customer,
+		territory,
+		str(getdate(doc.posting_date)),
+		price_version,
+		[
+			(
+				item.item_code,
+				flt(item.get("custom_total_weight_kg")),
+				flt(item.rate, item.precision("rate")),
+			)
+			for item in doc.items
+		],
+	]
+
+	return hashlib.sha1(frappe.as_json(payload).encode()).hexdigest()
 
 
 @frappe.whitelist()
@@ -273,6 +372,9 @@ def apply_shop_pricing_manually(doc):
 
 	Args:
 		doc: Sales Invoice document (as dict from client)
+
+	Returns:
+		dict: Priced invoice data, with the pricing result under "pricing"
 	"""
 	if isinstance(doc, str):
 		import json
@@ -280,9 +382,12 @@ def apply_shop_pricing_manually(doc):
 		doc = json.loads(doc)
 
 	doc_obj = frappe.get_doc(doc)
-	apply_shop_pricing(doc_obj)
+	pricing = apply_shop_pricing(doc_obj, force=True, quiet=True)
 
-	return doc_obj.as_dict()
+	result = doc_obj.as_dict()
+	result["pricing"] = pricing
+
+	return result
 
 
 @frappe.whitelist()
@@ -294,18 +399,18 @@ def apply_pricing_to_invoice(invoice_name):
 		invoice_name: Name of the Sales Invoice
 
 	Returns:
-		dict: Updated invoice data
+		dict: Status, message and the pricing result under "pricing"
 	"""
 	doc = frappe.get_doc("Sales Invoice", invoice_name)
 
 	if doc.docstatus != 0:
 		frappe.throw(_("Cannot modify submitted invoice"))
 
-	apply_shop_pricing(doc)
+	pricing = apply_shop_pricing(doc, force=True, quiet=True)
 	doc.save(ignore_permissions=True)
 	frappe.db.commit()
 
-	return {"status": "success", "message": _("Pricing applied successfully")}
+	return {"status": "success", "message": _("Pricing applied successfully"), "pricing": pricing}
 
 
 def validate_sales_transaction(doc):
@@ -416,9 +521,92 @@ def get_item_pricing(customer, item_code, posting_date=None, weight_kg=0):
 		posting_date = frappe.utils.today()
 
 	# Get customer territory
-	customer_doc = frappe.get_doc("Customer", customer)
-	territory = customer_doc.territory
+	from shiva_erp.master_cache import get_master_value
+
+	territory = get_master_value("Customer", customer, "territory")
+
+	return get_pricing_for_territory(customer, territory, item_code, posting_date, weight_kg)
 
+
+@frappe.whitelist()
+def get_items_pricing(customer, posting_date=None, items=None):
+	"""
+	Get pricing for many invoice rows in one call.
+
+	Used by the form scripts, which debounce row edits and send the whole
+	batch instead of one get_item_pricing call per row.
+
+	Args:
+		customer: Customer name
+		posting_date: Posting date for price lookup
+		items: list (or JSON string) of dicts with row_id, item_code, weight_kg
+
+	Returns:
+		dict of row_id → pricing dict (same shape as get_item_pricing)
+	"""
+	if isinstance(items, str):
+		import json
+
+		items = json.loads(items)
+
+	if not posting_date:
+		posting_date = frappe.utils.today()
+
+	from shiva_erp.master_cache import get_master_value
+
+	territory = get_master_value("Customer", customer, "territory")
+
+	result = {}
+	for row in items or []:
+		if not row.get("item_code"):
+			continue
+
+		result[row.get("row_id")] = get_pricing_for_territory(
+			customer, territory, row.get("item_code"), posting_date, row.get("weight_kg")
+		)
+
+	return result
+
+
+@frappe.whitelist()
+def get_price_book(shop, posting_date=None):
+	"""
+	Get the price book for a shop (item → base, discount, effective ₹/kg).
+
+	Args:
+		shop: Customer name
+		posting_date: Date the prices apply to (defaults to today)
+
+	Returns:
+		dict with version and prices (see pricing_cache.get_price_book)
+	"""
+	from shiva_erp.pricing_cache import get_price_book as get_cached_price_book
+
+	return get_cached_price_book(shop, posting_date)
+
+
+@frappe.whitelist()
+def get_price_version():
+	"""Return the current price version so clients can validate cached price books"""
+	from shiva_erp.pricing_cache import get_price_version
+
+	return get_price_version()
+
+
+def get_pricing_for_territory(customer, territory, item_code, posting_date, weight_kg=0):
+	"""
+	Resolve base price, shop discount and amount for one item.
+
+	Args:
+		customer: Customer name
+		territory: Customer's territory
+		item_code: Item code
+		posting_date: Posting date for price lookup
+		weight_kg: Weight in kg for amount calculation
+
+	Returns:
+		dict with base_price, discount, effective_price, and calculated amount
+	"""
 	if not territory:
 		return {
 			"base_price": 0,
@@ -428,9 +616,9 @@ def get_item_pricing(customer, item_code, posting_date=None, weight_kg=0):
 		}
 
 	# Get base price from Item Price Type (by territory)
-	from shiva_erp.shiva_business_erp.doctype.item_price_type.item_price_type import get_base_price
+	from shiva_erp.pricing_cache import get_cached_base_price
 
-	base_price_record = get_base_price(item_code, territory, posting_date)
+	base_price_record = get_cached_base_price(item_code, territory, posting_date)
 	base_price = flt(base_price_record.get("base_price_per_kg", 0)) if base_price_record else 0
 
 	if base_price <= 0:
@@ -442,9 +630,9 @@ def get_item_pricing(customer, item_code, posting_date=None, weight_kg=0):
 		}
 
 	# Get shop-specific discount
-	from shiva_erp.shiva_business_erp.doctype.shop_discount.shop_discount import get_shop_discount
+	from shiva_erp.pricing_cache import get_cached_shop_discount
 
-	discount = flt(get_shop_discount(customer, item_code, posting_date))
+	discount = flt(get_cached_shop_discount(customer, item_code, posting_date))
 
 	# Calculate effective price = base_price - shop_discount
 	effective_price = base_price - discount
@@ -44,7 +44,7 @@ frappe.ui.form.on('Sales Invoice', {
 					},
 					callback: function(r) {
 						frm.reload_doc();
-						frappe.show_alert(__('Pricing applied successfully'));
+						shiva_erp.pricing.show_summary(r.message && r.message.pricing);
 					}
 				});
 			});
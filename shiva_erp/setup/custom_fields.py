@@ -14,11 +14,32 @@ def setup_custom_fields():
 	Create all custom fields needed for Shiva ERP functionality.
 
 	Custom fields are added to:
+	- Sales Invoice: Pricing fingerprint
 	- Sales Invoice Item: For weight tracking and pricing
 	- Delivery Note Item: For weight tracking
 	- Purchase Receipt Item: For weight tracking
 	"""
-	custom_fields = {
+	create_custom_fields(get_custom_fields(), update=True)
+	frappe.db.commit()
+	print("✓ Custom fields created successfully")
+
+
+def get_custom_fields():
+	"""Custom field definitions by DocType"""
+	return {
+		"Sales Invoice": [
+			{
+				"fieldname": "custom_pricing_fingerprint",
+				"label": "Pricing Fingerprint",
+				"fieldtype": "Data",
+				"insert_after": "customer",
+				"hidden": 1,
+				"read_only": 1,
+				"no_copy": 1,
+				"print_hide": 1,
+				"description": "Inputs of the last territory pricing run (skips identical re-pricing)",
+			},
+		],
 		"Sales Invoice Item": [
 			{
 				"fieldname": "custom_total_weight_kg",
@@ -89,14 +110,11 @@ def setup_custom_fields():
 		],
 	}
 
-	create_custom_fields(custom_fields, update=True)
-	frappe.db.commit()
-	print("✓ Custom fields created successfully")
-
 
 def remove_custom_fields():
 	"""Remove all custom fields created by this app (for cleanup/uninstall)"""
 	custom_fields_to_remove = [
+		("Sales Invoice", "custom_pricing_fingerprint"),
 		("Sales Invoice Item", "custom_total_weight_kg"),
 		("Sales Invoice Item", "custom_base_price_per_kg"),
 		("Sales Invoice Item", "custom_discount_per_kg"),
@@ -34,10 +34,8 @@ frappe.ui.form.on('Sales Invoice', {
 					},
 					callback: function(r) {
 						frm.reload_doc();
-						frappe.show_alert({
-							message: __('Pricing applied successfully'),
-							indicator: 'green'
-						});
+						// One summary for all rows (see shiva_erp/public/js/item_pricing.js)
+						shiva_erp.pricing.show_summary(r.message && r.message.pricing);
 					}
 				});
 			});
@@ -0,0 +1,40 @@
+// Copyright (c) 2026, Gopalakrishna Reddy Gogulamudi and contributors
+// For license information, please see license.txt
+
+frappe.ui.form.on("Bulk Pricing Job", {
+	refresh(frm) {
+		const colors = { Queued: "blue", Running: "orange", Completed: "green", Failed: "red" };
+		frm.page.set_indicator(__(frm.doc.status), colors[frm.doc.status]);
+
+		// Failed jobs can be resumed from the last committed chunk
+		if (frm.doc.status === "Failed") {
+			frm.add_custom_button(__("Resume"), function () {
+				frappe.call({
+					method: "shiva_erp.bulk_pricing_utils.resume_bulk_pricing_job",
+					args: { job_name: frm.doc.name },
+					callback: function () {
+						frm.reload_doc();
+					},
+				});
+			});
+		}
+
+		if (["Queued", "Running"].includes(frm.doc.status)) {
+			frappe.realtime.off("bulk_pricing_progress");
+			frappe.realtime.on("bulk_pricing_progress", function (data) {
+				if (data.job !== frm.doc.name) {
+					return;
+				}
+				if (["Completed", "Failed"].includes(data.status)) {
+					frm.reload_doc();
+				} else {
+					frm.dashboard.show_progress(
+						__("Processing"),
+						data.total ? (data.processed / data.total) * 100 : 0,
+						__("{0} of {1} records", [data.processed, data.total])
+					);
+				}
+			});
+		}
+	},
+});
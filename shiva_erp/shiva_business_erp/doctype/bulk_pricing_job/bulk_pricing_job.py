@@ -0,0 +1,32 @@
+# Copyright (c) 2026, Gopalakrishna Reddy Gogulamudi and contributors
+# For license information, please see license.txt
+
+import json
+
+import frappe
+from frappe.model.document import Document
+
+
+class BulkPricingJob(Document):
+	"""
+	Bulk Pricing Job - Tracks a background bulk price or discount update.
+
+	Created by the bulk pricing endpoints in bulk_pricing_utils and processed
+	by a background worker in committed chunks. Holds the parameters, the
+	progress counters, the resume cursor and the final summary that used to be
+	returned inline by the synchronous endpoints.
+	"""
+
+	def get_parameters(self):
+		"""Return job parameters as a dict"""
+		return frappe._dict(self._load_json(self.parameters) or {})
+
+	def get_summary(self):
+		"""Return job summary as a dict"""
+		return self._load_json(self.summary) or {}
+
+	@staticmethod
+	def _load_json(value):
+		if not value:
+			return None
+		return json.loads(value) if isinstance(value, str) else value
@@ -0,0 +1,155 @@
+# Copyright (c) 2026, Gopalakrishna Reddy Gogulamudi and Contributors
+# See license.txt
+
+from unittest.mock import patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+
+class TestBulkPricingJob(FrappeTestCase):
+	"""Test cases for background bulk pricing jobs"""
+
+	def setUp(self):
+		"""Create test data"""
+		# Jobs commit each chunk; keep everything in the test transaction so it is rolled back
+		for method in ("commit", "rollback"):
+			patcher = patch(f"frappe.db.{method}")
+			patcher.start()
+			self.addCleanup(patcher.stop)
+
+		if not frappe.db.exists("Item", "Test Broiler"):
+			frappe.get_doc(
+				{
+					"doctype": "Item",
+					"item_code": "Test Broiler",
+					"item_name": "Test Broiler Chicken",
+					"item_group": "Products",
+					"stock_uom": "Nos",
+				}
+			).insert(ignore_if_duplicate=True)
+
+		self.price = frappe.get_doc(
+			{
+				"doctype": "Item Price Type",
+				"item_code": "Test Broiler",
+				"territory": "All Territories",
+				"base_price_per_kg": 150.00,
+				"is_active": 1,
+			}
+		).insert()
+
+	def test_base_price_job_completes(self):
+		"""Test that a queued base price update runs and stores its summary"""
+		from shiva_erp.shiva_business_erp.doctype.item_price_type.item_price_type import (
+			bulk_update_base_price,
+		)
+
+		result = bulk_update_base_price(item_code="Test Broiler", new_base_price=165)
+		job = frappe.get_doc("Bulk Pricing Job", result["job"])
+
+		self.assertEqual(job.status, "Completed")
+		self.assertEqual(job.updated_records, 1)
+		self.assertEqual(job.last_processed_name, self.price.name)
+		self.assertEqual(job.get_summary()["items"][0]["new_price"], 165)
+		self.assertEqual(frappe.db.get_value("Item Price Type", self.price.name, "base_price_per_kg"), 165)
+
+	def test_price_update_job_by_territory(self):
+		"""Test that a percentage update selects prices by territory subtree and item"""
+		from shiva_erp.bulk_pricing_utils import bulk_update_price_by_type
+
+		result = bulk_update_price_by_type(
+			territory="All Territories", item_codes="Test Broiler", percentage_change=10
+		)
+		job = frappe.get_doc("Bulk Pricing Job", result["job"])
+
+		self.assertEqual(job.status, "Completed")
+		self.assertEqual(job.total_records, 1)
+		self.assertEqual(frappe.db.get_value("Item Price Type", self.price.name, "base_price_per_kg"), 165)
+
+	def test_failing_job_is_marked_failed(self):
+		"""Test that a job failing while selecting its records ends Failed instead of staying Queued"""
+		from shiva_erp.bulk_pricing_utils import run_bulk_pricing_job
+
+		job = frappe.get_doc(
+			{
+				"doctype": "Bulk Pricing Job",
+				"job_type": "Price Type Update",
+				"status": "Queued",
+				"parameters": frappe.as_json({"price_type": "Wholesale", "percentage_change": 3}),
+			}
+		).insert()
+
+		run_bulk_pricing_job(job.name)
+		job.reload()
+
+		self.assertEqual(job.status, "Failed")
+		self.assertTrue(job.error_log)
+		self.assertEqual(frappe.db.get_value("Item Price Type", self.price.name, "base_price_per_kg"), 150)
+
+	def test_resume_skips_committed_records(self):
+		"""Test that a resumed job continues after its last committed record"""
+		from shiva_erp.bulk_pricing_utils import resume_bulk_pricing_job
+
+		job = frappe.get_doc(
+			{
+				"doctype": "Bulk Pricing Job",
+				"job_type": "Base Price Update",
+				"status": "Failed",
+				"parameters": frappe.as_json({"item_code": "Test Broiler", "new_base_price": 170}),
+				"total_records": 1,
+				"processed_records": 1,
+				"last_processed_name": self.price.name,
+			}
+		).insert()
+
+		resume_bulk_pricing_job(job.name)
+		job.reload()
+
+		self.assertEqual(job.status, "Completed")
+		self.assertEqual(frappe.db.get_value("Item Price Type", self.price.name, "base_price_per_kg"), 150)
+
+	def test_repricing_without_affected_drafts(self):
+		"""Test that no repricing job is queued when no draft invoice is affected"""
+		from shiva_erp.bulk_pricing_utils import reprice_draft_invoices
+
+		self.assertIsNone(reprice_draft_invoices())
+		self.assertIsNone(reprice_draft_invoices(price_keys=[["No Such Territory", "Test Broiler"]]))
+		self.assertFalse(frappe.db.exists("Bulk Pricing Job", {"job_type": "Draft Invoice Repricing"}))
+
+	def test_price_keys_cover_child_territories(self):
+		"""Test that a price change in a territory also selects drafts of its child territories"""
+		from shiva_erp.bulk_pricing_utils import expand_price_keys
+
+		for territory, parent in (
+			("Test Repricing Region", "All Territories"),
+			("Test Repricing Area", "Test Repricing Region"),
+		):
+			if not frappe.db.exists("Territory", territory):
+				frappe.get_doc(
+					{
+						"doctype": "Territory",
+						"territory_name": territory,
+						"parent_territory": parent,
+						"is_group": 1,
+					}
+				).insert()
+
+		self.assertEqual(
+			expand_price_keys([["Test Repricing Region", "Test Broiler"]]),
+			[("Test Repricing Area", "Test Broiler"), ("Test Repricing Region", "Test Broiler")],
+		)
+		self.assertEqual(
+			expand_price_keys([["Test Repricing Area", "Test Broiler"]]),
+			[("Test Repricing Area", "Test Broiler")],
+		)
+
+	def tearDown(self):
+		"""Clean up test data"""
+		frappe.db.delete("Item Price Type", {"item_code": "Test Broiler"})
+		frappe.db.delete("Bulk Pricing Job")
+
+		# Children first: a Territory with children cannot be deleted
+		for territory in ("Test Repricing Area", "Test Repricing Region"):
+			if frappe.db.exists("Territory", territory):
+				frappe.delete_doc("Territory", territory, force=True)
@@ -0,0 +1,207 @@
+# Copyright (c) 2026, Gopalakrishna Reddy Gogulamudi and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe.model.document import Document
+from frappe.utils import add_days, get_last_day, getdate, now_datetime, today
+
+FACT_FIELDS = (
+	"posting_date",
+	"customer",
+	"territory",
+	"item_code",
+	"qty",
+	"weight_kg",
+	"discount_amount",
+	"revenue",
+	"rate_total",
+	"item_rows",
+	"invoice_count",
+)
+
+# Measures added up when an invoice lands on an existing fact row
+MEASURE_FIELDS = FACT_FIELDS[4:]
+
+# Facts of submitted sales documents, grouped by day, shop, area and item.
+# `inv` is the invoice, `item` its item rows; amounts are scaled by %(factor)s.
+SOURCE_QUERIES = {
+	"Sales Invoice": """
+		SELECT
+			inv.posting_date,
+			inv.customer,
+			IFNULL(inv.territory, '') as territory,
+			IFNULL(item.item_code, '') as item_code,
+			SUM(item.qty) * %(factor)s as qty,
+			SUM(IFNULL(item.custom_total_weight_kg, 0)) * %(factor)s as weight_kg,
+			SUM(IFNULL(item.custom_discount_per_kg, 0) * IFNULL(item.custom_total_weight_kg, 0))
+				* %(factor)s as discount_amount,
+			SUM(item.amount) * %(factor)s as revenue,
+			SUM(item.rate) * %(factor)s as rate_total,
+			COUNT(*) * %(factor)s as item_rows,
+			COUNT(DISTINCT inv.name) * %(factor)s as invoice_count
+		FROM `tabSales Invoice` inv
+		INNER JOIN `tabSales Invoice Item` item ON item.parent = inv.name
+		WHERE {conditions}
+		GROUP BY inv.posting_date, inv.customer, inv.territory, item.item_code
+	""",
+	"Poultry Sales Invoice": """
+		SELECT
+			inv.posting_date,
+			inv.customer,
+			IFNULL(inv.territory, '') as territory,
+			IFNULL(item.item_code, '') as item_code,
+			SUM(item.qty) * %(factor)s as qty,
+			SUM(IFNULL(item.weight_kg, 0)) * %(factor)s as weight_kg,
+			SUM(IFNULL(item.discount_per_kg, 0) * IFNULL(item.weight_kg, 0)) * %(factor)s as discount_amount,
+			SUM(item.amount) * %(factor)s as revenue,
+			SUM(item.rate) * %(factor)s as rate_total,
+			COUNT(*) * %(factor)s as item_rows,
+			COUNT(DISTINCT inv.name) * %(factor)s as invoice_count
+		FROM `tabPoultry Sales Invoice` inv
+		INNER JOIN `tabPoultry Sales Invoice Item` item ON item.parent = inv.name
+		WHERE {conditions}
+		GROUP BY inv.posting_date, inv.customer, inv.territory, item.item_code
+	""",
+}
+
+# The name is derived from the key, so an invoice landing on an existing
+# day / shop / area / item adds to that row instead of inserting a new one
+UPSERT_QUERY = """
+	INSERT INTO `tabDaily Sales Fact`
+		(name, owner, creation, modified, modified_by, docstatus, {fields})
+	SELECT
+		SHA1(CONCAT_WS('|', facts.posting_date, facts.customer, facts.territory, facts.item_code)),
+		%(user)s, %(now)s, %(now)s, %(user)s, 0, {facts}
+	FROM ({source}) facts
+	ON DUPLICATE KEY UPDATE
+		{measures},
+		modified = VALUES(modified),
+		modified_by = VALUES(modified_by)
+"""
+
+
+class DailySalesFact(Document):
+	"""
+	Daily Sales Fact - Sales of one shop and item on one day.
+
+	Qty, weight, discount, revenue and invoice count of all submitted Sales
+	Invoices and Poultry Sales Invoices, pre-aggregated per posting date,
+	customer, territory and item so Shop Sales Analysis rolls up days
+	instead of invoice items. Rate Total / Item Rows gives the average rate.
+
+	Maintained on submit / cancel (update_sales_facts, reverse_sales_facts);
+	rebuilt with `bench --site <site> rebuild-daily-sales-facts`.
+
+	Example:
+		Posting Date: 2026-10-19
+		Customer: Sri Balaji Chicken Centre
+		Item: Broiler
+		Weight: 412.5 Kg, Revenue: ₹82,500, Invoices: 3
+	"""
+
+	pass
+
+
+def on_doctype_update():
+	"""Indexes for the rollup: by date range, and by shop within a date range"""
+	frappe.db.add_index("Daily Sales Fact", ["posting_date", "customer"], "posting_date_customer_index")
+	frappe.db.add_index("Daily Sales Fact", ["customer", "posting_date"], "customer_posting_date_index")
+
+
+def update_sales_facts(doc, method=None):
+	"""Sales Invoice / Poultry Sales Invoice on_submit: add the invoice to its facts"""
+	apply_sales_facts(doc.doctype, "inv.name = %(invoice)s", {"invoice": doc.name})
+
+
+def reverse_sales_facts(doc, method=None):
+	"""
+	Sales Invoice / Poultry Sales Invoice on_cancel: take the invoice out of
+	its facts, dropping facts no invoice contributes to anymore
+	"""
+	apply_sales_facts(doc.doctype, "inv.name = %(invoice)s", {"invoice": doc.name}, factor=-1)
+
+	frappe.db.sql(
+		"""
+		DELETE FROM `tabDaily Sales Fact`
+		WHERE posting_date = %(posting_date)s
+			AND customer = %(customer)s
+			AND item_rows <= 0
+	""",
+		{"posting_date": getdate(doc.posting_date), "customer": doc.customer},
+	)
+
+
+def apply_sales_facts(source, conditions, params, factor=1):
+	"""
+	Add (factor 1) or subtract (factor -1) the grouped item rows of a source
+	DocType matching `conditions` to the fact table, in one statement
+
+	Args:
+		source: Sales Invoice or Poultry Sales Invoice
+		conditions: SQL conditions on `inv` (invoice) and `item` (item row)
+		params: Query parameters of the conditions
+		factor: 1 to add, -1 to subtract
+	"""
+	from shiva_erp.report_cache import mark_source_changed
+
+	query = UPSERT_QUERY.format(
+		fields=", ".join(FACT_FIELDS),
+		facts=", ".join(f"facts.{fieldname}" for fieldname in FACT_FIELDS),
+		source=SOURCE_QUERIES[source].format(conditions=conditions),
+		measures=",\n\t\t".join(
+			f"{fieldname} = `tabDaily Sales Fact`.{fieldname} + VALUES({fieldname})"
+			for fieldname in MEASURE_FIELDS
+		),
+	)
+
+	frappe.db.sql(query, {**params, "factor": factor, "user": frappe.session.user, "now": now_datetime()})
+
+	# Cached Shop Sales Analysis results are checked against the table again
+	mark_source_changed("Daily Sales Fact")
+
+
+def rebuild_daily_sales_facts(from_date=None, to_date=None, commit=False):
+	"""
+	Rebuild the facts of a date range from the submitted invoices, one month
+	at a time (set-based, one statement per source and month)
+
+	Args:
+		from_date: First day (default: the earliest invoice)
+		to_date: Last day (default: today)
+		commit: Commit after each month (backfills from the command line)
+
+	Returns:
+		Number of fact rows in the range
+	"""
+	from_date = getdate(from_date or get_first_posting_date())
+	to_date = getdate(to_date or today())
+
+	start = from_date
+	while start <= to_date:
+		end = min(get_last_day(start), to_date)
+
+		frappe.db.delete("Daily Sales Fact", {"posting_date": ["between", [start, end]]})
+		for source in SOURCE_QUERIES:
+			apply_sales_facts(
+				source,
+				"inv.docstatus = 1 AND inv.posting_date BETWEEN %(from_date)s AND %(to_date)s",
+				{"from_date": start, "to_date": end},
+			)
+
+		if commit:
+			frappe.db.commit()
+
+		start = add_days(end, 1)
+
+	return frappe.db.count("Daily Sales Fact", {"posting_date": ["between", [from_date, to_date]]})
+
+
+def get_first_posting_date():
+	"""Earliest posting date of a submitted sales invoice (today when there is none)"""
+	dates = [
+		frappe.db.sql(f"SELECT MIN(posting_date) FROM `tab{source}` WHERE docstatus = 1")[0][0]
+		for source in SOURCE_QUERIES
+	]
+	dates = [date for date in dates if date]
+
+	return min(dates) if dates else today()
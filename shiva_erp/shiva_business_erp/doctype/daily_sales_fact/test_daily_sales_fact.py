@@ -0,0 +1,64 @@
+# Copyright (c) 2026, Gopalakrishna Reddy Gogulamudi and Contributors
+# See license.txt
+
+from unittest.mock import patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from frappe.utils import getdate
+
+from shiva_erp.shiva_business_erp.doctype.daily_sales_fact import daily_sales_fact
+
+
+class TestDailySalesFact(FrappeTestCase):
+	"""Test cases for the daily sales fact table"""
+
+	def test_submit_adds_invoice_in_one_statement(self):
+		"""Test that an invoice is grouped and upserted into its facts with one query"""
+		invoice = frappe._dict(doctype="Poultry Sales Invoice", name="PSI-1")
+
+		with patch("frappe.db.sql") as sql:
+			daily_sales_fact.update_sales_facts(invoice)
+
+		sql.assert_called_once()
+		query, params = sql.call_args[0]
+		self.assertIn("`tabPoultry Sales Invoice Item`", query)
+		self.assertIn("ON DUPLICATE KEY UPDATE", query)
+		self.assertIn("revenue = `tabDaily Sales Fact`.revenue + VALUES(revenue)", query)
+		self.assertEqual((params["invoice"], params["factor"]), ("PSI-1", 1))
+
+	def test_cancel_subtracts_and_drops_empty_facts(self):
+		"""Test that cancelling subtracts the invoice and removes facts left without item rows"""
+		invoice = frappe._dict(
+			doctype="Sales Invoice", name="SINV-1", posting_date="2026-10-19", customer="Shop A"
+		)
+
+		with patch("frappe.db.sql") as sql:
+			daily_sales_fact.reverse_sales_facts(invoice)
+
+		upsert, delete = sql.call_args_list
+		self.assertIn("`tabSales Invoice Item`", upsert[0][0])
+		self.assertEqual(upsert[0][1]["factor"], -1)
+		self.assertIn("item_rows <= 0", delete[0][0])
+		self.assertEqual(delete[0][1]["posting_date"], getdate("2026-10-19"))
+
+	def test_rebuild_month_by_month(self):
+		"""Test that the rebuild replaces each month with one statement per source"""
+		with (
+			patch("frappe.db.delete") as delete,
+			patch("frappe.db.sql") as sql,
+			patch("frappe.db.count", return_value=42),
+		):
+			count = daily_sales_fact.rebuild_daily_sales_facts("2026-08-15", "2026-10-10")
+
+		self.assertEqual(count, 42)
+		self.assertEqual(
+			[call[0][1]["posting_date"][1] for call in delete.call_args_list],
+			[
+				[getdate("2026-08-15"), getdate("2026-08-31")],
+				[getdate("2026-09-01"), getdate("2026-09-30")],
+				[getdate("2026-10-01"), getdate("2026-10-10")],
+			],
+		)
+		self.assertEqual(sql.call_count, 6)
+		self.assertTrue(all("inv.docstatus = 1" in call[0][0] for call in sql.call_args_list))
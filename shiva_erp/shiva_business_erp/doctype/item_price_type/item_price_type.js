@@ -111,8 +111,7 @@ function show_bulk_update_dialog(frm) {
 				},
 				callback: function (r) {
 					if (r.message) {
-						frappe.msgprint(__("Updated {0} price records", [r.message]));
-						frm.reload_doc();
+						track_bulk_pricing_job(frm, r.message.job);
 					}
 					d.hide();
 				},
@@ -122,3 +121,30 @@ function show_bulk_update_dialog(frm) {
 
 	d.show();
 }
+
+function track_bulk_pricing_job(frm, job_name) {
+	// Bulk updates run in the background; follow the job's progress events
+	frappe.realtime.off("bulk_pricing_progress");
+	frappe.realtime.on("bulk_pricing_progress", function (data) {
+		if (data.job !== job_name) {
+			return;
+		}
+
+		frappe.show_progress(__("Bulk Update"), data.processed, data.total || 1, job_name);
+
+		if (data.status === "Completed") {
+			frappe.hide_progress();
+			frappe.realtime.off("bulk_pricing_progress");
+			frappe.msgprint(__("Updated {0} price records ({1})", [data.updated, job_name]));
+			frm.reload_doc();
+		} else if (data.status === "Failed") {
+			frappe.hide_progress();
+			frappe.realtime.off("bulk_pricing_progress");
+			frappe.msgprint({
+				title: __("Bulk Update Failed"),
+				message: __("{0} failed after {1} records. Open the job to resume it.", [job_name, data.processed]),
+				indicator: "red",
+			});
+		}
+	});
+}
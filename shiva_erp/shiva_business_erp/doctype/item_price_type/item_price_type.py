@@ -6,6 +6,24 @@ from frappe import _
 from frappe.model.document import Document
 from frappe.utils import flt, getdate
 
+# As-of base price lookup used by get_base_price, over a territory and its
+# ancestors (at most a handful of rows: one per territory in the chain).
+# Served by the covering index created in on_doctype_update().
+BASE_PRICE_QUERY = """
+	SELECT
+		territory,
+		base_price_per_kg,
+		currency,
+		name
+	FROM `tabItem Price Type`
+	WHERE item_code = %(item_code)s
+		AND territory IN %(territories)s
+		AND is_active = 1
+		AND (valid_from IS NULL OR valid_from <= %(posting_date)s)
+		AND (valid_till IS NULL OR valid_till >= %(posting_date)s)
+	ORDER BY modified DESC
+"""
+
 
 class ItemPriceType(Document):
 	"""
@@ -27,55 +45,44 @@ class ItemPriceType(Document):
 		self.validate_duplicate()
 		self.validate_validity_dates()
 
+	def on_update(self):
+		"""Invalidate cached prices"""
+		from shiva_erp.pricing_cache import clear_price_cache
+
+		clear_price_cache()
+
+	def on_trash(self):
+		"""Invalidate cached prices"""
+		from shiva_erp.pricing_cache import clear_price_cache
+
+		clear_price_cache()
+
 	def validate_base_price(self):
 		"""Ensure base price is positive"""
 		if flt(self.base_price_per_kg) <= 0:
 			frappe.throw(_("Base Price per Kg must be greater than 0"))
 
 	def validate_duplicate(self):
-		"""Prevent duplicate active entries for same item+territory"""
+		"""Prevent overlapping active entries for same item+territory"""
 		if not self.is_active:
 			return
 
-		filters = {
-			"item_code": self.item_code,
-			"territory": self.territory,
-			"is_active": 1,
-			"name": ["!=", self.name],
-		}
+		from shiva_erp.pricing_validation import find_overlapping_record
 
-		# Check for overlapping validity periods
-		existing = frappe.db.get_all(
+		existing = find_overlapping_record(
 			"Item Price Type",
-			filters=filters,
-			fields=["name", "valid_from", "valid_till"],
+			{"item_code": self.item_code, "territory": self.territory},
+			self.valid_from,
+			self.valid_till,
+			exclude_name=self.name,
 		)
 
 		if existing:
-			for record in existing:
-				if self.check_validity_overlap(record):
-					frappe.throw(
-						_("Active price record already exists for {0} ({1}): {2}").format(
-							self.item_code, self.territory, record.name
-						)
-					)
-
-	def check_validity_overlap(self, existing_record):
-		"""Check if validity periods overlap"""
-		# If either record has no validity dates, consider it overlapping
-		if not self.valid_from or not self.valid_till:
-			return True
-
-		if not existing_record.get("valid_from") or not existing_record.get("valid_till"):
-			return True
-
-		self_from = getdate(self.valid_from)
-		self_till = getdate(self.valid_till)
-		existing_from = getdate(existing_record.get("valid_from"))
-		existing_till = getdate(existing_record.get("valid_till"))
-
-		# Check for overlap
-		return not (self_till < existing_from or self_from > existing_till)
+			frappe.throw(
+				_("Active price record already exists for {0} ({1}): {2}").format(
+					self.item_code, self.territory, existing
+				)
+			)
 
 	def validate_validity_dates(self):
 		"""Ensure valid_till is after valid_from"""
@@ -84,58 +91,80 @@ class ItemPriceType(Document):
 				frappe.throw(_("Valid Till date cannot be before Valid From date"))
 
 
+def on_doctype_update():
+	"""
+	Composite covering index for the as-of price lookup and overlap check.
+
+	Equality columns first (item_code, territory, is_active), then the
+	validity range, then the ORDER BY and selected columns so BASE_PRICE_QUERY
+	is answered from the index alone.
+	"""
+	frappe.db.add_index(
+		"Item Price Type",
+		[
+			"item_code",
+			"territory",
+			"is_active",
+			"valid_from",
+			"valid_till",
+			"modified",
+			"base_price_per_kg",
+			"currency",
+		],
+		"item_territory_validity_index",
+	)
+
+
 @frappe.whitelist()
 def get_base_price(item_code, territory, posting_date=None):
 	"""
 	Get base price for an item and territory.
 
+	Falls back up the Territory tree: a territory without an active price
+	uses the price of its nearest ancestor that has one.
+
 	Args:
 		item_code: Item code
 		territory: Territory from customer master
 		posting_date: Date to check validity (default: today)
 
 	Returns:
-		dict with base_price_per_kg, currency, name
+		dict with territory (where the price was found), base_price_per_kg,
+		currency, name
 	"""
 	if not posting_date:
 		posting_date = frappe.utils.today()
 
-	filters = {
-		"item_code": item_code,
-		"territory": territory,
-		"is_active": 1,
-	}
-
-	# Build validity condition
-	validity_condition = """
-		AND (
-			(valid_from IS NULL OR valid_from <= %(posting_date)s)
-			AND (valid_till IS NULL OR valid_till >= %(posting_date)s)
-		)
-	"""
+	from shiva_erp.master_cache import get_territory_chain
+
+	chain = get_territory_chain(territory)
+	if not chain:
+		return None
 
 	price_records = frappe.db.sql(
-		f"""
-		SELECT
-			base_price_per_kg,
-			currency,
-			name
-		FROM `tabItem Price Type`
-		WHERE item_code = %(item_code)s
-			AND territory = %(territory)s
-			AND is_active = 1
-			{validity_condition}
-		ORDER BY modified DESC
-		LIMIT 1
-	""",
-		{**filters, "posting_date": posting_date},
+		BASE_PRICE_QUERY,
+		{"item_code": item_code, "territories": chain, "posting_date": posting_date},
 		as_dict=True,
 	)
 
-	if price_records:
-		return price_records[0]
+	return pick_nearest_price(price_records, chain)
+
+
+def pick_nearest_price(price_records, chain):
+	"""
+	Price record of the nearest territory in the chain.
+
+	Records must be ordered by modified DESC, so the latest record wins
+	within a territory.
+	"""
+	rank = {territory: index for index, territory in enumerate(chain)}
+	nearest = None
+
+	for record in price_records:
+		if nearest is None or rank[record.territory] < rank[nearest.territory]:
+			nearest = record
 
-	return None
+	return nearest
 
 
 @frappe.whitelist()
@@ -143,32 +172,22 @@ def bulk_update_base_price(item_code=None, territory=None, new_base_price=None):
 	"""
 	Bulk update base price for items matching filters.
 
+	Queued as a background Bulk Pricing Job.
+
 	Args:
 		item_code: Filter by item (optional)
 		territory: Filter by territory (optional)
 		new_base_price: New base price value (required)
 
 	Returns:
-		Number of records updated
+		dict with the queued job name and status
 	"""
 	if not new_base_price:
 		frappe.throw(_("Please provide new base price"))
 
-	filters = {"is_active": 1}
-
-	if item_code:
-		filters["item_code"] = item_code
-
-	if territory:
-		filters["territory"] = territory
+	from shiva_erp.bulk_pricing_utils import enqueue_bulk_pricing_job
 
-	records = frappe.db.get_all("Item Price Type", filters=filters, pluck="name")
-
-	updated_count = 0
-	for record_name in records:
-		doc = frappe.get_doc("Item Price Type", record_name)
-		doc.base_price_per_kg = flt(new_base_price)
-		doc.save(ignore_permissions=True)
-		updated_count += 1
-
-	return updated_count
+	return enqueue_bulk_pricing_job(
+		"Base Price Update",
+		{"item_code": item_code, "territory": territory, "new_base_price": flt(new_base_price)},
+	)
@@ -85,6 +85,59 @@ class TestItemPriceType(FrappeTestCase):
 		with self.assertRaises(frappe.ValidationError):
 			price.insert()
 
+	def test_territory_fallback(self):
+		"""Test that a territory without a price uses its nearest priced ancestor"""
+		from shiva_erp.shiva_business_erp.doctype.item_price_type.item_price_type import get_base_price
+
+		for territory, parent in (
+			("Test Price Region", "All Territories"),
+			("Test Price Area", "Test Price Region"),
+		):
+			if not frappe.db.exists("Territory", territory):
+				frappe.get_doc(
+					{
+						"doctype": "Territory",
+						"territory_name": territory,
+						"parent_territory": parent,
+						"is_group": 1,
+					}
+				).insert()
+
+		frappe.get_doc(
+			{
+				"doctype": "Item Price Type",
+				"item_code": "Test Broiler",
+				"territory": "All Territories",
+				"base_price_per_kg": 140.00,
+				"is_active": 1,
+			}
+		).insert()
+		frappe.get_doc(
+			{
+				"doctype": "Item Price Type",
+				"item_code": "Test Broiler",
+				"territory": "Test Price Region",
+				"base_price_per_kg": 150.00,
+				"is_active": 1,
+			}
+		).insert()
+
+		price = get_base_price("Test Broiler", "Test Price Area")
+		self.assertEqual(price.base_price_per_kg, 150.00)
+		self.assertEqual(price.territory, "Test Price Region")
+
+		price = get_base_price("Test Broiler", "Test Price Region")
+		self.assertEqual(price.base_price_per_kg, 150.00)
+
+		frappe.db.delete("Item Price Type", {"item_code": "Test Broiler", "territory": "Test Price Region"})
+		price = get_base_price("Test Broiler", "Test Price Area")
+		self.assertEqual(price.territory, "All Territories")
+
 	def tearDown(self):
 		"""Clean up test data"""
 		frappe.db.delete("Item Price Type", {"item_code": "Test Broiler"})
+
+		# Children first: a Territory with children cannot be deleted
+		for territory in ("Test Price Area", "Test Price Region"):
+			if frappe.db.exists("Territory", territory):
+				frappe.delete_doc("Territory", territory, force=True)
@@ -0,0 +1,525 @@
+# Copyright (c) 2026, Gopalakrishna Reddy Gogulamudi and contributors
+# For license information, please see license.txt
+
+import bisect
+
+import frappe
+from frappe import _
+from frappe.model.document import Document
+from frappe.utils import add_days, flt, get_first_day, getdate, today
+
+# Party types whose balances are snapshotted (statement openings)
+PARTY_TYPES = ("Customer", "Supplier")
+
+# Month end up to which snapshots are built (stored as a global default)
+SNAPSHOT_HORIZON = "party_balance_snapshot_horizon"
+
+# Named lock held by the build, and at commit by postings into months it may cover
+SNAPSHOT_LOCK = "{0}:party_balance_snapshot"
+SNAPSHOT_LOCK_TIMEOUT = 60
+
+SNAPSHOT_FIELDS = ("party_type", "party", "company", "period_end", "closing_balance")
+
+# Movement per party and month in one scan over the period
+MOVEMENT_QUERY = """
+	SELECT
+		party_type,
+		party,
+		company,
+		LAST_DAY(posting_date) as period_end,
+		SUM(debit - credit) as movement
+	FROM `tabGL Entry`
+	WHERE party_type IN %(party_types)s
+		AND IFNULL(party, '') != ''
+		AND is_cancelled = 0
+		AND posting_date > %(after)s
+		AND posting_date <= %(until)s
+		{conditions}
+	GROUP BY party_type, party, company, LAST_DAY(posting_date)
+	ORDER BY party_type, party, company, period_end
+"""
+
+# Latest snapshot per party on or before a date
+LATEST_SNAPSHOT_QUERY = """
+	SELECT
+		s.party_type,
+		s.party,
+		s.company,
+		s.period_end,
+		s.closing_balance
+	FROM `tabParty Balance Snapshot` s
+	INNER JOIN (
+		SELECT party_type, party, company, MAX(period_end) as period_end
+		FROM `tabParty Balance Snapshot`
+		WHERE period_end <= %(date)s
+			{conditions}
+		GROUP BY party_type, party, company
+	) latest
+		ON latest.party_type = s.party_type
+		AND latest.party = s.party
+		AND latest.company = s.company
+		AND latest.period_end = s.period_end
+"""
+
+
+class PartyBalanceSnapshot(Document):
+	"""
+	Party Balance Snapshot - Closing balance of a party at a month end.
+
+	Closing Balance is the sum of debit - credit of every GL Entry of the
+	party and company up to and including Period End. Snapshots are sparse:
+	a month gets one when the party had GL movement in it.
+
+	Built by build_party_balance_snapshots (daily), kept current on
+	backdated GL postings and deletions (record_party_movement) and verified
+	by reconcile_party_balance_snapshots (weekly).
+
+	Example:
+		Party: Customer Sri Balaji Chicken Centre
+		Period End: 2026-09-30
+		Closing Balance: ₹48,250
+	"""
+
+	pass
+
+
+def on_doctype_update():
+	"""
+	Covering index for the latest-snapshot lookup, and a party / posting date
+	index on GL Entry so the delta after a snapshot is an index range scan.
+	"""
+	frappe.db.add_index(
+		"Party Balance Snapshot",
+		["party_type", "party", "company", "period_end", "closing_balance"],
+		"party_period_index",
+	)
+	frappe.db.add_index(
+		"GL Entry", ["party_type", "party", "company", "posting_date"], "party_posting_date_index"
+	)
+
+
+def get_snapshot_horizon(lock=False):
+	"""
+	Month end up to which snapshots are built, None before the first build
+
+	Read from the table rather than the defaults cache, which another worker
+	may refill with the old value while a build commits. With `lock`, the
+	latest committed value is read instead of the transaction's snapshot.
+	"""
+	horizon = frappe.db.sql(
+		f"""
+		SELECT defvalue
+		FROM `tabDefaultValue`
+		WHERE parent = '__default' AND defkey = %(key)s
+		{"LOCK IN SHARE MODE" if lock else ""}
+	""",
+		{"key": SNAPSHOT_HORIZON},
+	)
+	return getdate(horizon[0][0]) if horizon and horizon[0][0] else None
+
+
+def acquire_snapshot_lock():
+	"""Take the site's snapshot lock (held until release_snapshot_lock); False on timeout"""
+	return bool(
+		frappe.db.sql(
+			"SELECT GET_LOCK(%s, %s)", (SNAPSHOT_LOCK.format(frappe.conf.db_name), SNAPSHOT_LOCK_TIMEOUT)
+		)[0][0]
+	)
+
+
+def release_snapshot_lock():
+	"""Release the site's snapshot lock"""
+	frappe.db.sql("SELECT RELEASE_LOCK(%s)", (SNAPSHOT_LOCK.format(frappe.conf.db_name),))
+
+
+def get_party_opening_balances(party_type, parties, company, from_date):
+	"""
+	Balance (debit - credit) of each party before from_date
+
+	Reads the nearest snapshot before from_date and adds the GL entries
+	after it (one query per distinct snapshot date, usually one or two).
+
+	Args:
+		party_type: Customer or Supplier
+		parties: Party names
+		company: Company
+		from_date: First date not included
+
+	Returns:
+		dict of party → balance (parties without entries are absent)
+	"""
+	if not parties or not from_date:
+		return {}
+
+	from_date = getdate(from_date)
+	balances = {}
+	snapshot_dates = {}
+
+	for row in get_latest_snapshots(add_days(from_date, -1), party_type, parties, company):
+		balances[row.party] = row.closing_balance
+		snapshot_dates[row.party] = row.period_end
+
+	# Parties grouped by the date their delta starts after
+	groups = {}
+	for party in parties:
+		groups.setdefault(snapshot_dates.get(party), []).append(party)
+
+	for after, group in groups.items():
+		deltas = frappe.db.sql(
+			"""
+			SELECT party, SUM(debit - credit)
+			FROM `tabGL Entry`
+			WHERE party_type = %(party_type)s
+				AND party IN %(parties)s
+				AND company = %(company)s
+				AND posting_date > %(after)s
+				AND posting_date < %(from_date)s
+				AND is_cancelled = 0
+			GROUP BY party
+		""",
+			{
+				"party_type": party_type,
+				"parties": group,
+				"company": company,
+				"after": after or "1900-01-01",
+				"from_date": from_date,
+			},
+		)
+
+		for party, delta in deltas:
+			balances[party] = balances.get(party, 0) + delta
+
+	return balances
+
+
+def get_latest_snapshots(on_or_before, party_type=None, parties=None, company=None):
+	"""Latest snapshot of each party on or before a date (optionally narrowed to parties)"""
+	conditions, params = get_key_conditions(party_type, parties, company)
+	params["date"] = on_or_before
+
+	return frappe.db.sql(LATEST_SNAPSHOT_QUERY.format(conditions=conditions), params, as_dict=1)
+
+
+def get_key_conditions(party_type=None, parties=None, company=None):
+	"""Conditions narrowing snapshot / GL queries to a party type, parties and company"""
+	conditions = []
+	params = {}
+
+	if party_type:
+		conditions.append("AND party_type = %(party_type)s")
+		params["party_type"] = party_type
+
+	if parties:
+		conditions.append("AND party IN %(parties)s")
+		params["parties"] = list(parties)
+
+	if company:
+		conditions.append("AND company = %(company)s")
+		params["company"] = company
+
+	return " ".join(conditions), params
+
+
+def build_party_balance_snapshots(until=None):
+	"""
+	Scheduled job (daily): snapshot every closed month after the horizon
+
+	All months since the last build (everything on the first run) come from
+	one grouped GL scan, continued from each party's latest snapshot.
+
+	The build holds the snapshot lock and starts a fresh transaction, so its
+	scan sees every posting committed before it. Postings into the months it
+	covers wait at commit and are added once the new horizon is committed
+	(see record_party_movement).
+
+	Returns:
+		Number of snapshots written
+	"""
+	until = getdate(until) if until else add_days(get_first_day(today()), -1)
+
+	if not acquire_snapshot_lock():
+		return 0
+
+	try:
+		frappe.db.commit()
+
+		horizon = get_snapshot_horizon(lock=True)
+		if horizon and horizon >= until:
+			return 0
+
+		count = write_snapshots(horizon, until)
+		frappe.db.set_default(SNAPSHOT_HORIZON, str(until))
+		frappe.db.commit()
+	finally:
+		release_snapshot_lock()
+
+	return count
+
+
+def write_snapshots(after, until, party_type=None, party=None, company=None):
+	"""
+	Write month-end snapshots for the GL movement after `after` up to `until`
+
+	Args:
+		after: Last month end already snapshotted (None: from the beginning)
+		until: Last month end to snapshot
+		party_type, party, company: Narrow to one party (rebuilds)
+
+	Returns:
+		Number of snapshots written
+	"""
+	conditions, params = get_key_conditions(party_type, [party] if party else None, company)
+	params.update(party_types=PARTY_TYPES, after=after or "1900-01-01", until=until)
+
+	movements = frappe.db.sql(MOVEMENT_QUERY.format(conditions=conditions), params, as_dict=1)
+	if not movements:
+		return 0
+
+	balances = {}
+	if after:
+		for row in get_latest_snapshots(after, party_type, [party] if party else None, company):
+			balances[(row.party_type, row.party, row.company)] = row.closing_balance
+
+	now = frappe.utils.now_datetime()
+	user = frappe.session.user
+	fields = ["name", "owner", "creation", "modified", "modified_by", "docstatus", *SNAPSHOT_FIELDS]
+
+	values = []
+	for row in movements:
+		key = (row.party_type, row.party, row.company)
+		balances[key] = balances.get(key, 0) + row.movement
+
+		values.append(
+			[frappe.generate_hash(length=10), user, now, now, user, 0, *key, row.period_end, balances[key]]
+		)
+
+	frappe.db.bulk_insert("Party Balance Snapshot", fields, values)
+
+	return len(values)
+
+
+def update_snapshots_for_gl_entry(doc, method=None):
+	"""
+	GL Entry after_insert: keep snapshots current for backdated postings
+
+	after_insert also runs for entries that are inserted without being
+	submitted (e.g. by Poultry Sales Invoice). Cancellations are covered by
+	the reversing entry (original date, debit and credit swapped). Reposted
+	entries (whose predecessors were deleted without events) rebuild the
+	party's snapshots instead.
+	"""
+	record_party_movement(
+		doc.party_type,
+		doc.party,
+		doc.company,
+		doc.posting_date,
+		flt(doc.debit) - flt(doc.credit),
+		rebuild=doc.flags.from_repost,
+	)
+
+
+def record_party_movement(party_type, party, company, posting_date, movement, rebuild=False):
+	"""
+	Add a party's GL movement (debit - credit) to its snapshots from
+	posting_date on
+
+	Postings on or before the horizon update the snapshots right away.
+	Postings into a closed month after the horizon may be missed by a build
+	running now, so they are checked again at commit, under the snapshot
+	lock, against the horizon as committed.
+
+	Args:
+		party_type, party, company: Party of the GL movement
+		posting_date: Posting date of the movement
+		movement: debit - credit (credit - debit to take a deleted entry out)
+		rebuild: Rebuild the party's snapshots instead of adding the movement
+	"""
+	if party_type not in PARTY_TYPES or not party:
+		return
+
+	posting_date = getdate(posting_date)
+	horizon = get_snapshot_horizon()
+
+	if horizon and posting_date <= horizon:
+		_apply_party_movement(party_type, party, company, posting_date, movement, rebuild)
+
+	# Closed months, plus the current one on its last day (a build may start before the commit)
+	elif posting_date < get_first_day(add_days(today(), 1)):
+		pending = getattr(frappe.local, "party_snapshot_pending", None)
+
+		if not pending:
+			pending = frappe.local.party_snapshot_pending = []
+			frappe.db.before_commit.add(flush_pending_movements)
+			frappe.db.after_rollback.add(_discard_pending_movements)
+
+		pending.append((party_type, party, company, posting_date, movement, rebuild))
+
+
+def _apply_party_movement(party_type, party, company, posting_date, movement, rebuild=False):
+	if rebuild:
+		queue_party_rebuild(party_type, party, company)
+		return
+
+	frappe.db.sql(
+		"""
+		UPDATE `tabParty Balance Snapshot`
+		SET closing_balance = closing_balance + %(movement)s
+		WHERE party_type = %(party_type)s
+			AND party = %(party)s
+			AND company = %(company)s
+			AND period_end >= %(posting_date)s
+	""",
+		{
+			"movement": movement,
+			"party_type": party_type,
+			"party": party,
+			"company": company,
+			"posting_date": posting_date,
+		},
+	)
+
+
+def flush_pending_movements():
+	"""
+	Add the queued movements covered by the horizon as committed
+
+	Waits for a running build; the lock is released once this transaction
+	commits or rolls back. On a lock timeout the movements are left to the
+	weekly reconciliation.
+	"""
+	pending = getattr(frappe.local, "party_snapshot_pending", None)
+	frappe.local.party_snapshot_pending = []
+
+	if not pending:
+		return
+
+	if not acquire_snapshot_lock():
+		frappe.log_error(
+			title=_("Party Balance Snapshot lock timeout"),
+			message="\n".join(" | ".join(map(str, entry[:4])) for entry in pending),
+		)
+		return
+
+	frappe.db.after_commit.add(release_snapshot_lock)
+	frappe.db.after_rollback.add(release_snapshot_lock)
+
+	horizon = get_snapshot_horizon(lock=True)
+	for party_type, party, company, posting_date, movement, rebuild in pending:
+		if horizon and posting_date <= horizon:
+			_apply_party_movement(party_type, party, company, posting_date, movement, rebuild)
+
+
+def _discard_pending_movements():
+	frappe.local.party_snapshot_pending = []
+
+
+def queue_party_rebuild(party_type, party, company):
+	"""Rebuild a party's snapshots just before the current transaction commits"""
+	rebuilds = getattr(frappe.local, "party_snapshot_rebuilds", None)
+
+	if not rebuilds:
+		rebuilds = frappe.local.party_snapshot_rebuilds = set()
+		frappe.db.before_commit.add(flush_party_rebuilds)
+		frappe.db.after_rollback.add(_discard_party_rebuilds)
+
+	rebuilds.add((party_type, party, company))
+
+
+def flush_party_rebuilds():
+	"""Rebuild the queued parties now"""
+	rebuilds = getattr(frappe.local, "party_snapshot_rebuilds", None) or set()
+	frappe.local.party_snapshot_rebuilds = set()
+
+	for key in rebuilds:
+		rebuild_party_snapshots(*key)
+
+
+def _discard_party_rebuilds():
+	frappe.local.party_snapshot_rebuilds = set()
+
+
+def rebuild_party_snapshots(party_type, party, company):
+	"""Recompute all snapshots of one party up to the horizon"""
+	frappe.db.delete("Party Balance Snapshot", {"party_type": party_type, "party": party, "company": company})
+
+	horizon = get_snapshot_horizon(lock=True)
+	if horizon:
+		write_snapshots(None, horizon, party_type, party, company)
+
+
+def reconcile_party_balance_snapshots(repair=True):
+	"""
+	Scheduled job (weekly): prove every snapshot equals the GL sum it stands for
+
+	Monthly GL movement up to the horizon comes from one grouped scan; each
+	snapshot must equal its party's cumulative movement at its period end
+	(at the field's currency precision). Mismatching parties are logged and,
+	with `repair`, rebuilt.
+
+	Returns:
+		Sorted list of mismatching (party_type, party, company) keys
+	"""
+	horizon = get_snapshot_horizon()
+	if not horizon:
+		return []
+
+	movements = frappe.db.sql(
+		MOVEMENT_QUERY.format(conditions=""),
+		{"party_types": PARTY_TYPES, "after": "1900-01-01", "until": horizon},
+		as_dict=1,
+	)
+
+	# Cumulative balance per party at each month end with movement
+	cumulative = {}
+	for row in movements:
+		periods, balances = cumulative.setdefault((row.party_type, row.party, row.company), ([], []))
+		periods.append(getdate(row.period_end))
+		balances.append((balances[-1] if balances else 0) + row.movement)
+
+	snapshots = frappe.db.sql(
+		"""
+		SELECT party_type, party, company, period_end, closing_balance
+		FROM `tabParty Balance Snapshot`
+		WHERE period_end <= %(horizon)s
+	""",
+		{"horizon": horizon},
+		as_dict=1,
+	)
+
+	# Float sums of DECIMAL amounts are compared at the field's precision
+	precision = frappe.get_precision("Party Balance Snapshot", "closing_balance")
+	mismatches = set()
+	snapshotted = set()
+
+	for row in snapshots:
+		key = (row.party_type, row.party, row.company)
+		snapshotted.add(key)
+
+		periods, balances = cumulative.get(key, ([], []))
+		index = bisect.bisect_right(periods, getdate(row.period_end))
+		expected = balances[index - 1] if index else 0
+
+		if flt(row.closing_balance, precision) != flt(expected, precision):
+			mismatches.add(key)
+
+	# Parties with movement but no snapshot at all
+	mismatches.update(set(cumulative) - snapshotted)
+
+	if mismatches:
+		frappe.log_error(
+			title=_("Party Balance Snapshot mismatches"),
+			message="\n".join(" | ".join(key) for key in sorted(mismatches)),
+		)
+
+		if repair:
+			for key in mismatches:
+				rebuild_party_snapshots(*key)
+
+	return sorted(mismatches)
+
+
+@frappe.whitelist()
+def reconcile():
+	"""Run the snapshot reconciliation now (System Manager)"""
+	frappe.only_for("System Manager")
+	return reconcile_party_balance_snapshots()
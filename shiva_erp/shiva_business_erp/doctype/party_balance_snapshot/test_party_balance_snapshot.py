@@ -0,0 +1,182 @@
+# Copyright (c) 2026, Gopalakrishna Reddy Gogulamudi and Contributors
+# See license.txt
+
+from unittest.mock import patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from frappe.utils import getdate
+
+from shiva_erp.shiva_business_erp.doctype.party_balance_snapshot import party_balance_snapshot as snapshot
+
+COMPANY = "Shiva Poultry"
+
+
+def movement(party, period_end, amount):
+	return frappe._dict(
+		party_type="Customer", party=party, company=COMPANY, period_end=getdate(period_end), movement=amount
+	)
+
+
+def snapshot_row(party, period_end, balance):
+	return frappe._dict(
+		party_type="Customer",
+		party=party,
+		company=COMPANY,
+		period_end=getdate(period_end),
+		closing_balance=balance,
+	)
+
+
+class TestPartyBalanceSnapshot(FrappeTestCase):
+	"""Test cases for the month-end party balance snapshots"""
+
+	def test_opening_from_snapshot_and_delta(self):
+		"""Test that openings add the GL entries after each party's latest snapshot"""
+		snapshots = [snapshot_row("Shop A", "2026-09-30", 1000), snapshot_row("Shop B", "2026-08-31", 500)]
+		deltas = [[("Shop A", 50)], [("Shop B", -100)], [("Shop C", 20)]]
+
+		with (
+			patch.object(snapshot, "get_latest_snapshots", return_value=snapshots) as latest,
+			patch("frappe.db.sql", side_effect=deltas) as sql,
+		):
+			balances = snapshot.get_party_opening_balances(
+				"Customer", ["Shop A", "Shop B", "Shop C", "Shop D"], COMPANY, "2026-10-15"
+			)
+
+		self.assertEqual(latest.call_args[0][0], getdate("2026-10-14"))
+		self.assertEqual(balances, {"Shop A": 1050, "Shop B": 400, "Shop C": 20})
+
+		# One delta query per snapshot date, parties without a snapshot from the beginning
+		self.assertEqual(sql.call_count, 3)
+		self.assertEqual(
+			[(call[0][1]["after"], call[0][1]["parties"]) for call in sql.call_args_list],
+			[
+				(getdate("2026-09-30"), ["Shop A"]),
+				(getdate("2026-08-31"), ["Shop B"]),
+				("1900-01-01", ["Shop C", "Shop D"]),
+			],
+		)
+
+	def test_snapshots_continue_from_latest(self):
+		"""Test that new month ends are cumulative from the party's latest snapshot"""
+		movements = [
+			movement("Shop A", "2026-08-31", 100),
+			movement("Shop A", "2026-09-30", -30),
+			movement("Shop B", "2026-09-30", 70),
+		]
+
+		with (
+			patch("frappe.db.sql", return_value=movements),
+			patch.object(
+				snapshot, "get_latest_snapshots", return_value=[snapshot_row("Shop A", "2026-07-31", 1000)]
+			),
+			patch("frappe.db.bulk_insert") as bulk_insert,
+		):
+			count = snapshot.write_snapshots(getdate("2026-07-31"), getdate("2026-09-30"))
+
+		self.assertEqual(count, 3)
+		values = bulk_insert.call_args[0][2]
+		self.assertEqual((values[0][7], values[0][9]), ("Shop A", getdate("2026-08-31")))
+		self.assertEqual([row[10] for row in values], [1100, 1070, 70])
+
+	def test_backdated_posting_updates_later_snapshots(self):
+		"""Test that a posting on or before the horizon moves every later snapshot of the party"""
+		entry = frappe._dict(
+			party_type="Customer",
+			party="Shop A",
+			company=COMPANY,
+			posting_date="2026-08-15",
+			debit=0,
+			credit=40,
+		)
+		entry.flags = frappe._dict()
+
+		with (
+			patch.object(snapshot, "get_snapshot_horizon", return_value=getdate("2026-09-30")),
+			patch.object(snapshot, "today", return_value="2026-10-19"),
+			patch("frappe.db.sql") as sql,
+		):
+			snapshot.update_snapshots_for_gl_entry(entry)
+			self.assertEqual(sql.call_args[0][1]["movement"], -40)
+			self.assertEqual(sql.call_args[0][1]["posting_date"], getdate("2026-08-15"))
+
+			# Postings in the open month are picked up by the next build
+			sql.reset_mock()
+			snapshot.update_snapshots_for_gl_entry(frappe._dict(entry, posting_date="2026-10-02"))
+			sql.assert_not_called()
+			self.assertFalse(getattr(frappe.local, "party_snapshot_pending", None))
+
+	def test_posting_during_build_checked_at_commit(self):
+		"""Test that a posting into a closed month after the horizon is added once a build covers it"""
+		with (
+			patch.object(snapshot, "today", return_value="2026-10-19"),
+			patch.object(snapshot, "acquire_snapshot_lock", return_value=True),
+			patch.object(snapshot, "release_snapshot_lock"),
+			patch("frappe.db.sql") as sql,
+		):
+			# The build has not committed the September horizon yet
+			with patch.object(snapshot, "get_snapshot_horizon", return_value=getdate("2026-08-31")):
+				snapshot.record_party_movement("Customer", "Shop A", COMPANY, "2026-09-15", 40)
+				snapshot.record_party_movement("Customer", "Shop A", COMPANY, "2026-10-05", 10)
+			sql.assert_not_called()
+
+			# At commit it has
+			with patch.object(snapshot, "get_snapshot_horizon", return_value=getdate("2026-09-30")):
+				snapshot.flush_pending_movements()
+
+		sql.assert_called_once()
+		self.assertEqual(sql.call_args[0][1]["movement"], 40)
+		self.assertEqual(sql.call_args[0][1]["posting_date"], getdate("2026-09-15"))
+
+	def test_reconciliation(self):
+		"""Test that snapshots are compared exactly with the cumulative GL movement"""
+		movements = [
+			movement("Shop A", "2026-08-31", 100),
+			movement("Shop A", "2026-09-30", -30),
+			movement("Shop B", "2026-09-30", 70),
+			movement("Shop C", "2026-09-30", 10),
+		]
+		snapshots = [
+			snapshot_row("Shop A", "2026-08-31", 100),
+			snapshot_row("Shop A", "2026-09-30", 70),
+			# A month whose movement was cancelled still carries the balance before it
+			snapshot_row("Shop A", "2026-07-31", 0),
+			snapshot_row("Shop B", "2026-09-30", 70.01),
+		]
+
+		with (
+			patch.object(snapshot, "get_snapshot_horizon", return_value=getdate("2026-09-30")),
+			patch("frappe.get_precision", return_value=2),
+			patch("frappe.db.sql", side_effect=[movements, snapshots]),
+			patch.object(snapshot, "rebuild_party_snapshots") as rebuild,
+			patch("frappe.log_error"),
+		):
+			mismatches = snapshot.reconcile_party_balance_snapshots()
+
+		# Shop B drifted, Shop C has no snapshot
+		expected = [("Customer", "Shop B", COMPANY), ("Customer", "Shop C", COMPANY)]
+		self.assertEqual(mismatches, expected)
+		self.assertEqual(sorted(call[0] for call in rebuild.call_args_list), expected)
+
+	def test_reconciliation_with_fractional_amounts(self):
+		"""Test that float sums of paise amounts match the stored decimal balances"""
+		movements = [
+			movement("Shop A", "2026-08-31", 100.10),
+			movement("Shop A", "2026-09-30", 200.20),
+		]
+		# 100.10 + 200.20 sums to 300.29999999999995 in floats
+		snapshots = [snapshot_row("Shop A", "2026-08-31", 100.1), snapshot_row("Shop A", "2026-09-30", 300.3)]
+
+		with (
+			patch.object(snapshot, "get_snapshot_horizon", return_value=getdate("2026-09-30")),
+			patch("frappe.get_precision", return_value=2),
+			patch("frappe.db.sql", side_effect=[movements, snapshots]),
+			patch.object(snapshot, "rebuild_party_snapshots") as rebuild,
+			patch("frappe.log_error") as log_error,
+		):
+			mismatches = snapshot.reconcile_party_balance_snapshots()
+
+		self.assertEqual(mismatches, [])
+		rebuild.assert_not_called()
+		log_error.assert_not_called()
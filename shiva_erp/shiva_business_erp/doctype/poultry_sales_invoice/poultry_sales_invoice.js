@@ -96,39 +96,12 @@ function apply_pricing_for_item(frm, item) {
 		return;
 	}
 	
-	// Call server to get pricing
-	frappe.call({
-		method: "shiva_erp.sales_integration.get_item_pricing",
-		args: {
-			customer: frm.doc.customer,
-			item_code: item.item_code,
-			posting_date: frm.doc.posting_date || frappe.datetime.get_today(),
-			weight_kg: item.weight_kg || 0
-		},
-		callback: function(r) {
-			if (r.message) {
-				let pricing = r.message;
-				
-				// Update item with pricing
-				frappe.model.set_value(item.doctype, item.name, "base_price_per_kg", pricing.base_price);
-				frappe.model.set_value(item.doctype, item.name, "discount_per_kg", pricing.discount);
-				frappe.model.set_value(item.doctype, item.name, "rate", pricing.effective_price);
-				
-				// Calculate amount
-				if (item.weight_kg > 0) {
-					frappe.model.set_value(item.doctype, item.name, "amount", pricing.effective_price * item.weight_kg);
-				}
-				
-				calculate_totals(frm);
-				frm.refresh_field("items");
-				
-				if (pricing.message) {
-					frappe.show_alert({
-						message: pricing.message,
-						indicator: "green"
-					});
-				}
-			}
-		}
+	// Queued and priced together with other recent row edits
+	// (shiva_erp.pricing is loaded from public/js/item_pricing.js via doctype_js)
+	shiva_erp.pricing.queue_row(frm, item, {
+		weight_field: "weight_kg",
+		base_price_field: "base_price_per_kg",
+		discount_field: "discount_per_kg",
+		after_apply: calculate_totals
 	});
 }
@@ -15,14 +15,20 @@ class PoultrySalesInvoice(Document):
 		self.validate_stock()
 
 	def on_submit(self):
-		"""Create accounting and stock entries"""
+		"""Create accounting and stock entries and add the sales to the daily facts"""
+		from shiva_erp.shiva_business_erp.doctype.daily_sales_fact.daily_sales_fact import update_sales_facts
+
 		self.create_stock_entries()
 		self.create_gl_entries()
+		update_sales_facts(self)
 
 	def on_cancel(self):
-		"""Reverse stock and accounting entries"""
+		"""Reverse stock and accounting entries and the daily sales facts"""
+		from shiva_erp.shiva_business_erp.doctype.daily_sales_fact.daily_sales_fact import reverse_sales_facts
+
 		self.reverse_stock_entries()
 		self.reverse_gl_entries()
+		reverse_sales_facts(self)
 
 	def calculate_pricing_for_items(self):
 		"""Auto-calculate pricing for each item based on territory and shop discount"""
@@ -30,8 +36,9 @@ class PoultrySalesInvoice(Document):
 			return
 
 		# Get customer territory
-		customer_doc = frappe.get_doc("Customer", self.customer)
-		territory = customer_doc.territory
+		from shiva_erp.master_cache import get_master_value
+
+		territory = get_master_value("Customer", self.customer, "territory")
 
 		if not territory:
 			frappe.msgprint(_("Customer has no territory assigned"), indicator="orange", alert=True)
@@ -42,18 +49,18 @@ class PoultrySalesInvoice(Document):
 				continue
 
 			# Get base price from Item Price Type
-			from shiva_erp.shiva_business_erp.doctype.item_price_type.item_price_type import get_base_price
+			from shiva_erp.pricing_cache import get_cached_base_price
 
-			base_price_record = get_base_price(item.item_code, territory, self.posting_date)
+			base_price_record = get_cached_base_price(item.item_code, territory, self.posting_date)
 			base_price = flt(base_price_record.get("base_price_per_kg", 0)) if base_price_record else 0
 
 			if base_price <= 0:
 				continue
 
 			# Get shop discount
-			from shiva_erp.shiva_business_erp.doctype.shop_discount.shop_discount import get_shop_discount
+			from shiva_erp.pricing_cache import get_cached_shop_discount
 
-			discount = flt(get_shop_discount(self.customer, item.item_code, self.posting_date))
+			discount = flt(get_cached_shop_discount(self.customer, item.item_code, self.posting_date))
 
 			# Calculate effective price
 			effective_price = base_price - discount
@@ -141,12 +148,10 @@ class PoultrySalesInvoice(Document):
 		"""Delete Stock Weight Ledger entries and reverse ERPNext Stock Ledger entries"""
 		from erpnext.stock.stock_ledger import make_sl_entries
 
+		from shiva_erp.stock_logic import delete_weight_ledger_entries
+
 		# Delete Stock Weight Ledger
-		frappe.db.sql(
-			"""DELETE FROM `tabStock Weight Ledger` 
-			WHERE voucher_no = %s""",
-			(self.name,),
-		)
+		delete_weight_ledger_entries(self.name)
 
 		# Reverse standard stock ledger entries
 		sl_entries = []
@@ -174,17 +179,17 @@ class PoultrySalesInvoice(Document):
 
 	def create_gl_entries(self):
 		"""Create GL entries for accounting"""
+		from shiva_erp.master_cache import get_master_value, get_party_account
+
 		# Get customer receivable account from Party Account
-		customer_account = frappe.db.get_value(
-			"Party Account", {"parent": self.customer, "company": self.company}, "account"
-		)
+		customer_account = get_party_account("Customer", self.customer, self.company)
 
 		if not customer_account:
 			# Fallback to company default
-			customer_account = frappe.get_value("Company", self.company, "default_receivable_account")
+			customer_account = get_master_value("Company", self.company, "default_receivable_account")
 
 		# Get income account from Company defaults
-		income_account = frappe.get_value("Company", self.company, "default_income_account")
+		income_account = get_master_value("Company", self.company, "default_income_account")
 
 		if not customer_account or not income_account:
 			frappe.msgprint(
@@ -216,16 +221,33 @@ class PoultrySalesInvoice(Document):
 		gl_entry.party = party
 
 		# Get cost center for P&L accounts
-		cost_center = self.get("cost_center") or frappe.get_cached_value(
-			"Company", self.company, "cost_center"
-		)
+		from shiva_erp.master_cache import get_master_value
+
+		cost_center = self.get("cost_center") or get_master_value("Company", self.company, "cost_center")
 		if cost_center:
 			gl_entry.cost_center = cost_center
 
 		gl_entry.insert(ignore_permissions=True)
 
 	def reverse_gl_entries(self):
-		"""Delete GL entries"""
+		"""Delete GL entries and take their party movement out of the balance snapshots"""
+		from shiva_erp.shiva_business_erp.doctype.party_balance_snapshot.party_balance_snapshot import (
+			record_party_movement,
+		)
+
+		for entry in frappe.get_all(
+			"GL Entry",
+			filters={"voucher_no": self.name, "party": ("is", "set")},
+			fields=["party_type", "party", "company", "posting_date", "debit", "credit"],
+		):
+			record_party_movement(
+				entry.party_type,
+				entry.party,
+				entry.company,
+				entry.posting_date,
+				flt(entry.credit) - flt(entry.debit),
+			)
+
 		frappe.db.sql(
 			"""DELETE FROM `tabGL Entry` 
 			WHERE voucher_no = %s""",
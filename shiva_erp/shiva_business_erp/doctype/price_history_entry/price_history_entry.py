@@ -0,0 +1,211 @@
+# Copyright (c) 2026, Gopalakrishna Reddy Gogulamudi and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe.model.document import Document
+from frappe.utils import getdate, now_datetime, today
+
+# Columns written per entry (besides the standard ones)
+ENTRY_FIELDS = (
+	"reference_doctype",
+	"reference_name",
+	"field_name",
+	"change_date",
+	"value",
+	"previous_value",
+	"change_reason",
+)
+
+# Latest value on or before a date, answered from the covering index
+# created in on_doctype_update().
+VALUE_ON_DATE_QUERY = """
+	SELECT value
+	FROM `tabPrice History Entry`
+	WHERE reference_doctype = %(reference_doctype)s
+		AND reference_name = %(reference_name)s
+		AND field_name = %(field_name)s
+		AND change_date <= %(date)s
+	ORDER BY change_date DESC, creation DESC
+	LIMIT 1
+"""
+
+# Index range scan over one series
+SERIES_QUERY = """
+	SELECT change_date, value
+	FROM `tabPrice History Entry`
+	WHERE reference_doctype = %(reference_doctype)s
+		AND reference_name = %(reference_name)s
+		AND field_name = %(field_name)s
+		AND change_date BETWEEN %(from_date)s AND %(to_date)s
+	ORDER BY change_date, creation
+"""
+
+
+class PriceHistoryEntry(Document):
+	"""
+	Price History Entry - One point of a price time series.
+
+	Append-only: (reference, field, date) → value. Entries are written in
+	bulk by record_price_history, never edited.
+
+	Example:
+		Reference: Item Price Type IPT-00042
+		Field: base_price_per_kg
+		Change Date: 2026-10-19
+		Value: ₹152/kg (previous ₹148/kg)
+	"""
+
+	pass
+
+
+def on_doctype_update():
+	"""
+	Composite covering index for the time-series queries.
+
+	Series key (reference_doctype, reference_name, field_name), then the
+	date and creation for ordering, then the value so VALUE_ON_DATE_QUERY
+	and SERIES_QUERY are answered from the index alone.
+	"""
+	frappe.db.add_index(
+		"Price History Entry",
+		["reference_doctype", "reference_name", "field_name", "change_date", "creation", "value"],
+		"reference_date_index",
+	)
+
+
+def record_price_history(entries):
+	"""
+	Append price history entries with one multi-row INSERT.
+
+	Args:
+		entries: list of dicts with reference_doctype, reference_name,
+			field_name, value, previous_value, change_reason and
+			change_date (default: today)
+
+	Returns:
+		Number of entries written
+	"""
+	if not entries:
+		return 0
+
+	now = now_datetime()
+	user = frappe.session.user
+	fields = ["name", "owner", "creation", "modified", "modified_by", "docstatus", *ENTRY_FIELDS]
+
+	values = []
+	for entry in entries:
+		entry = frappe._dict(entry)
+		entry.change_date = getdate(entry.change_date or today())
+		values.append(
+			[frappe.generate_hash(length=10), user, now, now, user, 0]
+			+ [entry.get(fieldname) for fieldname in ENTRY_FIELDS]
+		)
+
+	frappe.db.bulk_insert("Price History Entry", fields, values)
+
+	return len(values)
+
+
+def queue_price_history(entry):
+	"""
+	Buffer one entry until the current transaction commits.
+
+	All entries queued in a transaction are written together just before the
+	commit (one INSERT per chunk of a bulk job) and dropped on rollback.
+	"""
+	buffer = getattr(frappe.local, "price_history_buffer", None)
+
+	if not buffer:
+		buffer = frappe.local.price_history_buffer = []
+		frappe.db.before_commit.add(flush_price_history)
+		frappe.db.after_rollback.add(_discard_price_history)
+
+	buffer.append(entry)
+
+
+def flush_price_history():
+	"""Write the queued entries now"""
+	buffer = getattr(frappe.local, "price_history_buffer", None)
+	frappe.local.price_history_buffer = []
+
+	return record_price_history(buffer)
+
+
+def _discard_price_history():
+	frappe.local.price_history_buffer = []
+
+
+@frappe.whitelist()
+def get_value_on_date(reference_doctype, reference_name, date=None, field_name="base_price_per_kg"):
+	"""
+	Value of a price field as it was on a date.
+
+	Args:
+		reference_doctype: Item Price Type or Shop Discount
+		reference_name: Document name
+		date: Date to look up (default: today)
+		field_name: Tracked field
+
+	Returns:
+		Value on the date; None if the series has no entries. Dates before the
+		first entry resolve to that entry's previous value.
+	"""
+	frappe.has_permission("Price History Entry", "read", throw=True)
+
+	params = {
+		"reference_doctype": reference_doctype,
+		"reference_name": reference_name,
+		"field_name": field_name,
+		"date": getdate(date or today()),
+	}
+
+	rows = frappe.db.sql(VALUE_ON_DATE_QUERY, params)
+	if rows:
+		return rows[0][0]
+
+	first = frappe.db.sql(
+		"""
+		SELECT previous_value
+		FROM `tabPrice History Entry`
+		WHERE reference_doctype = %(reference_doctype)s
+			AND reference_name = %(reference_name)s
+			AND field_name = %(field_name)s
+		ORDER BY change_date, creation
+		LIMIT 1
+	""",
+		params,
+	)
+
+	return first[0][0] if first else None
+
+
+@frappe.whitelist()
+def get_series(
+	reference_doctype, reference_name, from_date=None, to_date=None, field_name="base_price_per_kg"
+):
+	"""
+	Price series between two dates (inclusive).
+
+	Args:
+		reference_doctype: Item Price Type or Shop Discount
+		reference_name: Document name
+		from_date: Start date (default: no lower bound)
+		to_date: End date (default: today)
+		field_name: Tracked field
+
+	Returns:
+		list of dicts with change_date and value, oldest first
+	"""
+	frappe.has_permission("Price History Entry", "read", throw=True)
+
+	return frappe.db.sql(
+		SERIES_QUERY,
+		{
+			"reference_doctype": reference_doctype,
+			"reference_name": reference_name,
+			"field_name": field_name,
+			"from_date": getdate(from_date or "1900-01-01"),
+			"to_date": getdate(to_date or today()),
+		},
+		as_dict=True,
+	)
@@ -0,0 +1,81 @@
+# Copyright (c) 2026, Gopalakrishna Reddy Gogulamudi and Contributors
+# See license.txt
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from frappe.utils import add_days, today
+
+from shiva_erp.shiva_business_erp.doctype.price_history_entry.price_history_entry import (
+	flush_price_history,
+	get_series,
+	get_value_on_date,
+	queue_price_history,
+	record_price_history,
+)
+
+
+class TestPriceHistoryEntry(FrappeTestCase):
+	"""Test cases for the price time series"""
+
+	def setUp(self):
+		"""Create a series: 100 → 110 (10 days ago) → 120 (today)"""
+		record_price_history(
+			[
+				{
+					"reference_doctype": "Item Price Type",
+					"reference_name": "Test Series Price",
+					"field_name": "base_price_per_kg",
+					"change_date": add_days(today(), -10),
+					"value": 110,
+					"previous_value": 100,
+				},
+				{
+					"reference_doctype": "Item Price Type",
+					"reference_name": "Test Series Price",
+					"field_name": "base_price_per_kg",
+					"change_date": today(),
+					"value": 120,
+					"previous_value": 110,
+				},
+			]
+		)
+
+	def test_value_on_date(self):
+		"""Test the as-of lookup, including dates before the first entry"""
+		self.assertEqual(get_value_on_date("Item Price Type", "Test Series Price"), 120)
+		self.assertEqual(
+			get_value_on_date("Item Price Type", "Test Series Price", add_days(today(), -5)), 110
+		)
+		self.assertEqual(
+			get_value_on_date("Item Price Type", "Test Series Price", add_days(today(), -30)), 100
+		)
+		self.assertIsNone(get_value_on_date("Item Price Type", "No Such Price"))
+
+	def test_series(self):
+		"""Test that the range query returns the entries between the dates, oldest first"""
+		series = get_series("Item Price Type", "Test Series Price", from_date=add_days(today(), -15))
+		self.assertEqual([row.value for row in series], [110, 120])
+
+		series = get_series("Item Price Type", "Test Series Price", to_date=add_days(today(), -1))
+		self.assertEqual([row.value for row in series], [110])
+
+	def test_queued_entries(self):
+		"""Test that queued entries are written together on flush"""
+		for value in (130, 140):
+			queue_price_history(
+				{
+					"reference_doctype": "Item Price Type",
+					"reference_name": "Test Queued Price",
+					"field_name": "base_price_per_kg",
+					"value": value,
+				}
+			)
+
+		self.assertEqual(flush_price_history(), 2)
+		self.assertEqual(frappe.db.count("Price History Entry", {"reference_name": "Test Queued Price"}), 2)
+
+	def tearDown(self):
+		"""Clean up test data"""
+		frappe.db.delete(
+			"Price History Entry", {"reference_name": ["in", ["Test Series Price", "Test Queued Price"]]}
+		)
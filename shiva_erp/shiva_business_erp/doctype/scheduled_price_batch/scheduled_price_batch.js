@@ -0,0 +1,40 @@
+// Copyright (c) 2026, Gopalakrishna Reddy Gogulamudi and contributors
+// For license information, please see license.txt
+
+frappe.ui.form.on("Scheduled Price Batch", {
+	refresh(frm) {
+		const colors = {
+			Draft: "red",
+			Scheduled: "blue",
+			Published: "green",
+			Failed: "red",
+			Cancelled: "gray",
+		};
+		frm.page.set_indicator(__(frm.doc.status), colors[frm.doc.status]);
+
+		// Publish ahead of schedule (or retry a failed batch)
+		if (frm.doc.docstatus === 1 && ["Scheduled", "Failed"].includes(frm.doc.status)) {
+			frm.add_custom_button(__("Publish Now"), function () {
+				frappe.confirm(__("Apply these prices now instead of at {0}?", [frm.doc.publish_on]), function () {
+					frappe.call({
+						method: "shiva_erp.shiva_business_erp.doctype.scheduled_price_batch.scheduled_price_batch.publish_now",
+						args: { batch_name: frm.doc.name },
+						freeze: true,
+						callback: function (r) {
+							if (r.message) {
+								frappe.show_alert({
+									message: __("Updated {0} prices, created {1}", [
+										r.message.prices_updated,
+										r.message.prices_created,
+									]),
+									indicator: "green",
+								});
+							}
+							frm.reload_doc();
+						},
+					});
+				});
+			});
+		}
+	},
+});
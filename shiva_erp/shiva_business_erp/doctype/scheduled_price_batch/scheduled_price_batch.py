@@ -0,0 +1,272 @@
+# Copyright (c) 2026, Gopalakrishna Reddy Gogulamudi and contributors
+# For license information, please see license.txt
+
+from functools import partial
+
+import frappe
+from frappe import _
+from frappe.model.document import Document
+from frappe.utils import flt, get_datetime, getdate, now_datetime
+
+
+class ScheduledPriceBatch(Document):
+	"""
+	Scheduled Price Batch - Future-dated base price changes.
+
+	The day's new prices are entered ahead of time and submitted. The
+	scheduler publishes the batch at `publish_on` (off-peak) with a single
+	set-based update of Item Price Type and then warms the price cache, so
+	counters do not fight row locks or start the day on a cold cache.
+
+	Example:
+		Publish On: 2026-10-20 05:00
+		Broiler Chicken / North Region → ₹155/kg
+		Broiler Chicken / South Region → ₹152/kg
+	"""
+
+	def validate(self):
+		"""Validate batch rows"""
+		self.validate_items()
+		self.set_current_prices()
+		if self.docstatus == 0:
+			self.status = "Draft"
+
+	def validate_items(self):
+		"""Prices must be positive and each item + territory listed once"""
+		seen = set()
+
+		for row in self.items:
+			if flt(row.base_price_per_kg) <= 0:
+				frappe.throw(_("Row #{0}: New Base Price per Kg must be greater than 0").format(row.idx))
+
+			key = (row.item_code, row.territory)
+			if key in seen:
+				frappe.throw(
+					_("Row #{0}: {1} ({2}) is listed more than once").format(
+						row.idx, row.item_code, row.territory
+					)
+				)
+			seen.add(key)
+
+	def set_current_prices(self):
+		"""Show the price each row replaces (as of the publication date)"""
+		current = {
+			(row.item_code, row.territory): row.base_price_per_kg for row in self.get_current_price_records()
+		}
+
+		for row in self.items:
+			row.current_price_per_kg = current.get((row.item_code, row.territory), 0)
+
+	def before_submit(self):
+		if get_datetime(self.publish_on) < now_datetime():
+			frappe.msgprint(
+				_("Publish On is in the past. The batch will be published on the next scheduler run."),
+				indicator="orange",
+				alert=True,
+			)
+
+	def on_submit(self):
+		self.db_set("status", "Scheduled")
+
+	def before_cancel(self):
+		if self.status == "Published":
+			frappe.throw(_("Cannot cancel a published price batch"))
+
+	def on_cancel(self):
+		self.db_set("status", "Cancelled")
+
+	def get_current_price_records(self):
+		"""
+		Active Item Price Type records this batch will update.
+
+		Returns:
+			list of dicts with name, item_code, territory, base_price_per_kg, new_price
+		"""
+		if not self.items:
+			return []
+
+		pairs = {(row.item_code, row.territory): row.base_price_per_kg for row in self.items}
+
+		records = frappe.db.sql(
+			"""
+			SELECT name, item_code, territory, base_price_per_kg
+			FROM `tabItem Price Type`
+			WHERE is_active = 1
+				AND item_code IN %(item_codes)s
+				AND territory IN %(territories)s
+				AND (valid_from IS NULL OR valid_from <= %(effective_date)s)
+				AND (valid_till IS NULL OR valid_till >= %(effective_date)s)
+		""",
+			{
+				"item_codes": list({item_code for item_code, _territory in pairs}),
+				"territories": list({territory for _item_code, territory in pairs}),
+				"effective_date": getdate(self.publish_on),
+			},
+			as_dict=True,
+		)
+
+		result = []
+		for record in records:
+			if (record.item_code, record.territory) in pairs:
+				record.new_price = pairs[(record.item_code, record.territory)]
+				result.append(record)
+
+		return result
+
+	def publish(self):
+		"""
+		Apply the batch prices and warm the price cache.
+
+		Existing active prices are swapped in one UPDATE ... JOIN against the
+		batch rows. Item + territory pairs with no active price get a new
+		Item Price Type valid from the publication date. Draft invoices for
+		the changed items are then queued for re-pricing.
+		"""
+		from shiva_erp.bulk_pricing_utils import reprice_draft_invoices
+		from shiva_erp.pricing_cache import clear_price_cache, warm_price_cache
+		from shiva_erp.shiva_business_erp.doctype.price_history_entry.price_history_entry import (
+			record_price_history,
+		)
+
+		effective_date = getdate(self.publish_on)
+		replaced = self.get_current_price_records()
+
+		# Single set-based swap
+		frappe.db.sql(
+			"""
+			UPDATE `tabItem Price Type` ipt
+			INNER JOIN `tabScheduled Price Batch Item` spi
+				ON spi.item_code = ipt.item_code AND spi.territory = ipt.territory
+			SET ipt.base_price_per_kg = spi.base_price_per_kg,
+				ipt.modified = %(now)s,
+				ipt.modified_by = %(user)s
+			WHERE spi.parent = %(batch)s
+				AND spi.parenttype = 'Scheduled Price Batch'
+				AND ipt.is_active = 1
+				AND (ipt.valid_from IS NULL OR ipt.valid_from <= %(effective_date)s)
+				AND (ipt.valid_till IS NULL OR ipt.valid_till >= %(effective_date)s)
+		""",
+			{
+				"batch": self.name,
+				"effective_date": effective_date,
+				"now": now_datetime(),
+				"user": frappe.session.user,
+			},
+		)
+
+		# New item + territory combinations
+		existing = {(record.item_code, record.territory) for record in replaced}
+		created = 0
+
+		for row in self.items:
+			if (row.item_code, row.territory) in existing:
+				continue
+
+			frappe.get_doc(
+				{
+					"doctype": "Item Price Type",
+					"item_code": row.item_code,
+					"territory": row.territory,
+					"base_price_per_kg": row.base_price_per_kg,
+					"valid_from": effective_date,
+					"is_active": 1,
+					"remarks": _("Created by {0}").format(self.name),
+				}
+			).insert(ignore_permissions=True)
+			created += 1
+
+		record_price_history(
+			[
+				{
+					"reference_doctype": "Item Price Type",
+					"reference_name": record.name,
+					"field_name": "base_price_per_kg",
+					"value": flt(record.new_price),
+					"previous_value": flt(record.base_price_per_kg),
+					"change_date": effective_date,
+					"change_reason": f"Scheduled Price Batch {self.name}",
+				}
+				for record in replaced
+				if flt(record.base_price_per_kg) != flt(record.new_price)
+			]
+		)
+
+		self.db_set(
+			{
+				"status": "Published",
+				"published_on": now_datetime(),
+				"prices_updated": len(replaced),
+				"prices_created": created,
+				"error_log": None,
+			}
+		)
+
+		# Both run once the publication is committed, so no other worker caches the old prices
+		clear_price_cache()
+		frappe.db.after_commit.add(partial(warm_price_cache, effective_date))
+
+		# Pre-entered drafts for the new prices are re-priced in the background
+		reprice_draft_invoices(
+			price_keys=[[row.territory, row.item_code] for row in self.items], from_date=effective_date
+		)
+
+
+def publish_due_price_batches():
+	"""
+	Scheduler: publish submitted batches whose Publish On time has passed.
+
+	Batches are published oldest first, each in its own transaction, so a
+	later batch for the same item + territory wins.
+	"""
+	batches = frappe.get_all(
+		"Scheduled Price Batch",
+		filters={"docstatus": 1, "status": "Scheduled", "publish_on": ["<=", now_datetime()]},
+		order_by="publish_on asc",
+		pluck="name",
+	)
+
+	for name in batches:
+		publish_batch(frappe.get_doc("Scheduled Price Batch", name))
+
+
+def publish_batch(batch):
+	"""
+	Publish a batch in its own transaction; on failure roll it back and
+	mark the batch Failed with the traceback.
+
+	Returns:
+		True if the batch was published
+	"""
+	try:
+		batch.publish()
+		frappe.db.commit()
+	except Exception:
+		frappe.db.rollback()
+		batch.db_set({"status": "Failed", "error_log": frappe.get_traceback()}, commit=True)
+		frappe.log_error(title=f"Scheduled Price Batch {batch.name} Failed")
+		return False
+
+	return True
+
+
+@frappe.whitelist()
+def publish_now(batch_name):
+	"""
+	Publish a scheduled (or failed) batch immediately.
+
+	Args:
+		batch_name: Scheduled Price Batch name
+
+	Returns:
+		dict with publication counts
+	"""
+	batch = frappe.get_doc("Scheduled Price Batch", batch_name)
+	batch.check_permission("submit")
+
+	if batch.docstatus != 1 or batch.status not in ("Scheduled", "Failed"):
+		frappe.throw(_("Only scheduled or failed batches can be published"))
+
+	if not publish_batch(batch):
+		frappe.throw(_("Publishing {0} failed. See its Error Log for details.").format(batch.name))
+
+	return {"prices_updated": batch.prices_updated, "prices_created": batch.prices_created}
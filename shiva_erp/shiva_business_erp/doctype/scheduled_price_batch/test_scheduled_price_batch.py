@@ -0,0 +1,120 @@
+# Copyright (c) 2026, Gopalakrishna Reddy Gogulamudi and Contributors
+# See license.txt
+
+from unittest.mock import patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from frappe.utils import add_to_date, now_datetime
+
+
+class TestScheduledPriceBatch(FrappeTestCase):
+	"""Test cases for Scheduled Price Batch"""
+
+	def setUp(self):
+		"""Create test data"""
+		# Publishing commits each batch; keep everything in the test transaction so it is rolled back
+		for method in ("commit", "rollback"):
+			patcher = patch(f"frappe.db.{method}")
+			patcher.start()
+			self.addCleanup(patcher.stop)
+
+		if not frappe.db.exists("Item", "Test Broiler"):
+			frappe.get_doc(
+				{
+					"doctype": "Item",
+					"item_code": "Test Broiler",
+					"item_name": "Test Broiler Chicken",
+					"item_group": "Products",
+					"stock_uom": "Nos",
+				}
+			).insert(ignore_if_duplicate=True)
+
+		self.price = frappe.get_doc(
+			{
+				"doctype": "Item Price Type",
+				"item_code": "Test Broiler",
+				"territory": "All Territories",
+				"base_price_per_kg": 150.00,
+				"is_active": 1,
+			}
+		).insert()
+
+	def make_batch(self, publish_on, price=160.00):
+		return frappe.get_doc(
+			{
+				"doctype": "Scheduled Price Batch",
+				"publish_on": publish_on,
+				"items": [
+					{"item_code": "Test Broiler", "territory": "All Territories", "base_price_per_kg": price}
+				],
+			}
+		).insert()
+
+	def test_current_price_shown(self):
+		"""Test that each row shows the price it replaces"""
+		batch = self.make_batch(add_to_date(now_datetime(), hours=2))
+		self.assertEqual(batch.items[0].current_price_per_kg, 150.00)
+
+	def test_due_batch_is_published(self):
+		"""Test that the scheduler publishes due batches and leaves future ones"""
+		from shiva_erp.shiva_business_erp.doctype.scheduled_price_batch.scheduled_price_batch import (
+			publish_due_price_batches,
+		)
+
+		due = self.make_batch(add_to_date(now_datetime(), minutes=-1))
+		due.submit()
+		future = self.make_batch(add_to_date(now_datetime(), hours=2), price=175.00)
+		future.submit()
+
+		publish_due_price_batches()
+
+		due.reload()
+		future.reload()
+		self.assertEqual(due.status, "Published")
+		self.assertEqual(due.prices_updated, 1)
+		self.assertEqual(future.status, "Scheduled")
+		self.assertEqual(frappe.db.get_value("Item Price Type", self.price.name, "base_price_per_kg"), 160.00)
+
+	def test_failed_publish_now_marks_batch_failed(self):
+		"""Test that publishing from the form records a failure like the scheduler does"""
+		from shiva_erp.shiva_business_erp.doctype.scheduled_price_batch.scheduled_price_batch import (
+			ScheduledPriceBatch,
+			publish_now,
+		)
+
+		batch = self.make_batch(add_to_date(now_datetime(), hours=2))
+		batch.submit()
+
+		with (
+			patch.object(ScheduledPriceBatch, "publish", side_effect=frappe.ValidationError("Broken")),
+			patch("frappe.log_error"),
+			self.assertRaises(frappe.ValidationError),
+		):
+			publish_now(batch.name)
+
+		batch.reload()
+		self.assertEqual(batch.status, "Failed")
+		self.assertIn("Broken", batch.error_log)
+
+	def test_duplicate_rows_rejected(self):
+		"""Test that an item + territory can only appear once per batch"""
+		batch = frappe.get_doc(
+			{
+				"doctype": "Scheduled Price Batch",
+				"publish_on": add_to_date(now_datetime(), hours=2),
+				"items": [
+					{"item_code": "Test Broiler", "territory": "All Territories", "base_price_per_kg": 160},
+					{"item_code": "Test Broiler", "territory": "All Territories", "base_price_per_kg": 165},
+				],
+			}
+		)
+
+		with self.assertRaises(frappe.ValidationError):
+			batch.insert()
+
+	def tearDown(self):
+		"""Clean up test data"""
+		frappe.db.delete("Item Price Type", {"item_code": "Test Broiler"})
+		frappe.db.delete("Scheduled Price Batch Item", {"item_code": "Test Broiler"})
+		frappe.db.delete("Scheduled Price Batch")
@@ -4,7 +4,21 @@
 import frappe
 from frappe import _
 from frappe.model.document import Document
-from frappe.utils import getdate
+from frappe.utils import flt, getdate
+
+# As-of discount lookup used by get_shop_discount.
+# Served by the covering index created in on_doctype_update().
+SHOP_DISCOUNT_QUERY = """
+	SELECT discount_per_kg
+	FROM `tabShop Discount`
+	WHERE shop = %(shop)s
+		AND item_code = %(item_code)s
+		AND is_active = 1
+		AND (valid_from IS NULL OR valid_from <= %(posting_date)s)
+		AND (valid_till IS NULL OR valid_till >= %(posting_date)s)
+	ORDER BY valid_from DESC
+	LIMIT 1
+"""
 
 
 class ShopDiscount(Document):
@@ -12,27 +26,40 @@ class ShopDiscount(Document):
 		"""Validate shop discount"""
 		self.validate_discount_value()
 		self.validate_duplicate()
-		self.check_validity_overlap()
 		self.validate_validity_dates()
 
+	def on_update(self):
+		"""Invalidate cached discounts"""
+		from shiva_erp.pricing_cache import clear_price_cache
+
+		clear_price_cache()
+
+	def on_trash(self):
+		"""Invalidate cached discounts"""
+		from shiva_erp.pricing_cache import clear_price_cache
+
+		clear_price_cache()
+
 	def validate_discount_value(self):
 		"""Validate discount is non-negative"""
 		if self.discount_per_kg < 0:
 			frappe.throw(_("Discount per Kg cannot be negative"))
 
 	def validate_duplicate(self):
-		"""Prevent duplicate shop+item combinations for active records"""
+		"""Prevent overlapping active discounts for the same shop+item"""
 		if not self.is_active:
 			return
 
-		filters = {
-			"shop": self.shop,
-			"item_code": self.item_code,
-			"is_active": 1,
-			"name": ("!=", self.name),
-		}
+		from shiva_erp.pricing_validation import find_overlapping_record
+
+		existing = find_overlapping_record(
+			"Shop Discount",
+			{"shop": self.shop, "item_code": self.item_code},
+			self.valid_from,
+			self.valid_till,
+			exclude_name=self.name,
+		)
 
-		existing = frappe.db.exists("Shop Discount", filters)
 		if existing:
 			frappe.throw(
 				_("Active discount already exists for Shop {0} and Item {1}: {2}").format(
@@ -40,41 +67,6 @@ class ShopDiscount(Document):
 				)
 			)
 
-	def check_validity_overlap(self):
-		"""Check for overlapping validity periods"""
-		if not self.is_active or not self.valid_from or not self.valid_till:
-			return
-
-		overlapping = frappe.db.sql(
-			"""
-			SELECT name
-			FROM `tabShop Discount`
-			WHERE shop = %s
-				AND item_code = %s
-				AND is_active = 1
-				AND name != %s
-				AND (
-					(valid_from <= %s AND valid_till >= %s)
-					OR (valid_from <= %s AND valid_till >= %s)
-					OR (valid_from >= %s AND valid_till <= %s)
-				)
-		""",
-			(
-				self.shop,
-				self.item_code,
-				self.name,
-				self.valid_from,
-				self.valid_from,
-				self.valid_till,
-				self.valid_till,
-				self.valid_from,
-				self.valid_till,
-			),
-		)
-
-		if overlapping:
-			frappe.throw(_("Validity period overlaps with existing discount: {0}").format(overlapping[0][0]))
-
 	def validate_validity_dates(self):
 		"""Validate validity date range"""
 		if self.valid_from and self.valid_till:
@@ -82,6 +74,21 @@ class ShopDiscount(Document):
 				frappe.throw(_("Valid Till cannot be before Valid From"))
 
 
+def on_doctype_update():
+	"""
+	Composite covering index for the as-of discount lookup and overlap check.
+
+	Equality columns first (shop, item_code, is_active), then valid_from so
+	the index order also satisfies ORDER BY valid_from DESC, then the
+	remaining columns SHOP_DISCOUNT_QUERY reads.
+	"""
+	frappe.db.add_index(
+		"Shop Discount",
+		["shop", "item_code", "is_active", "valid_from", "valid_till", "discount_per_kg"],
+		"shop_item_validity_index",
+	)
+
+
 @frappe.whitelist()
 def get_shop_discount(shop, item_code, posting_date=None):
 	"""
@@ -100,18 +107,8 @@ def get_shop_discount(shop, item_code, posting_date=None):
 
 	# Get shop discount with validity date filtering
 	discount = frappe.db.sql(
-		"""
-		SELECT discount_per_kg
-		FROM `tabShop Discount`
-		WHERE shop = %s
-			AND item_code = %s
-			AND is_active = 1
-			AND (valid_from IS NULL OR valid_from <= %s)
-			AND (valid_till IS NULL OR valid_till >= %s)
-		ORDER BY valid_from DESC
-		LIMIT 1
-	""",
-		(shop, item_code, posting_date, posting_date),
+		SHOP_DISCOUNT_QUERY,
+		{"shop": shop, "item_code": item_code, "posting_date": posting_date},
 		as_dict=True,
 	)
 
@@ -126,29 +123,22 @@ def bulk_update_discount(shop=None, item_code=None, new_discount=0.0):
 	"""
 	Bulk update discounts for matching records
 
+	Queued as a background Bulk Pricing Job.
+
 	Args:
 		shop: Filter by shop (optional)
 		item_code: Filter by item (optional)
 		new_discount: New discount value in INR
 
 	Returns:
-		int: Number of records updated
+		dict with the queued job name and status
 	"""
+	new_discount = flt(new_discount)
 	if new_discount < 0:
 		frappe.throw(_("Discount cannot be negative"))
 
-	filters = {"is_active": 1}
-	if shop:
-		filters["shop"] = shop
-	if item_code:
-		filters["item_code"] = item_code
-
-	discounts = frappe.get_all("Shop Discount", filters=filters, pluck="name")
+	from shiva_erp.bulk_pricing_utils import enqueue_bulk_pricing_job
 
-	for name in discounts:
-		doc = frappe.get_doc("Shop Discount", name)
-		doc.discount_per_kg = new_discount
-		doc.save(ignore_permissions=True)
-
-	frappe.db.commit()
-	return len(discounts)
+	return enqueue_bulk_pricing_job(
+		"Discount Update", {"shop": shop, "item_code": item_code, "new_discount": new_discount}
+	)
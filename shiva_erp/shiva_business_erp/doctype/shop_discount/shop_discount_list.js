@@ -0,0 +1,39 @@
+// Copyright (c) 2026, Gopalakrishna Reddy Gogulamudi and contributors
+// For license information, please see license.txt
+
+frappe.listview_settings["Shop Discount"] = {
+	onload(listview) {
+		// Fast bulk import of price sheets (see shiva_erp/pricing_import.py)
+		listview.page.add_inner_button(__("Import Sheet"), function () {
+			new frappe.ui.FileUploader({
+				allow_multiple: false,
+				restrictions: { allowed_file_types: [".csv", ".xlsx"] },
+				on_success(file) {
+					frappe.call({
+						method: "shiva_erp.pricing_import.import_pricing_sheet",
+						args: { doctype: "Shop Discount", file_url: file.file_url },
+						freeze: true,
+						freeze_message: __("Importing {0}...", [file.file_name]),
+						callback(r) {
+							let result = r.message;
+							let message = __("{0} rows imported, {1} failed", [result.imported, result.failed]);
+
+							if (result.error_file) {
+								message += "<br>" + __("Failed rows: {0}", [
+									`<a href="${result.error_file}" target="_blank">${__("Download error file")}</a>`,
+								]);
+							}
+
+							frappe.msgprint({
+								title: __("Import Sheet"),
+								message: message,
+								indicator: result.failed ? "orange" : "green",
+							});
+							listview.refresh();
+						},
+					});
+				},
+			});
+		});
+	},
+};
@@ -79,6 +79,45 @@ class TestShopDiscount(FrappeTestCase):
 		# Cleanup
 		discount1.delete()
 
+	def test_non_overlapping_periods_allowed(self):
+		"""Test that dated discounts for the same shop+item may follow each other"""
+		frappe.get_doc(
+			{
+				"doctype": "Shop Discount",
+				"shop": "Test Shop A",
+				"item_code": "Test Broiler",
+				"discount_per_kg": 5.00,
+				"valid_from": add_days(today(), -10),
+				"valid_till": add_days(today(), -1),
+				"is_active": 1,
+			}
+		).insert()
+
+		frappe.get_doc(
+			{
+				"doctype": "Shop Discount",
+				"shop": "Test Shop A",
+				"item_code": "Test Broiler",
+				"discount_per_kg": 7.00,
+				"valid_from": today(),
+				"is_active": 1,
+			}
+		).insert()
+
+		# Open-ended discount overlaps both
+		overlapping = frappe.get_doc(
+			{
+				"doctype": "Shop Discount",
+				"shop": "Test Shop A",
+				"item_code": "Test Broiler",
+				"discount_per_kg": 9.00,
+				"is_active": 1,
+			}
+		)
+
+		with self.assertRaises(frappe.ValidationError):
+			overlapping.insert()
+
 	def test_validity_dates(self):
 		"""Test validity date validation"""
 		discount = frappe.get_doc(
@@ -27,6 +27,18 @@ class StockWeightLedger(Document):
 		self.calculate_value()
 		self.validate_weights_list()
 
+	def on_update(self):
+		"""Mark cached ledger reports as changed"""
+		from shiva_erp.report_cache import mark_source_changed
+
+		mark_source_changed(self.doctype)
+
+	def on_trash(self):
+		"""Mark cached ledger reports as changed"""
+		from shiva_erp.report_cache import mark_source_changed
+
+		mark_source_changed(self.doctype)
+
 	def validate_transaction_type(self):
 		"""Ensure transaction_type is either IN or OUT"""
 		if not self.transaction_type:
@@ -1,9 +1,14 @@
 # Copyright (c) 2025, Gopalakrishna Reddy Gogulamudi and contributors
 # For license information, please see license.txt
 
+import bisect
+import copy
+
 import frappe
-from frappe import _
-from frappe.utils import flt, getdate
+from frappe.utils import flt, get_datetime, getdate
+
+# Latest transactions listed on the dashboard
+RECENT_TRANSACTIONS = 20
 
 
 @frappe.whitelist()
@@ -11,12 +16,17 @@ def get_dashboard_data(filters=None):
 	"""
 	Get comprehensive dashboard data for stock ledger
 
+	The dashboard is cached per filters and refreshed incrementally from the
+	ledger rows posted or cancelled since (see refresh_dashboard).
+
 	Args:
 		filters: dict with from_date, to_date, item_code, warehouse
 
 	Returns:
 		dict with summary, chart_data, and details
 	"""
+	from shiva_erp.report_cache import get_cached_report
+
 	if isinstance(filters, str):
 		import json
 
@@ -25,19 +35,174 @@ def get_dashboard_data(filters=None):
 	if not filters:
 		filters = {}
 
+	return get_cached_report(
+		"Stock Ledger Dashboard",
+		filters,
+		"shiva_erp.shiva_business_erp.page.stock_ledger_dashboard.stock_ledger_dashboard.build_dashboard",
+		sources=("Stock Weight Ledger",),
+		columns=None,
+		refresh="shiva_erp.shiva_business_erp.page.stock_ledger_dashboard.stock_ledger_dashboard.refresh_dashboard",
+	)
+
+
+def build_dashboard(filters):
+	"""
+	Build the dashboard and the state refresh_dashboard folds new rows into
+
+	The state holds the opening balance, per-date, per-item and per-warehouse
+	totals and the latest transactions; the dashboard is rendered from it.
+
+	Returns:
+		dict with the dashboard (result) and its state
+	"""
 	# Get ledger data
 	ledger_data = get_ledger_data(filters)
 
-	# Calculate summary metrics
-	summary = calculate_summary_metrics(ledger_data, filters)
+	state = {
+		"opening": get_opening_balance(filters),
+		"dates": {},
+		"items": {},
+		"warehouses": {},
+		"recent": ledger_data[-RECENT_TRANSACTIONS:],
+	}
+
+	for row in ledger_data:
+		fold_row(state, row)
+
+	# Get current balance for each warehouse
+	for wh, stats in state["warehouses"].items():
+		balance = get_current_balance(filters.get("item_code"), wh, filters.get("to_date"))
+		stats["balance_weight"] = balance.get("weight", 0)
+		stats["balance_value"] = balance.get("value", 0)
+
+	return {"result": render_dashboard(state), "state": state}
+
+
+def render_dashboard(state):
+	"""Dashboard data (summary, charts, tables) from the state"""
+	return {
+		"summary": calculate_summary_metrics(state),
+		"chart_data": prepare_chart_data(state),
+		"details": get_detailed_breakdowns(state),
+	}
+
+
+def refresh_dashboard(filters, cached, changes):
+	"""
+	Fold the ledger rows inserted or deleted since the cached build into the
+	cached dashboard (report_cache refresh function)
+
+	Rows in the date range update the date, item and warehouse totals and the
+	latest transactions; rows before from_date update the opening balance.
+	Both update the balance of warehouses already listed.
+
+	Returns None (full rebuild) when a row posts to a warehouse not listed yet
+	(its balance covers all history) or a listed recent transaction is deleted.
+	"""
+	from shiva_erp.shiva_business_erp.report.stock_weight_ledger_detailed.stock_weight_ledger_detailed import (
+		get_change_scope,
+		get_value_change,
+	)
+
+	changes = changes["Stock Weight Ledger"]
+	state = copy.deepcopy(cached["state"])
+
+	for sign, rows in ((-1, changes.deleted), (1, changes.inserted)):
+		for row in rows:
+			scope = get_change_scope(row, filters)
+			if not scope:
+				continue
+
+			if scope == "opening":
+				state["opening"]["weight"] = flt(state["opening"].get("weight")) + sign * flt(
+					row.weight_change
+				)
+				state["opening"]["value"] = flt(state["opening"].get("value")) + sign * get_value_change(row)
+			elif row.warehouse not in state["warehouses"]:
+				return None
+			elif sign < 0 and row.name in {recent.name for recent in state["recent"]}:
+				return None
+			else:
+				fold_row(state, row, sign)
+
+			stats = state["warehouses"].get(row.warehouse)
+			if stats:
+				stats["balance_weight"] += sign * flt(row.weight_change)
+				stats["balance_value"] += sign * get_value_change(row)
+
+			if scope == "range" and sign > 0:
+				bisect.insort(state["recent"], row, key=get_position)
+				del state["recent"][:-RECENT_TRANSACTIONS]
+
+	return {"result": render_dashboard(state), "state": state}
+
+
+def fold_row(state, row, sign=1):
+	"""
+	Add (sign=1) or remove (sign=-1) one ledger row in the date range from
+	the per-date, per-item and per-warehouse totals; entries left without
+	transactions are dropped
+	"""
+	direction = "in" if is_inward(row) else "out"
+	weight = abs(flt(row.weight_change))
+	value = abs(flt(row.value_amount))
+
+	# Group by date
+	date = str(getdate(row.posting_date))
+	date_stats = state["dates"].setdefault(
+		date, {"in_weight": 0, "out_weight": 0, "in_value": 0, "out_value": 0, "transactions": 0}
+	)
+	date_stats[f"{direction}_weight"] += sign * weight
+	date_stats[f"{direction}_value"] += sign * value
+	date_stats["transactions"] += sign
+
+	# Item-wise movement by weight and value
+	item_stats = state["items"].setdefault(
+		row.item_code,
+		{"item_code": row.item_code, "transaction_count": 0, "total_weight": 0, "total_value": 0},
+	)
+	item_stats["transaction_count"] += sign
+	item_stats["total_weight"] += sign * weight
+	item_stats["total_value"] += sign * value
+
+	# Warehouse-wise summary (balances are set by the caller)
+	warehouse_stats = state["warehouses"].setdefault(
+		row.warehouse,
+		{
+			"warehouse": row.warehouse,
+			"in_weight": 0,
+			"out_weight": 0,
+			"balance_weight": 0,
+			"in_value": 0,
+			"out_value": 0,
+			"balance_value": 0,
+			"transactions": 0,
+		},
+	)
+	warehouse_stats[f"{direction}_weight"] += sign * weight
+	warehouse_stats[f"{direction}_value"] += sign * value
+	warehouse_stats["transactions"] += sign
+
+	for group, name, stats, counter in (
+		("dates", date, date_stats, "transactions"),
+		("items", row.item_code, item_stats, "transaction_count"),
+		("warehouses", row.warehouse, warehouse_stats, "transactions"),
+	):
+		if not stats[counter]:
+			del state[group][name]
+
 
-	# Prepare chart data
-	chart_data = prepare_chart_data(ledger_data)
+def is_inward(row):
+	"""Whether a ledger row adds stock (rows without a type go by the weight change sign)"""
+	if row.transaction_type in ("IN", "OUT"):
+		return row.transaction_type == "IN"
 
-	# Get detailed breakdowns
-	details = get_detailed_breakdowns(ledger_data, filters)
+	return flt(row.weight_change) > 0
 
-	return {"summary": summary, "chart_data": chart_data, "details": details}
+
+def get_position(row):
+	"""Sort key of a ledger row in ledger order"""
+	return getdate(row.posting_date), get_datetime(row.creation)
 
 
 def get_ledger_data(filters):
@@ -65,7 +230,7 @@ def get_ledger_data(filters):
 
 	query = f"""
 		SELECT
-			name, posting_date, transaction_type, voucher_type, voucher_no,
+			name, posting_date, creation, transaction_type, voucher_type, voucher_no,
 			item_code, warehouse, batch_no, stock_qty, weight_kg,
 			qty_change, weight_change, avg_weight_per_bird,
 			rate_per_kg, value_amount
@@ -80,33 +245,16 @@ def get_ledger_data(filters):
 	return frappe.db.sql(query, params, as_dict=1)
 
 
-def calculate_summary_metrics(ledger_data, filters):
-	"""Calculate summary metrics from ledger data - Weight and Value"""
-	total_in_weight = 0
-	total_out_weight = 0
-	total_in_value = 0
-	total_out_value = 0
-
-	for row in ledger_data:
-		if row.transaction_type == "IN":
-			total_in_weight += abs(flt(row.weight_change))
-			total_in_value += abs(flt(row.value_amount))
-		elif row.transaction_type == "OUT":
-			total_out_weight += abs(flt(row.weight_change))
-			total_out_value += abs(flt(row.value_amount))
-		else:
-			# If transaction_type is NULL/empty, determine from weight_change sign
-			if flt(row.weight_change) > 0:
-				total_in_weight += abs(flt(row.weight_change))
-				total_in_value += abs(flt(row.value_amount))
-			else:
-				total_out_weight += abs(flt(row.weight_change))
-				total_out_value += abs(flt(row.value_amount))
+def calculate_summary_metrics(state):
+	"""Calculate summary metrics from the per-date totals - Weight and Value"""
+	total_in_weight = sum(stats["in_weight"] for stats in state["dates"].values())
+	total_out_weight = sum(stats["out_weight"] for stats in state["dates"].values())
+	total_in_value = sum(stats["in_value"] for stats in state["dates"].values())
+	total_out_value = sum(stats["out_value"] for stats in state["dates"].values())
 
-	# Get opening balance
-	opening = get_opening_balance(filters)
-	opening_weight = opening.get("weight", 0)
-	opening_value = opening.get("value", 0)
+	# Opening balance
+	opening_weight = state["opening"].get("weight", 0)
+	opening_value = state["opening"].get("value", 0)
 
 	# Calculate closing
 	closing_weight = opening_weight + total_in_weight - total_out_weight
@@ -123,7 +271,7 @@ def calculate_summary_metrics(ledger_data, filters):
 		"closing_value": closing_value,
 		"net_weight": total_in_weight - total_out_weight,
 		"net_value": total_in_value - total_out_value,
-		"total_transactions": len(ledger_data),
+		"total_transactions": sum(stats["transactions"] for stats in state["dates"].values()),
 	}
 
 
@@ -172,59 +320,31 @@ def get_opening_balance(filters):
 	)
 
 
-def prepare_chart_data(ledger_data):
+def prepare_chart_data(state):
 	"""Prepare data for charts"""
-	# Group by date
-	date_wise = {}
-
-	for row in ledger_data:
-		date = str(row.posting_date)
-		if date not in date_wise:
-			date_wise[date] = {
-				"in_weight": 0,
-				"out_weight": 0,
-				"balance_weight": 0,
-				"in_value": 0,
-				"out_value": 0,
-				"balance_value": 0,
-			}
-
-		if row.transaction_type == "IN":
-			date_wise[date]["in_weight"] += abs(flt(row.weight_change))
-			date_wise[date]["in_value"] += abs(flt(row.value_amount))
-		else:
-			date_wise[date]["out_weight"] += abs(flt(row.weight_change))
-			date_wise[date]["out_value"] += abs(flt(row.value_amount))
+	date_wise = state["dates"]
 
 	# Calculate running balance
-	sorted_dates = sorted(date_wise.keys())
+	labels = sorted(date_wise.keys())
 	balance_weight = 0
 	balance_value = 0
+	balance_weight_data = []
+	balance_value_data = []
 
-	for date in sorted_dates:
+	for date in labels:
 		balance_weight += date_wise[date]["in_weight"] - date_wise[date]["out_weight"]
 		balance_value += date_wise[date]["in_value"] - date_wise[date]["out_value"]
-		date_wise[date]["balance_weight"] = balance_weight
-		date_wise[date]["balance_value"] = balance_value
+		balance_weight_data.append(balance_weight)
+		balance_value_data.append(balance_value)
 
 	# Format for charts
-	labels = sorted_dates
 	in_weight_data = [date_wise[d]["in_weight"] for d in labels]
 	out_weight_data = [date_wise[d]["out_weight"] for d in labels]
-	balance_weight_data = [date_wise[d]["balance_weight"] for d in labels]
 	in_value_data = [date_wise[d]["in_value"] for d in labels]
 	out_value_data = [date_wise[d]["out_value"] for d in labels]
-	balance_value_data = [date_wise[d]["balance_value"] for d in labels]
 
 	# Item-wise distribution by weight and value
-	item_wise_weight = {}
-	item_wise_value = {}
-	for row in ledger_data:
-		if row.item_code not in item_wise_weight:
-			item_wise_weight[row.item_code] = 0
-			item_wise_value[row.item_code] = 0
-		item_wise_weight[row.item_code] += abs(flt(row.weight_change))
-		item_wise_value[row.item_code] += abs(flt(row.value_amount))
+	item_stats = state["items"].values()
 
 	return {
 		"daily_movement_weight": {
@@ -249,68 +369,26 @@ def prepare_chart_data(ledger_data):
 			],
 		},
 		"item_distribution": {
-			"labels": list(item_wise_weight.keys()),
+			"labels": [stats["item_code"] for stats in item_stats],
 			"datasets": [
-				{"name": "Weight (Kg)", "values": list(item_wise_weight.values())},
-				{"name": "Value (₹)", "values": list(item_wise_value.values())},
+				{"name": "Weight (Kg)", "values": [stats["total_weight"] for stats in item_stats]},
+				{"name": "Value (₹)", "values": [stats["total_value"] for stats in item_stats]},
 			],
 		},
 	}
 
 
-def get_detailed_breakdowns(ledger_data, filters):
+def get_detailed_breakdowns(state):
 	"""Get detailed breakdowns for tables"""
 	# Top items by weight and value movement
-	item_stats = {}
-	for row in ledger_data:
-		if row.item_code not in item_stats:
-			item_stats[row.item_code] = {
-				"item_code": row.item_code,
-				"transaction_count": 0,
-				"total_weight": 0,
-				"total_value": 0,
-			}
-
-		item_stats[row.item_code]["transaction_count"] += 1
-		item_stats[row.item_code]["total_weight"] += abs(flt(row.weight_change))
-		item_stats[row.item_code]["total_value"] += abs(flt(row.value_amount))
-
-	top_items = sorted(item_stats.values(), key=lambda x: x["total_weight"], reverse=True)[:10]
-
-	# Warehouse-wise summary
-	warehouse_stats = {}
-	for row in ledger_data:
-		if row.warehouse not in warehouse_stats:
-			warehouse_stats[row.warehouse] = {
-				"warehouse": row.warehouse,
-				"in_weight": 0,
-				"out_weight": 0,
-				"balance_weight": 0,
-				"in_value": 0,
-				"out_value": 0,
-				"balance_value": 0,
-			}
-
-		if row.transaction_type == "IN":
-			warehouse_stats[row.warehouse]["in_weight"] += abs(flt(row.weight_change))
-			warehouse_stats[row.warehouse]["in_value"] += abs(flt(row.value_amount))
-		else:
-			warehouse_stats[row.warehouse]["out_weight"] += abs(flt(row.weight_change))
-			warehouse_stats[row.warehouse]["out_value"] += abs(flt(row.value_amount))
-
-	# Get current balance for each warehouse
-	for wh in warehouse_stats:
-		balance = get_current_balance(filters.get("item_code"), wh, filters.get("to_date"))
-		warehouse_stats[wh]["balance_weight"] = balance.get("weight", 0)
-		warehouse_stats[wh]["balance_value"] = balance.get("value", 0)
+	top_items = sorted(state["items"].values(), key=lambda x: x["total_weight"], reverse=True)[:10]
 
-	# Recent transactions
-	recent_transactions = ledger_data[-20:] if len(ledger_data) > 20 else ledger_data
-	recent_transactions.reverse()
+	# Recent transactions, latest first
+	recent_transactions = list(reversed(state["recent"]))
 
 	return {
 		"top_items": top_items,
-		"warehouse_summary": list(warehouse_stats.values()),
+		"warehouse_summary": list(state["warehouses"].values()),
 		"recent_transactions": recent_transactions,
 	}
 
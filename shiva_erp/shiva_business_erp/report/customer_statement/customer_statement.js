@@ -31,6 +31,63 @@ frappe.query_reports["Customer Statement"] = {
 		},
 	],
 
+	onload: function (report) {
+		// Statements for every customer of a territory, generated in the background
+		report.page.add_inner_button(__("Territory Statements"), function () {
+			let filters = report.get_filter_values();
+
+			frappe.prompt(
+				[
+					{
+						fieldname: "territory",
+						label: __("Territory"),
+						fieldtype: "Link",
+						options: "Territory",
+						reqd: 1,
+					},
+				],
+				function (values) {
+					frappe.call({
+						method: "shiva_erp.statement_batch.generate_statements",
+						args: {
+							territory: values.territory,
+							from_date: filters.from_date,
+							to_date: filters.to_date,
+							company: filters.company,
+						},
+						callback: function (r) {
+							frappe.show_alert({
+								message: __("Generating statements for {0} customers.", [r.message.customers]),
+								indicator: "blue",
+							});
+						},
+					});
+				},
+				__("Generate Territory Statements"),
+				__("Generate")
+			);
+		});
+
+		frappe.realtime.off("customer_statement_batch");
+		frappe.realtime.on("customer_statement_batch", function (data) {
+			if (data.status === "Running") {
+				frappe.show_progress(__("Customer Statements"), data.done, data.total);
+				return;
+			}
+
+			frappe.hide_progress();
+			frappe.msgprint({
+				title: __("Customer Statements Ready"),
+				message:
+					`<a href="${data.file_url}" target="_blank">${__("Download Statements")}</a>` +
+					(data.failed.length
+						? `<br>${__("Failed: {0}", [data.failed.join(", ")])}`
+						: ""),
+				indicator: data.failed.length ? "orange" : "green",
+			});
+		});
+	},
+
 	formatter: function (value, row, column, data, default_formatter) {
 		value = default_formatter(value, row, column, data);
 
@@ -5,6 +5,64 @@ import frappe
 from frappe import _
 from frappe.utils import flt, fmt_money, getdate
 
+# Item rows of all vouchers of one type in one query, in idx order per voucher
+# ({weight_kg} is filled in by get_weight_field)
+ITEM_DETAIL_QUERIES = {
+	"Sales Invoice": """
+		SELECT
+			sii.parent,
+			sii.item_code,
+			sii.item_name,
+			sii.qty,
+			COALESCE(dni.custom_total_weight_kg, 0) as weight_kg,
+			sii.rate,
+			sii.amount
+		FROM `tabSales Invoice Item` sii
+		LEFT JOIN `tabDelivery Note Item` dni ON dni.name = sii.dn_detail
+		WHERE sii.parent IN %(voucher_nos)s
+		ORDER BY sii.parent, sii.idx
+	""",
+	"Delivery Note": """
+		SELECT
+			parent,
+			item_code,
+			item_name,
+			qty,
+			{weight_kg} as weight_kg,
+			rate,
+			amount
+		FROM `tabDelivery Note Item`
+		WHERE parent IN %(voucher_nos)s
+		ORDER BY parent, idx
+	""",
+	"Sales Order": """
+		SELECT
+			parent,
+			item_code,
+			item_name,
+			qty,
+			{weight_kg} as weight_kg,
+			rate,
+			amount
+		FROM `tabSales Order Item`
+		WHERE parent IN %(voucher_nos)s
+		ORDER BY parent, idx
+	""",
+	"Poultry Sales Invoice": """
+		SELECT
+			parent,
+			item_code,
+			item_name,
+			qty,
+			{weight_kg} as weight_kg,
+			rate,
+			amount
+		FROM `tabPoultry Sales Invoice Item`
+		WHERE parent IN %(voucher_nos)s
+		ORDER BY parent, idx
+	""",
+}
+
 
 def execute(filters=None):
 	"""
@@ -84,7 +142,22 @@ def get_data(filters):
 	# Get item details for each transaction
 	item_details = get_item_details(transactions)
 
-	# Build result with running balance
+	return build_statement(from_date, opening_balance, transactions, item_details)
+
+
+def build_statement(from_date, opening_balance, transactions, item_details):
+	"""
+	Build statement rows with running balance
+
+	Args:
+		from_date: Statement start date (an opening row is added when set)
+		opening_balance: Balance before from_date
+		transactions: GL transactions in the period, in posting order
+		item_details: dict of voucher_no → item rows (see get_item_details)
+
+	Returns:
+		list of statement rows, opening and closing rows included
+	"""
 	data = []
 	running_balance = opening_balance
 
@@ -210,25 +283,14 @@ def get_opening_balance(customer, from_date, company):
 	"""
 	Calculate opening balance for customer before from_date
 	For customer: Debit increases receivable (what they owe us), Credit decreases
+	Reads the nearest month-end Party Balance Snapshot plus the GL entries after it
 	"""
-	if not from_date:
-		return 0.0
-
-	result = frappe.db.sql(
-		"""
-		SELECT SUM(debit - credit) as opening_balance
-		FROM `tabGL Entry`
-		WHERE party_type = 'Customer'
-			AND party = %(customer)s
-			AND company = %(company)s
-			AND posting_date < %(from_date)s
-			AND is_cancelled = 0
-	""",
-		{"customer": customer, "company": company, "from_date": from_date},
-		as_dict=1,
+	from shiva_erp.shiva_business_erp.doctype.party_balance_snapshot.party_balance_snapshot import (
+		get_party_opening_balances,
 	)
 
-	return flt(result[0].opening_balance) if result else 0.0
+	balances = get_party_opening_balances("Customer", [customer], company, from_date)
+	return flt(balances.get(customer))
 
 
 def get_transactions(customer, from_date, to_date, company):
@@ -275,129 +337,39 @@ def get_transactions(customer, from_date, to_date, company):
 def get_item_details(transactions):
 	"""
 	Get item-level details for each transaction
-	Supports Sales Invoice and Delivery Note
+	Supports Sales Invoice, Delivery Note, Sales Order and Poultry Sales Invoice
+
+	Voucher numbers are grouped by type and each child table is read with one
+	query (parent IN ...); items are merged per voucher in idx order.
+
+	Returns:
+		dict of voucher_no → list of item rows
 	"""
+	vouchers = {}
+	for txn in transactions:
+		if txn.voucher_type in ITEM_DETAIL_QUERIES:
+			vouchers.setdefault(txn.voucher_type, set()).add(txn.voucher_no)
+
 	item_details = {}
 
-	for txn in transactions:
-		voucher_type = txn.voucher_type
-		voucher_no = txn.voucher_no
-
-		items = []
-
-		if voucher_type == "Sales Invoice":
-			items = frappe.db.sql(
-				"""
-				SELECT 
-					sii.item_code,
-					sii.item_name,
-					sii.qty,
-					COALESCE(dni.custom_total_weight_kg, 0) as weight_kg,
-					sii.rate,
-					sii.amount
-				FROM `tabSales Invoice Item` sii
-				LEFT JOIN `tabDelivery Note Item` dni ON dni.name = sii.dn_detail
-				WHERE sii.parent = %(voucher_no)s
-				ORDER BY sii.idx
-			""",
-				{"voucher_no": voucher_no},
-				as_dict=1,
-			)
+	for voucher_type, voucher_nos in vouchers.items():
+		query = ITEM_DETAIL_QUERIES[voucher_type].format(weight_kg=get_weight_field(voucher_type))
 
-		elif voucher_type == "Delivery Note":
-			try:
-				items = frappe.db.sql(
-					"""
-					SELECT 
-						item_code,
-						item_name,
-						qty,
-						COALESCE(custom_total_weight_kg, 0) as weight_kg,
-						rate,
-						amount
-					FROM `tabDelivery Note Item`
-					WHERE parent = %(voucher_no)s
-					ORDER BY idx
-				""",
-					{"voucher_no": voucher_no},
-					as_dict=1,
-				)
-			except Exception:
-				items = frappe.db.sql(
-					"""
-					SELECT 
-						item_code,
-						item_name,
-						qty,
-						0 as weight_kg,
-						rate,
-						amount
-					FROM `tabDelivery Note Item`
-					WHERE parent = %(voucher_no)s
-					ORDER BY idx
-				""",
-					{"voucher_no": voucher_no},
-					as_dict=1,
-				)
+		for item in frappe.db.sql(query, {"voucher_nos": list(voucher_nos)}, as_dict=1):
+			item_details.setdefault(item.pop("parent"), []).append(item)
 
-		elif voucher_type == "Sales Order":
-			try:
-				items = frappe.db.sql(
-					"""
-					SELECT 
-						item_code,
-						item_name,
-						qty,
-						COALESCE(custom_total_weight_kg, 0) as weight_kg,
-						rate,
-						amount
-					FROM `tabSales Order Item`
-					WHERE parent = %(voucher_no)s
-					ORDER BY idx
-				""",
-					{"voucher_no": voucher_no},
-					as_dict=1,
-				)
-			except Exception:
-				items = frappe.db.sql(
-					"""
-					SELECT 
-						item_code,
-						item_name,
-						qty,
-						0 as weight_kg,
-						rate,
-						amount
-					FROM `tabSales Order Item`
-					WHERE parent = %(voucher_no)s
-					ORDER BY idx
-				""",
-					{"voucher_no": voucher_no},
-					as_dict=1,
-				)
+	return item_details
 
-		elif voucher_type == "Poultry Sales Invoice":
-			items = frappe.db.sql(
-				"""
-				SELECT 
-					item_code,
-					item_name,
-					qty,
-					weight_kg,
-					rate,
-					amount
-				FROM `tabPoultry Sales Invoice Item`
-				WHERE parent = %(voucher_no)s
-				ORDER BY idx
-			""",
-				{"voucher_no": voucher_no},
-				as_dict=1,
-			)
 
-		if items:
-			item_details[voucher_no] = items
+def get_weight_field(voucher_type):
+	"""Weight column of a voucher type's items; 0 where the custom field is not installed"""
+	if voucher_type in ("Delivery Note", "Sales Order"):
+		if not frappe.db.has_column(f"{voucher_type} Item", "custom_total_weight_kg"):
+			return "0"
 
-	return item_details
+		return "COALESCE(custom_total_weight_kg, 0)"
+
+	return "weight_kg"
 
 
 def get_summary(filters, data):
@@ -15,7 +15,25 @@ def execute(filters=None):
 	- Total weight sold (Kg)
 	- Base price, discount, and effective price
 	- Revenue breakdown
+
+	Rolls up the pre-aggregated Daily Sales Fact rows of the range (Sales
+	Invoices and Poultry Sales Invoices), cached until the facts change.
 	"""
+	from shiva_erp.report_cache import get_cached_report
+
+	filters = frappe._dict(filters or {})
+
+	return get_cached_report(
+		"Shop Sales Analysis",
+		filters,
+		"shiva_erp.shiva_business_erp.report.shop_sales_analysis.shop_sales_analysis.run_report",
+		sources=("Daily Sales Fact",),
+		columns=get_columns(),
+	)
+
+
+def run_report(filters):
+	"""Build the report result"""
 	columns = get_columns()
 	data = get_data(filters)
 
@@ -95,7 +113,9 @@ def get_columns():
 
 def get_data(filters):
 	"""
-	Get shop-wise sales data with dual UOM and discount analysis
+	Get shop-wise sales data with dual UOM and discount analysis from the
+	daily facts, so the cost depends on the days in the range rather than
+	on the invoice items
 
 	Args:
 		filters: dict with customer, territory, item_code, from_date, to_date
@@ -103,50 +123,54 @@ def get_data(filters):
 	Returns:
 		list of dicts with sales analysis data
 	"""
-	conditions = ["si.docstatus = 1"]  # Only submitted invoices
+	from shiva_erp.master_cache import get_master_value
+
+	conditions = []
 	params = {}
 
 	if filters.get("customer"):
-		conditions.append("si.customer = %(customer)s")
+		conditions.append("customer = %(customer)s")
 		params["customer"] = filters["customer"]
 
 	if filters.get("territory"):
-		conditions.append("si.territory = %(territory)s")
+		conditions.append("territory = %(territory)s")
 		params["territory"] = filters["territory"]
 
 	if filters.get("item_code"):
-		conditions.append("sii.item_code = %(item_code)s")
+		conditions.append("item_code = %(item_code)s")
 		params["item_code"] = filters["item_code"]
 
 	if filters.get("from_date"):
-		conditions.append("si.posting_date >= %(from_date)s")
+		conditions.append("posting_date >= %(from_date)s")
 		params["from_date"] = filters["from_date"]
 
 	if filters.get("to_date"):
-		conditions.append("si.posting_date <= %(to_date)s")
+		conditions.append("posting_date <= %(to_date)s")
 		params["to_date"] = filters["to_date"]
 
-	where_clause = "WHERE " + " AND ".join(conditions)
+	where_clause = ("WHERE " + " AND ".join(conditions)) if conditions else ""
 
+	# Average rate over item rows, as AVG(rate) over the invoice items would give
 	query = f"""
 		SELECT
-			si.customer,
-			si.customer_name,
-			si.territory,
-			sii.item_code,
-			SUM(sii.qty) as total_qty,
-			SUM(IFNULL(sii.custom_total_weight_kg, 0)) as total_weight_kg,
-			AVG(sii.rate) as avg_price_per_kg,
-			SUM(IFNULL(sii.custom_discount_per_kg, 0) * IFNULL(sii.custom_total_weight_kg, 0)) as total_discount,
-			SUM(sii.amount) as total_revenue,
-			COUNT(DISTINCT si.name) as invoice_count
-		FROM `tabSales Invoice` si
-		INNER JOIN `tabSales Invoice Item` sii ON sii.parent = si.name
+			customer,
+			territory,
+			item_code,
+			SUM(qty) as total_qty,
+			SUM(weight_kg) as total_weight_kg,
+			SUM(rate_total) / NULLIF(SUM(item_rows), 0) as avg_price_per_kg,
+			SUM(discount_amount) as total_discount,
+			SUM(revenue) as total_revenue,
+			SUM(invoice_count) as invoice_count
+		FROM `tabDaily Sales Fact`
 		{where_clause}
-		GROUP BY si.customer, si.territory, sii.item_code
+		GROUP BY customer, territory, item_code
 		ORDER BY total_revenue DESC
 	"""
 
 	data = frappe.db.sql(query, params, as_dict=True)
 
+	for row in data:
+		row.customer_name = get_master_value("Customer", row.customer, "customer_name")
+
 	return data
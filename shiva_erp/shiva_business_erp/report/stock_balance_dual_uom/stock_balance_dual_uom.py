@@ -11,7 +11,26 @@ def execute(filters=None):
 
 	Shows current stock balance in both UOMs (Nos + Kg) for all items.
 	Supports filtering by item, warehouse, and batch.
+
+	Results are cached until the ledger changes; the all-items balance is
+	prepared in the background.
 	"""
+	from shiva_erp.report_cache import get_cached_report
+
+	filters = frappe._dict(filters or {})
+
+	return get_cached_report(
+		"Stock Balance Dual UOM",
+		filters,
+		"shiva_erp.shiva_business_erp.report.stock_balance_dual_uom.stock_balance_dual_uom.run_report",
+		sources=("Stock Weight Ledger",),
+		columns=get_columns(),
+		background=not filters.get("item_code"),
+	)
+
+
+def run_report(filters):
+	"""Build the report result"""
 	columns = get_columns()
 	data = get_data(filters)
 
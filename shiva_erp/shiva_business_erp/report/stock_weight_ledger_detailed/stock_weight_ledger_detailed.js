@@ -51,6 +51,14 @@ frappe.query_reports["Stock Weight Ledger Detailed"] = {
 			"label": __("Batch"),
 			"fieldtype": "Link",
 			"options": "Batch"
+		},
+		{
+			"fieldname": "balance_engine",
+			"label": __("Balance Engine"),
+			"fieldtype": "Select",
+			"options": ["Auto", "Database", "Python"],
+			"default": "Auto",
+			"description": __("Auto computes running balances in the database when it supports window functions")
 		}
 	],
 
@@ -149,6 +157,29 @@ frappe.query_reports["Stock Weight Ledger Detailed"] = {
 			});
 		});
 
+		// Stream the whole range to a CSV file in the background (no row limit)
+		report.page.add_inner_button(__("Export Full Ledger"), function() {
+			frappe.call({
+				method: "shiva_erp.shiva_business_erp.report.stock_weight_ledger_detailed.stock_weight_ledger_detailed.export_ledger",
+				args: {filters: report.get_filter_values()},
+				callback: function() {
+					frappe.show_alert({
+						message: __("Export queued. You will be notified when the file is ready."),
+						indicator: "blue"
+					});
+				}
+			});
+		});
+
+		frappe.realtime.off("stock_weight_ledger_export");
+		frappe.realtime.on("stock_weight_ledger_export", function(data) {
+			frappe.msgprint({
+				title: __("Ledger Export Ready"),
+				message: `<a href="${data.file_url}" target="_blank">${__("Download CSV")}</a>`,
+				indicator: "green"
+			});
+		});
+
 		// Add button to view batch details
 		report.page.add_inner_button(__("Batch Analysis"), function() {
 			frappe.set_route("query-report", "Stock Balance Dual UOM");
@@ -1,9 +1,82 @@
 # Copyright (c) 2025, Gopalakrishna Reddy Gogulamudi and contributors
 # For license information, please see license.txt
 
+import bisect
+import copy
+import csv
+import os
+import re
+
 import frappe
 from frappe import _
-from frappe.utils import flt, getdate
+from frappe.utils import cint, flt, get_datetime, getdate
+
+# Ledger columns shown by the report
+LEDGER_FIELDS = """
+	swl.name,
+	swl.posting_date,
+	swl.transaction_type,
+	swl.voucher_type,
+	swl.voucher_no,
+	swl.item_code,
+	swl.warehouse,
+	swl.batch_no,
+	swl.stock_qty,
+	swl.weight_kg,
+	swl.qty_change,
+	swl.weight_change,
+	swl.avg_weight_per_bird,
+	swl.rate_per_kg,
+	swl.value_amount,
+	swl.remarks
+"""
+
+LEDGER_FIELDNAMES = [field.strip().removeprefix("swl.") for field in LEDGER_FIELDS.split(",")]
+
+# Signed value movement: IN adds, OUT subtracts
+VALUE_CHANGE = """
+	CASE
+		WHEN swl.transaction_type = 'IN' THEN swl.value_amount
+		WHEN swl.transaction_type = 'OUT' THEN -swl.value_amount
+		ELSE 0
+	END
+"""
+
+# Running balance window per item-warehouse-batch, in ledger order
+BALANCE_WINDOW = """
+	OVER (
+		PARTITION BY swl.item_code, swl.warehouse, IFNULL(swl.batch_no, '')
+		ORDER BY swl.posting_date, swl.creation, swl.name
+		ROWS UNBOUNDED PRECEDING
+	)
+"""
+
+WINDOW_FUNCTIONS_CACHE_KEY = "shiva_erp:window_functions"
+
+# Ledger order; (posting_date, creation, name) is also the keyset cursor
+LEDGER_ORDER = "swl.posting_date ASC, swl.creation ASC, swl.name ASC"
+
+# Rows per page in paginated mode (get_ledger_page)
+LEDGER_PAGE_SIZE = 5000
+
+# Above this many matching rows the report shows the first page only
+MAX_INLINE_ROWS = 50000
+
+# Realtime event sent when a streamed export file is ready
+LEDGER_EXPORT_EVENT = "stock_weight_ledger_export"
+
+# Per item-warehouse-batch counters kept with the cached result (get_key_totals)
+KEY_COUNTERS = (
+	"transactions",
+	"in_transactions",
+	"in_qty",
+	"in_weight",
+	"out_qty",
+	"out_weight",
+	"net_qty",
+	"net_weight",
+	"net_value",
+)
 
 
 def execute(filters=None):
@@ -19,17 +92,229 @@ def execute(filters=None):
 		- Warehouse: Specific warehouse or all
 		- Transaction Type: IN/OUT/Both
 		- Batch: Specific batch or all
+		- Balance Engine: Auto (database when it supports window functions),
+		  Database or Python
+
+	Results are cached until the ledger changes and then refreshed
+	incrementally (refresh_report); ranges longer than
+	report_cache.LARGE_RANGE_DAYS are prepared in the background.
 	"""
-	columns = get_columns()
-	data = get_data(filters)
+	from shiva_erp.report_cache import get_cached_report, is_large_range
+
+	filters = frappe._dict(filters or {})
+
+	return get_cached_report(
+		"Stock Weight Ledger Detailed",
+		filters,
+		"shiva_erp.shiva_business_erp.report.stock_weight_ledger_detailed.stock_weight_ledger_detailed.run_report",
+		sources=("Stock Weight Ledger",),
+		columns=get_columns(),
+		background=is_large_range(filters),
+		refresh="shiva_erp.shiva_business_erp.report.stock_weight_ledger_detailed.stock_weight_ledger_detailed.refresh_report",
+	)
+
+
+def run_report(filters):
+	"""
+	Build the report result and the state refresh_report folds new rows into
+
+	Chart and summary come from grouped queries (per key and per date), not
+	from the rows. Ranges with more than MAX_INLINE_ROWS rows show the first
+	page only; the rest is available page by page (get_ledger_page) or as a
+	streamed export (export_ledger).
+
+	Returns:
+		dict with the result (columns, data, message, chart, summary) and its state
+	"""
+	openings = get_opening_balances(filters)
+	keys = get_key_totals(filters)
+	paged = sum(key["transactions"] for key in keys.values()) > MAX_INLINE_ROWS
+
+	data = get_ledger_page(filters)["rows"] if paged else get_data(filters)
+	dates = get_date_totals(filters) if keys else {}
+
+	state = {"openings": openings, "keys": keys, "dates": dates, "paged": paged}
+
+	return {"result": make_result(filters, data, state), "state": state}
+
+
+def make_result(filters, data, state):
+	"""Report result from the rows and the per-key / per-date totals of the state"""
+	totals = summarize_keys(state["keys"], state["openings"])
+	message = None
+
+	if state["paged"]:
+		message = _(
+			"Showing the first {0} of {1} transactions. Use Export Full Ledger for all rows or narrow the filters."
+		).format(len(data), totals.transactions)
 
 	# Generate chart data for visualization
-	chart = get_chart_data(data, filters)
+	chart = build_chart(state["dates"], totals.opening_qty) if totals.transactions else None
 
 	# Generate summary cards
-	summary = get_summary(data, filters)
+	summary = get_summary(totals, filters)
+
+	return [get_columns(), data, message, chart, summary]
+
+
+def refresh_report(filters, cached, changes):
+	"""
+	Fold the ledger rows inserted or deleted since the cached build into the
+	cached result (report_cache refresh function)
+
+	New rows are placed in ledger order with running balances continued from
+	their key's closing balance; a deleted row is dropped when it is the last
+	row of its key. Changes outside the filters or after to_date are ignored.
+
+	Returns None (full rebuild) when a change would shift figures already
+	shown: a row before from_date (openings), a new row dated before the
+	last row of its key, a deleted row followed by later rows of its key or
+	any deletion while only the first page is held.
+	"""
+	from shiva_erp.master_cache import get_master_value
+
+	changes = changes["Stock Weight Ledger"]
+	state = copy.deepcopy(cached["state"])
+	data = list(cached["result"][1])
+
+	for row in sorted(changes.deleted, key=get_ledger_position, reverse=True):
+		scope = get_change_scope(row, filters)
+		if not scope:
+			continue
+
+		if scope == "opening" or state["paged"]:
+			return None
+
+		key = get_balance_key(row.item_code, row.warehouse, row.batch_no)
+		index = get_last_row_index(data, key)
+		if index is None or data[index].name != row.name:
+			return None
+
+		data.pop(index)
+		fold_ledger_row(state, row, -1)
+
+		if key in state["keys"]:
+			previous = data[get_last_row_index(data, key, index)]
+			state["keys"][key]["last_date"] = str(getdate(previous.posting_date))
+
+	for row in sorted(changes.inserted, key=get_ledger_position):
+		scope = get_change_scope(row, filters)
+		if not scope:
+			continue
+
+		if scope == "opening":
+			return None
+
+		key = fold_ledger_row(state, row)
+		key_totals = state["keys"][key]
+		if getdate(row.posting_date) < getdate(key_totals["last_date"]):
+			return None
+		key_totals["last_date"] = str(getdate(row.posting_date))
+
+		opening = state["openings"].get(key) or {}
+		entry = frappe._dict({fieldname: row.get(fieldname) for fieldname in LEDGER_FIELDNAMES})
+		entry.update(
+			balance_qty=flt(opening.get("qty")) + key_totals["net_qty"],
+			balance_weight=flt(opening.get("weight")) + key_totals["net_weight"],
+			balance_value=flt(opening.get("value")) + key_totals["net_value"],
+			item_name=get_master_value("Item", row.item_code, "item_name"),
+		)
+
+		# New rows are the latest of their date
+		bisect.insort(data, entry, key=lambda r: getdate(r.posting_date))
+
+	if state["paged"]:
+		data = data[:LEDGER_PAGE_SIZE]
+	elif sum(key["transactions"] for key in state["keys"].values()) > MAX_INLINE_ROWS:
+		return None
+
+	return {"result": make_result(filters, data, state), "state": state}
+
+
+def get_change_scope(row, filters):
+	"""
+	Where a changed ledger row falls for the report filters
+
+	Returns:
+		"range" (inside the report range), "opening" (before from_date) or
+		None (outside the filters or after to_date)
+	"""
+	for fieldname in ("item_code", "warehouse", "batch_no", "transaction_type"):
+		if filters.get(fieldname) and row.get(fieldname) != filters[fieldname]:
+			return None
+
+	posting_date = getdate(row.posting_date)
+
+	if filters.get("to_date") and posting_date > getdate(filters.to_date):
+		return None
+
+	if filters.get("from_date") and posting_date < getdate(filters.from_date):
+		return "opening"
+
+	return "range"
+
+
+def get_ledger_position(row):
+	"""Sort key of a ledger row in ledger order (LEDGER_ORDER)"""
+	return getdate(row.posting_date), get_datetime(row.creation), row.name
+
+
+def get_last_row_index(data, key, end=None):
+	"""Index of the last report row of a balance key before `end`, None if there is none"""
+	for index in range(len(data) if end is None else end, 0, -1):
+		row = data[index - 1]
+		if get_balance_key(row.item_code, row.warehouse, row.batch_no) == key:
+			return index - 1
+
+	return None
+
+
+def fold_ledger_row(state, row, sign=1):
+	"""
+	Add (sign=1) or remove (sign=-1) one ledger row from the per-key and
+	per-date totals of the state; keys and dates left empty are dropped
+
+	Returns:
+		The row's balance key
+	"""
+	key = get_balance_key(row.item_code, row.warehouse, row.batch_no)
+	key_totals = state["keys"].setdefault(
+		key,
+		{
+			"item_code": row.item_code,
+			"warehouse": row.warehouse,
+			"batch_no": row.batch_no or "",
+			"last_date": str(getdate(row.posting_date)),
+			**dict.fromkeys(KEY_COUNTERS, 0),
+		},
+	)
+	date = str(getdate(row.posting_date))
+	date_totals = state["dates"].setdefault(
+		date, {"in_qty": 0, "out_qty": 0, "net_qty": 0, "transactions": 0}
+	)
+
+	direction = "in" if row.transaction_type == "IN" else "out"
+	qty = abs(flt(row.qty_change))
+
+	key_totals["transactions"] += sign
+	key_totals["in_transactions"] += sign if direction == "in" else 0
+	key_totals[f"{direction}_qty"] += sign * qty
+	key_totals[f"{direction}_weight"] += sign * abs(flt(row.weight_change))
+	key_totals["net_qty"] += sign * flt(row.qty_change)
+	key_totals["net_weight"] += sign * flt(row.weight_change)
+	key_totals["net_value"] += sign * get_value_change(row)
 
-	return columns, data, None, chart, summary
+	date_totals[f"{direction}_qty"] += sign * qty
+	date_totals["net_qty"] += sign * flt(row.qty_change)
+	date_totals["transactions"] += sign
+
+	if not key_totals["transactions"]:
+		del state["keys"][key]
+
+	if not date_totals["transactions"]:
+		del state["dates"][date]
+
+	return key
 
 
 def get_columns():
@@ -170,14 +455,296 @@ def get_data(filters):
 	"""
 	Get detailed stock ledger data with running balance
 
+	Running balances are computed by the database with window functions when
+	it supports them (see use_window_functions), otherwise in Python.
+
 	Args:
 		filters: dict with from_date, to_date, item_code, warehouse, transaction_type, batch_no
 
 	Returns:
 		list of dicts with ledger entries and running balance
 	"""
-	conditions = ["1=1"]
-	params = {}
+	where_clause, params = get_ledger_conditions(filters)
+
+	if use_window_functions(filters):
+		data = get_window_balance_data(filters, where_clause, params)
+	else:
+		# Query ledger entries
+		query = f"""
+			SELECT
+				{LEDGER_FIELDS}
+			FROM
+				`tabStock Weight Ledger` swl
+			WHERE
+				{where_clause}
+			ORDER BY
+				{LEDGER_ORDER}
+		"""
+
+		ledger_entries = frappe.db.sql(query, params, as_dict=1)
+
+		# Calculate running balance per item-warehouse-batch combination
+		data = calculate_running_balance(ledger_entries, get_opening_balances(filters))
+
+	# Item names come from the master cache
+	from shiva_erp.master_cache import get_master_value
+
+	for entry in data:
+		entry["item_name"] = get_master_value("Item", entry.item_code, "item_name")
+
+	return data
+
+
+def get_window_balance_data(filters, where_clause, params):
+	"""
+	Ledger entries with running balances computed in the database
+
+	SUM(...) OVER the item-warehouse-batch partition in ledger order, seeded
+	with the grouped openings joined as a derived table. One query.
+	"""
+	opening_join = ""
+	opening = {"qty": "0", "weight": "0", "value": "0"}
+
+	if filters.get("from_date"):
+		opening_query, opening_params = get_opening_query(filters)
+		params = {**params, **opening_params}
+
+		opening_join = f"""
+			LEFT JOIN ({opening_query}) opening
+				ON opening.item_code = swl.item_code
+				AND opening.warehouse = swl.warehouse
+				AND opening.batch_no = IFNULL(swl.batch_no, '')
+		"""
+		opening = {
+			"qty": "IFNULL(opening.opening_qty, 0)",
+			"weight": "IFNULL(opening.opening_weight, 0)",
+			"value": "IFNULL(opening.opening_value, 0)",
+		}
+
+	query = f"""
+		SELECT
+			{LEDGER_FIELDS},
+			{opening["qty"]} + SUM(swl.qty_change) {BALANCE_WINDOW} as balance_qty,
+			{opening["weight"]} + SUM(swl.weight_change) {BALANCE_WINDOW} as balance_weight,
+			{opening["value"]} + SUM({VALUE_CHANGE}) {BALANCE_WINDOW} as balance_value
+		FROM
+			`tabStock Weight Ledger` swl
+			{opening_join}
+		WHERE
+			{where_clause}
+		ORDER BY
+			{LEDGER_ORDER}
+	"""
+
+	return frappe.db.sql(query, params, as_dict=1)
+
+
+def use_window_functions(filters):
+	"""Whether to compute running balances in the database (Balance Engine filter)"""
+	engine = filters.get("balance_engine") or "Auto"
+
+	if engine == "Python":
+		return False
+
+	if engine == "Database":
+		return True
+
+	return supports_window_functions()
+
+
+def supports_window_functions():
+	"""MariaDB 10.2+ / MySQL 8.0+ support SUM(...) OVER (...); cached per site"""
+	return frappe.cache().get_value(WINDOW_FUNCTIONS_CACHE_KEY, generator=_detect_window_functions)
+
+
+def _detect_window_functions():
+	if frappe.db.db_type != "mariadb":
+		return False
+
+	version = frappe.db.sql("SELECT VERSION()")[0][0]
+	match = re.match(r"(\d+)\.(\d+)", version)
+	if not match:
+		return False
+
+	major, minor = cint(match.group(1)), cint(match.group(2))
+
+	if "mariadb" in version.lower():
+		return (major, minor) >= (10, 2)
+
+	return major >= 8
+
+
+def get_ledger_page(filters, cursor=None, page_size=LEDGER_PAGE_SIZE):
+	"""
+	One page of the ledger with running balances (keyset pagination)
+
+	Args:
+		filters: Report filters
+		cursor: Cursor returned with the previous page (None for the first page)
+		page_size: Rows per page
+
+	Returns:
+		dict with rows and the cursor for the next page (None after the last page).
+		The cursor carries the running balances so pages continue them.
+	"""
+	filters = frappe._dict(frappe.parse_json(filters) or {})
+	cursor = frappe.parse_json(cursor) if cursor else None
+	page_size = cint(page_size) or LEDGER_PAGE_SIZE
+
+	where_clause, params = get_ledger_conditions(filters)
+
+	if cursor:
+		where_clause += """
+			AND (
+				swl.posting_date > %(cursor_date)s
+				OR (swl.posting_date = %(cursor_date)s AND (
+					swl.creation > %(cursor_creation)s
+					OR (swl.creation = %(cursor_creation)s AND swl.name > %(cursor_name)s)
+				))
+			)
+		"""
+		params.update(
+			{
+				"cursor_date": cursor["posting_date"],
+				"cursor_creation": cursor["creation"],
+				"cursor_name": cursor["name"],
+			}
+		)
+		balances = cursor["balances"]
+	else:
+		balances = {key: dict(opening) for key, opening in get_opening_balances(filters).items()}
+
+	rows = frappe.db.sql(
+		f"""
+		SELECT
+			{LEDGER_FIELDS},
+			swl.creation
+		FROM
+			`tabStock Weight Ledger` swl
+		WHERE
+			{where_clause}
+		ORDER BY
+			{LEDGER_ORDER}
+		LIMIT %(page_size)s
+	""",
+		{**params, "page_size": page_size},
+		as_dict=1,
+	)
+
+	calculate_running_balance(rows, balances=balances)
+
+	from shiva_erp.master_cache import get_master_value
+
+	for row in rows:
+		row["item_name"] = get_master_value("Item", row.item_code, "item_name")
+
+	next_cursor = None
+	if len(rows) == page_size:
+		last = rows[-1]
+		next_cursor = {
+			"posting_date": str(last.posting_date),
+			"creation": str(last.creation),
+			"name": last.name,
+			"balances": balances,
+		}
+
+	return {"rows": rows, "cursor": next_cursor}
+
+
+@frappe.whitelist()
+def get_report_page(filters, cursor=None, page_size=LEDGER_PAGE_SIZE):
+	"""Whitelisted get_ledger_page for clients paging through large ranges"""
+	frappe.has_permission("Stock Weight Ledger", "read", throw=True)
+	return get_ledger_page(filters, cursor, page_size)
+
+
+def iter_ledger_rows(filters):
+	"""
+	Stream every ledger row with running balances through an unbuffered
+	server-side cursor, without holding the range in memory.
+
+	No other query may run on the connection while rows are streamed, so the
+	openings are read first and item names are joined in.
+	"""
+	where_clause, params = get_ledger_conditions(filters)
+	balances = {key: dict(opening) for key, opening in get_opening_balances(filters).items()}
+
+	query = f"""
+		SELECT
+			{LEDGER_FIELDS},
+			item.item_name
+		FROM
+			`tabStock Weight Ledger` swl
+			LEFT JOIN `tabItem` item ON item.name = swl.item_code
+		WHERE
+			{where_clause}
+		ORDER BY
+			{LEDGER_ORDER}
+	"""
+
+	with frappe.db.unbuffered_cursor():
+		for row in frappe.db.sql(query, params, as_dict=1, as_iterator=True):
+			calculate_running_balance([row], balances=balances)
+			yield row
+
+
+@frappe.whitelist()
+def export_ledger(filters):
+	"""
+	Queue a streamed CSV export of the full ledger for the filters
+
+	The file is announced to the user over the LEDGER_EXPORT_EVENT realtime event.
+	"""
+	frappe.has_permission("Stock Weight Ledger", "read", throw=True)
+
+	frappe.enqueue(
+		"shiva_erp.shiva_business_erp.report.stock_weight_ledger_detailed.stock_weight_ledger_detailed.write_ledger_export",
+		queue="long",
+		timeout=3600,
+		filters=frappe.parse_json(filters),
+		user=frappe.session.user,
+	)
+
+	return {"status": "queued"}
+
+
+def write_ledger_export(filters, user):
+	"""Background job: stream the ledger into a private CSV file"""
+	filters = frappe._dict(filters or {})
+	columns = get_columns()
+
+	file_name = f"stock_weight_ledger_{frappe.generate_hash(length=8)}.csv"
+	path = frappe.get_site_path("private", "files", file_name)
+
+	with open(path, "w", newline="", encoding="utf-8") as f:
+		writer = csv.writer(f)
+		writer.writerow([column["label"] for column in columns])
+
+		for row in iter_ledger_rows(filters):
+			writer.writerow([row.get(column["fieldname"]) for column in columns])
+
+	file_doc = frappe.get_doc(
+		{
+			"doctype": "File",
+			"file_name": file_name,
+			"file_url": f"/private/files/{file_name}",
+			"file_size": os.path.getsize(path),
+			"is_private": 1,
+		}
+	).insert(ignore_permissions=True)
+	frappe.db.commit()
+
+	frappe.publish_realtime(LEDGER_EXPORT_EVENT, {"file_url": file_doc.file_url}, user=user)
+
+
+def get_ledger_conditions(filters):
+	"""
+	Conditions for ledger rows in the report range
+
+	Returns:
+		(SQL WHERE clause on `swl`, params dict)
+	"""
+	conditions, params = get_key_conditions(filters)
 
 	# Date range filter (mandatory)
 	if filters.get("from_date"):
@@ -188,6 +755,24 @@ def get_data(filters):
 		conditions.append("swl.posting_date <= %(to_date)s")
 		params["to_date"] = filters["to_date"]
 
+	# Transaction type filter
+	if filters.get("transaction_type"):
+		conditions.append("swl.transaction_type = %(transaction_type)s")
+		params["transaction_type"] = filters["transaction_type"]
+
+	return " AND ".join(conditions), params
+
+
+def get_key_conditions(filters):
+	"""
+	Item / warehouse / batch conditions shared by the ledger and opening queries
+
+	Returns:
+		(list of SQL conditions on `swl`, params dict)
+	"""
+	conditions = ["1=1"]
+	params = {}
+
 	# Item filter
 	if filters.get("item_code"):
 		conditions.append("swl.item_code = %(item_code)s")
@@ -198,82 +783,46 @@ def get_data(filters):
 		conditions.append("swl.warehouse = %(warehouse)s")
 		params["warehouse"] = filters["warehouse"]
 
-	# Transaction type filter
-	if filters.get("transaction_type"):
-		conditions.append("swl.transaction_type = %(transaction_type)s")
-		params["transaction_type"] = filters["transaction_type"]
-
 	# Batch filter
 	if filters.get("batch_no"):
 		conditions.append("swl.batch_no = %(batch_no)s")
 		params["batch_no"] = filters["batch_no"]
 
-	where_clause = " AND ".join(conditions)
-
-	# Query ledger entries with item details
-	query = f"""
-		SELECT
-			swl.name,
-			swl.posting_date,
-			swl.transaction_type,
-			swl.voucher_type,
-			swl.voucher_no,
-			swl.item_code,
-			item.item_name,
-			swl.warehouse,
-			swl.batch_no,
-			swl.stock_qty,
-			swl.weight_kg,
-			swl.qty_change,
-			swl.weight_change,
-			swl.avg_weight_per_bird,
-			swl.rate_per_kg,
-			swl.value_amount,
-			swl.remarks
-		FROM
-			`tabStock Weight Ledger` swl
-		LEFT JOIN
-			`tabItem` item ON item.name = swl.item_code
-		WHERE
-			{where_clause}
-		ORDER BY
-			swl.posting_date ASC,
-			swl.creation ASC
-	"""
-
-	ledger_entries = frappe.db.sql(query, params, as_dict=1)
+	return conditions, params
 
-	# Calculate running balance per item-warehouse-batch combination
-	data = calculate_running_balance(ledger_entries)
 
-	return data
+def get_balance_key(item_code, warehouse, batch_no):
+	"""Running balance key for an item-warehouse-batch combination"""
+	return f"{item_code}|{warehouse}|{batch_no or ''}"
 
 
-def calculate_running_balance(ledger_entries):
+def calculate_running_balance(ledger_entries, openings=None, balances=None):
 	"""
 	Calculate running balance for each transaction
 
 	Args:
 		ledger_entries: List of ledger entries sorted by date
+		openings: dict of balance key → opening qty/weight/value (see get_opening_balances)
+		balances: Running balances to continue (updated in place), e.g. from a previous page
 
 	Returns:
 		List with running balance columns added
 	"""
+	openings = openings or {}
+
 	# Track balance per item-warehouse-batch
-	balance_tracker = {}
+	balance_tracker = balances if balances is not None else {}
 
 	result = []
 
 	for entry in ledger_entries:
 		# Create unique key for tracking
-		key = f"{entry.item_code}|{entry.warehouse}|{entry.batch_no or ''}"
+		key = get_balance_key(entry.item_code, entry.warehouse, entry.batch_no)
 
 		# Initialize balance if not exists
 		if key not in balance_tracker:
-			# Get opening balance (transactions before from_date)
-			balance_tracker[key] = get_opening_balance(
-				entry.item_code, entry.warehouse, entry.batch_no, entry.posting_date
-			)
+			# Start from the opening balance (transactions before from_date)
+			balance_tracker[key] = dict(openings.get(key) or {"qty": 0.0, "weight": 0.0, "value": 0.0})
 
 		# Update running balance
 		balance_tracker[key]["qty"] += flt(entry.qty_change)
@@ -293,128 +842,231 @@ def calculate_running_balance(ledger_entries):
 	return result
 
 
-def get_opening_balance(item_code, warehouse, batch_no, from_date):
+def get_value_change(entry):
+	"""Signed value movement of a ledger row, as VALUE_CHANGE computes it in SQL"""
+	if entry.transaction_type == "IN":
+		return flt(entry.value_amount)
+
+	if entry.transaction_type == "OUT":
+		return -flt(entry.value_amount)
+
+	return 0
+
+
+def get_opening_balances(filters):
 	"""
-	Get opening balance before the from_date
+	Get opening balances before the report's from_date for every
+	item-warehouse-batch key matching the filters, in one grouped query
 
 	Args:
-		item_code: Item code
-		warehouse: Warehouse
-		batch_no: Batch number (optional)
-		from_date: Starting date for the report
+		filters: Report filters (from_date, item_code, warehouse, batch_no)
 
 	Returns:
-		dict with qty and weight opening balance
+		dict of balance key → dict with qty, weight and value opening balance
 	"""
-	conditions = [
-		"item_code = %(item_code)s",
-		"warehouse = %(warehouse)s",
-		"posting_date < %(from_date)s",
-	]
+	if not filters.get("from_date"):
+		return {}
+
+	query, params = get_opening_query(filters)
 
-	params = {
-		"item_code": item_code,
-		"warehouse": warehouse,
-		"from_date": from_date,
+	return {
+		get_balance_key(row.item_code, row.warehouse, row.batch_no): {
+			"qty": flt(row.opening_qty),
+			"weight": flt(row.opening_weight),
+			"value": flt(row.opening_value),
+		}
+		for row in frappe.db.sql(query, params, as_dict=1)
 	}
 
-	if batch_no:
-		conditions.append("batch_no = %(batch_no)s")
-		params["batch_no"] = batch_no
+
+def get_opening_query(filters):
+	"""
+	Grouped opening balance query (one row per item-warehouse-batch key)
+
+	Returns:
+		(SQL, params)
+	"""
+	conditions, params = get_key_conditions(filters)
+	conditions.append("swl.posting_date < %(from_date)s")
+	params["from_date"] = filters["from_date"]
 
 	where_clause = " AND ".join(conditions)
 
 	query = f"""
 		SELECT
-			COALESCE(SUM(qty_change), 0) as opening_qty,
-			COALESCE(SUM(weight_change), 0) as opening_weight,
-			COALESCE(SUM(
-				CASE 
-					WHEN transaction_type = 'IN' THEN value_amount
-					WHEN transaction_type = 'OUT' THEN -value_amount
-					ELSE 0
-				END
-			), 0) as opening_value
+			swl.item_code,
+			swl.warehouse,
+			IFNULL(swl.batch_no, '') as batch_no,
+			SUM(swl.qty_change) as opening_qty,
+			SUM(swl.weight_change) as opening_weight,
+			SUM({VALUE_CHANGE}) as opening_value
 		FROM
-			`tabStock Weight Ledger`
+			`tabStock Weight Ledger` swl
 		WHERE
 			{where_clause}
+		GROUP BY
+			swl.item_code,
+			swl.warehouse,
+			IFNULL(swl.batch_no, '')
+	"""
+
+	return query, params
+
+
+def get_key_totals(filters):
 	"""
+	Counters for the report range per item-warehouse-batch key in one
+	grouped query: transactions, IN/OUT totals, net movement and the last
+	posting date (see KEY_COUNTERS)
 
-	result = frappe.db.sql(query, params, as_dict=1)
+	Returns:
+		dict of balance key → dict of counters
+	"""
+	where_clause, params = get_ledger_conditions(filters)
 
-	if result:
-		return {
-			"qty": flt(result[0].opening_qty),
-			"weight": flt(result[0].opening_weight),
-			"value": flt(result[0].opening_value),
+	rows = frappe.db.sql(
+		f"""
+		SELECT
+			swl.item_code,
+			swl.warehouse,
+			IFNULL(swl.batch_no, '') as batch_no,
+			COUNT(*) as transactions,
+			SUM(swl.transaction_type = 'IN') as in_transactions,
+			SUM(CASE WHEN swl.transaction_type = 'IN' THEN ABS(swl.qty_change) ELSE 0 END) as in_qty,
+			SUM(CASE WHEN swl.transaction_type = 'IN' THEN ABS(swl.weight_change) ELSE 0 END) as in_weight,
+			SUM(CASE WHEN swl.transaction_type != 'IN' THEN ABS(swl.qty_change) ELSE 0 END) as out_qty,
+			SUM(CASE WHEN swl.transaction_type != 'IN' THEN ABS(swl.weight_change) ELSE 0 END) as out_weight,
+			SUM(swl.qty_change) as net_qty,
+			SUM(swl.weight_change) as net_weight,
+			SUM({VALUE_CHANGE}) as net_value,
+			MAX(swl.posting_date) as last_date
+		FROM
+			`tabStock Weight Ledger` swl
+		WHERE
+			{where_clause}
+		GROUP BY
+			swl.item_code,
+			swl.warehouse,
+			IFNULL(swl.batch_no, '')
+	""",
+		params,
+		as_dict=1,
+	)
+
+	keys = {}
+	for row in rows:
+		key_totals = {
+			"item_code": row.item_code,
+			"warehouse": row.warehouse,
+			"batch_no": row.batch_no,
+			"last_date": str(row.last_date),
 		}
-	else:
-		return {"qty": 0.0, "weight": 0.0, "value": 0.0}
+		for field in KEY_COUNTERS:
+			key_totals[field] = cint(row[field]) if field.endswith("transactions") else flt(row[field])
 
+		keys[get_balance_key(row.item_code, row.warehouse, row.batch_no)] = key_totals
 
-def get_chart_data(data, filters):
+	return keys
+
+
+def summarize_keys(keys, openings):
 	"""
-	Generate chart data for visual representation
+	Summary counters for the report range from the per-key totals, plus the
+	total opening balance across keys
 
 	Args:
-		data: Report data
-		filters: Report filters
+		keys: Per-key totals (see get_key_totals)
+		openings: Opening balances per key (see get_opening_balances)
 
 	Returns:
-		Chart configuration dict
+		frappe._dict of transaction counts, IN/OUT totals, distinct counts and openings
 	"""
-	if not data:
-		return None
+	totals = frappe._dict(dict.fromkeys(KEY_COUNTERS, 0))
+
+	for key_totals in keys.values():
+		for field in KEY_COUNTERS:
+			totals[field] += key_totals[field]
+
+	totals["out_transactions"] = totals.transactions - totals.in_transactions
+	totals["items"] = len({key_totals["item_code"] for key_totals in keys.values()})
+	totals["warehouses"] = len({key_totals["warehouse"] for key_totals in keys.values()})
+	totals["batches"] = len(
+		{key_totals["batch_no"] for key_totals in keys.values() if key_totals["batch_no"]}
+	)
+
+	totals["opening_qty"] = sum(opening["qty"] for opening in openings.values())
+	totals["opening_weight"] = sum(opening["weight"] for opening in openings.values())
+
+	return totals
 
+
+def get_date_totals(filters):
+	"""
+	IN/OUT quantity per posting date in one grouped query
+
+	Returns:
+		dict of posting date (str) → dict with in_qty, out_qty, net_qty and transactions
+	"""
+	where_clause, params = get_ledger_conditions(filters)
+
+	date_wise_data = frappe.db.sql(
+		f"""
+		SELECT
+			swl.posting_date,
+			SUM(CASE WHEN swl.transaction_type = 'IN' THEN ABS(swl.qty_change) ELSE 0 END) as in_qty,
+			SUM(CASE WHEN swl.transaction_type != 'IN' THEN ABS(swl.qty_change) ELSE 0 END) as out_qty,
+			SUM(swl.qty_change) as net_qty,
+			COUNT(*) as transactions
+		FROM
+			`tabStock Weight Ledger` swl
+		WHERE
+			{where_clause}
+		GROUP BY
+			swl.posting_date
+		ORDER BY
+			swl.posting_date
+	""",
+		params,
+		as_dict=1,
+	)
+
+	return {
+		str(row.posting_date): {
+			"in_qty": flt(row.in_qty),
+			"out_qty": flt(row.out_qty),
+			"net_qty": flt(row.net_qty),
+			"transactions": cint(row.get("transactions")),
+		}
+		for row in date_wise_data
+	}
+
+
+def build_chart(date_totals, opening_qty):
+	"""
+	Chart configuration from the per-date totals
+
+	Args:
+		date_totals: IN/OUT per posting date (see get_date_totals)
+		opening_qty: Total opening quantity the balance line starts from
+
+	Returns:
+		Chart configuration dict
+	"""
 	# Prepare data for charts
 	dates = []
 	in_qty = []
 	out_qty = []
-	in_weight = []
-	out_weight = []
 	balance_qty = []
-	balance_weight = []
-
-	# Group by date and aggregate
-	date_wise_data = {}
-
-	for row in data:
-		date = str(row.get("posting_date"))
-
-		if date not in date_wise_data:
-			date_wise_data[date] = {
-				"in_qty": 0,
-				"out_qty": 0,
-				"in_weight": 0,
-				"out_weight": 0,
-				"balance_qty": row.get("balance_qty", 0),
-				"balance_weight": row.get("balance_weight", 0),
-			}
 
-		# Aggregate IN/OUT for the date
-		if row.get("transaction_type") == "IN":
-			date_wise_data[date]["in_qty"] += abs(flt(row.get("qty_change", 0)))
-			date_wise_data[date]["in_weight"] += abs(flt(row.get("weight_change", 0)))
-		else:
-			date_wise_data[date]["out_qty"] += abs(flt(row.get("qty_change", 0)))
-			date_wise_data[date]["out_weight"] += abs(flt(row.get("weight_change", 0)))
-
-		# Use last balance for the date
-		date_wise_data[date]["balance_qty"] = row.get("balance_qty", 0)
-		date_wise_data[date]["balance_weight"] = row.get("balance_weight", 0)
-
-	# Sort by date
-	sorted_dates = sorted(date_wise_data.keys())
-
-	for date in sorted_dates:
-		dates.append(date)
-		in_qty.append(date_wise_data[date]["in_qty"])
-		out_qty.append(date_wise_data[date]["out_qty"])
-		in_weight.append(date_wise_data[date]["in_weight"])
-		out_weight.append(date_wise_data[date]["out_weight"])
-		balance_qty.append(date_wise_data[date]["balance_qty"])
-		balance_weight.append(date_wise_data[date]["balance_weight"])
+	balance = opening_qty
+	for posting_date in sorted(date_totals):
+		row = date_totals[posting_date]
+		balance += flt(row["net_qty"])
+
+		dates.append(posting_date)
+		in_qty.append(flt(row["in_qty"]))
+		out_qty.append(flt(row["out_qty"]))
+		balance_qty.append(balance)
 
 	# Create chart configuration
 	chart = {
@@ -458,70 +1110,29 @@ def get_chart_data(data, filters):
 	return chart
 
 
-def get_summary(data, filters):
+def get_summary(totals, filters):
 	"""
 	Generate summary cards with key metrics
 
 	Args:
-		data: Report data
+		totals: Range totals (see summarize_keys)
 		filters: Report filters
 
 	Returns:
 		List of summary card dicts
 	"""
-	if not data:
+	if not totals.transactions:
 		return []
 
-	# Initialize counters
-	total_in_qty = 0
-	total_in_weight = 0
-	total_out_qty = 0
-	total_out_weight = 0
-	total_transactions = len(data)
-	in_transactions = 0
-	out_transactions = 0
-	unique_items = set()
-	unique_warehouses = set()
-	unique_batches = set()
-
-	# Calculate metrics
-	for row in data:
-		transaction_type = row.get("transaction_type")
-		qty_change = flt(row.get("qty_change", 0))
-		weight_change = flt(row.get("weight_change", 0))
-
-		if transaction_type == "IN":
-			total_in_qty += abs(qty_change)
-			total_in_weight += abs(weight_change)
-			in_transactions += 1
-		else:
-			total_out_qty += abs(qty_change)
-			total_out_weight += abs(weight_change)
-			out_transactions += 1
-
-		# Track unique values
-		if row.get("item_code"):
-			unique_items.add(row.get("item_code"))
-		if row.get("warehouse"):
-			unique_warehouses.add(row.get("warehouse"))
-		if row.get("batch_no"):
-			unique_batches.add(row.get("batch_no"))
-
-	# Get closing balance (last row values)
-	closing_qty = data[-1].get("balance_qty", 0) if data else 0
-	closing_weight = data[-1].get("balance_weight", 0) if data else 0
-
-	# Calculate opening balance (first row balance - first row change)
-	if data:
-		opening_qty = flt(data[0].get("balance_qty", 0)) - flt(data[0].get("qty_change", 0))
-		opening_weight = flt(data[0].get("balance_weight", 0)) - flt(data[0].get("weight_change", 0))
-	else:
-		opening_qty = 0
-		opening_weight = 0
+	opening_qty = totals.opening_qty
+	opening_weight = totals.opening_weight
 
 	# Calculate net movement
-	net_qty = total_in_qty - total_out_qty
-	net_weight = total_in_weight - total_out_weight
+	net_qty = totals.in_qty - totals.out_qty
+	net_weight = totals.in_weight - totals.out_weight
+
+	closing_qty = opening_qty + net_qty
+	closing_weight = opening_weight + net_weight
 
 	# Calculate average weight per bird for closing stock
 	avg_closing_weight = closing_weight / closing_qty if closing_qty > 0 else 0
@@ -529,19 +1140,19 @@ def get_summary(data, filters):
 	# Build summary cards
 	summary = [
 		{
-			"value": total_transactions,
+			"value": totals.transactions,
 			"indicator": "Blue",
 			"label": _("Total Transactions"),
 			"datatype": "Int",
 		},
 		{
-			"value": in_transactions,
+			"value": totals.in_transactions,
 			"indicator": "Green",
 			"label": _("IN Transactions"),
 			"datatype": "Int",
 		},
 		{
-			"value": out_transactions,
+			"value": totals.out_transactions,
 			"indicator": "Red",
 			"label": _("OUT Transactions"),
 			"datatype": "Int",
@@ -559,25 +1170,25 @@ def get_summary(data, filters):
 			"datatype": "Float",
 		},
 		{
-			"value": total_in_qty,
+			"value": totals.in_qty,
 			"indicator": "Green",
 			"label": _("Total IN Qty (Nos)"),
 			"datatype": "Float",
 		},
 		{
-			"value": total_in_weight,
+			"value": totals.in_weight,
 			"indicator": "Green",
 			"label": _("Total IN Weight (Kg)"),
 			"datatype": "Float",
 		},
 		{
-			"value": total_out_qty,
+			"value": totals.out_qty,
 			"indicator": "Red",
 			"label": _("Total OUT Qty (Nos)"),
 			"datatype": "Float",
 		},
 		{
-			"value": total_out_weight,
+			"value": totals.out_weight,
 			"indicator": "Red",
 			"label": _("Total OUT Weight (Kg)"),
 			"datatype": "Float",
@@ -613,13 +1224,13 @@ def get_summary(data, filters):
 			"datatype": "Float",
 		},
 		{
-			"value": len(unique_items),
+			"value": totals["items"],
 			"indicator": "Blue",
 			"label": _("Unique Items"),
 			"datatype": "Int",
 		},
 		{
-			"value": len(unique_warehouses),
+			"value": totals.warehouses,
 			"indicator": "Blue",
 			"label": _("Unique Warehouses"),
 			"datatype": "Int",
@@ -627,10 +1238,10 @@ def get_summary(data, filters):
 	]
 
 	# Add batch count if batches exist
-	if unique_batches:
+	if totals.batches:
 		summary.append(
 			{
-				"value": len(unique_batches),
+				"value": totals.batches,
 				"indicator": "Blue",
 				"label": _("Unique Batches"),
 				"datatype": "Int",
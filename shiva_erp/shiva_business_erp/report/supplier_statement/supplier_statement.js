@@ -7,8 +7,14 @@ frappe.query_reports["Supplier Statement"] = {
 			fieldname: "supplier",
 			label: __("Supplier"),
 			fieldtype: "Link",
-			options: "Supplier",
-			reqd: 1
+			options: "Supplier"
+		},
+		{
+			fieldname: "supplier_group",
+			label: __("Supplier Group"),
+			fieldtype: "Link",
+			options: "Supplier Group",
+			description: __("Without a Supplier, statements of all suppliers in the group")
 		},
 		{
 			fieldname: "company",
@@ -35,7 +41,7 @@ frappe.query_reports["Supplier Statement"] = {
 		value = default_formatter(value, row, column, data);
 		
 		// Style for opening, total, and closing rows
-		if (data && (data.is_opening || data.is_total || data.is_closing)) {
+		if (data && (data.is_opening || data.is_total || data.is_closing || data.is_supplier)) {
 			value = `<span style="font-weight: bold;">${value}</span>`;
 			
 			// Color code the balance
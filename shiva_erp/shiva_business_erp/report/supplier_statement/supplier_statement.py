@@ -5,6 +5,51 @@ import frappe
 from frappe import _
 from frappe.utils import flt, fmt_money, getdate
 
+# Item rows of all vouchers of one type in one query, in idx order per voucher
+# ({weight_kg} is filled in by get_weight_field)
+ITEM_DETAIL_QUERIES = {
+	"Purchase Invoice": """
+		SELECT
+			pii.parent,
+			pii.item_code,
+			pii.item_name,
+			pii.qty,
+			COALESCE(pri.custom_total_weight_kg, 0) as weight_kg,
+			pii.rate,
+			pii.amount
+		FROM `tabPurchase Invoice Item` pii
+		LEFT JOIN `tabPurchase Receipt Item` pri ON pri.name = pii.pr_detail
+		WHERE pii.parent IN %(voucher_nos)s
+		ORDER BY pii.parent, pii.idx
+	""",
+	"Purchase Receipt": """
+		SELECT
+			parent,
+			item_code,
+			item_name,
+			qty,
+			{weight_kg} as weight_kg,
+			rate,
+			amount
+		FROM `tabPurchase Receipt Item`
+		WHERE parent IN %(voucher_nos)s
+		ORDER BY parent, idx
+	""",
+	"Purchase Order": """
+		SELECT
+			parent,
+			item_code,
+			item_name,
+			qty,
+			{weight_kg} as weight_kg,
+			rate,
+			amount
+		FROM `tabPurchase Order Item`
+		WHERE parent IN %(voucher_nos)s
+		ORDER BY parent, idx
+	""",
+}
+
 
 def execute(filters=None):
 	"""
@@ -15,19 +60,22 @@ def execute(filters=None):
 	- All transactions in period
 	- Closing Balance
 	- Correct running totals (doesn't double-count)
+
+	Without a Supplier, all suppliers of the Supplier Group get their
+	statement, one after another (multi-supplier mode).
 	"""
 	if not filters:
 		filters = {}
 
-	if not filters.get("supplier"):
-		frappe.throw(_("Please select a Supplier"))
+	if not filters.get("supplier") and not filters.get("supplier_group"):
+		frappe.throw(_("Please select a Supplier or a Supplier Group"))
 
 	columns = get_columns()
 	data = get_data(filters)
 
 	# Get summary and chart data
 	summary = get_summary(filters, data)
-	chart = get_chart(filters, data)
+	chart = get_chart(filters, data) if filters.get("supplier") else get_supplier_chart(data)
 
 	return columns, data, None, chart, summary
 
@@ -69,22 +117,75 @@ def get_columns():
 
 
 def get_data(filters):
-	"""Get supplier statement data with correct balances"""
-	supplier = filters.get("supplier")
+	"""
+	Get supplier statement data with correct balances
+
+	Openings of all suppliers come from one grouped GL query, their period
+	transactions from one ordered scan and item details from one query per
+	voucher type; the output is then split per supplier.
+	"""
 	from_date = filters.get("from_date")
 	to_date = filters.get("to_date")
 	company = filters.get("company") or frappe.defaults.get_user_default("Company")
 
-	# Get opening balance (before from_date)
-	opening_balance = get_opening_balance(supplier, from_date, company)
+	suppliers = get_suppliers(filters)
+	if not suppliers:
+		return []
+
+	# Get opening balances (before from_date)
+	opening_balances = get_opening_balances(suppliers, from_date, company)
 
 	# Get transactions in period
-	transactions = get_transactions(supplier, from_date, to_date, company)
+	transactions = get_supplier_transactions(suppliers, from_date, to_date, company)
 
 	# Get item details for each transaction
-	item_details = get_item_details(transactions)
+	item_details = get_item_details([txn for txns in transactions.values() for txn in txns])
 
-	# Build result with running balance
+	if filters.get("supplier"):
+		supplier = filters["supplier"]
+		return build_statement(
+			from_date, opening_balances.get(supplier, 0.0), transactions.get(supplier, []), item_details
+		)
+
+	# Multi-supplier mode: a heading and statement per supplier with a balance or transactions
+	data = []
+	for supplier in suppliers:
+		if supplier not in transactions and not opening_balances.get(supplier):
+			continue
+
+		data.append(
+			{
+				"posting_date": "",
+				"voucher_type": "",
+				"voucher_no": "",
+				"item_code": "",
+				"item_name": f"<b>{supplier}</b>",
+				"supplier": supplier,
+				"is_supplier": 1,
+			}
+		)
+		data.extend(
+			build_statement(
+				from_date, opening_balances.get(supplier, 0.0), transactions.get(supplier, []), item_details
+			)
+		)
+
+	return data
+
+
+def build_statement(from_date, opening_balance, transactions, item_details):
+	"""
+	Build one supplier's statement rows with running balance
+
+	Args:
+		from_date: Statement start date (an opening row is added when set)
+		opening_balance: Balance before from_date
+		transactions: GL transactions in the period, in posting order
+		item_details: dict of voucher_no → item rows (see get_item_details)
+
+	Returns:
+		list of statement rows, opening and closing rows included
+	"""
 	data = []
 	running_balance = opening_balance
 
@@ -204,37 +305,51 @@ def get_data(filters):
 	return data
 
 
-def get_opening_balance(supplier, from_date, company):
-	"""Calculate opening balance before from_date"""
-	if not from_date:
-		return 0.0
+def get_suppliers(filters):
+	"""The Supplier, or the active suppliers of the Supplier Group and its child groups"""
+	if filters.get("supplier"):
+		return [filters["supplier"]]
 
-	conditions = ["party_type = 'Supplier'", "party = %(supplier)s", "company = %(company)s"]
+	lft, rgt = frappe.db.get_value("Supplier Group", filters["supplier_group"], ["lft", "rgt"])
 
-	conditions.append("posting_date < %(from_date)s")
+	return frappe.db.sql_list(
+		"""
+		SELECT s.name
+		FROM `tabSupplier` s
+		INNER JOIN `tabSupplier Group` sg ON sg.name = s.supplier_group
+		WHERE sg.lft >= %(lft)s AND sg.rgt <= %(rgt)s AND s.disabled = 0
+		ORDER BY s.name
+	""",
+		{"lft": lft, "rgt": rgt},
+	)
 
-	where_clause = " AND ".join(conditions)
 
-	query = f"""
-		SELECT 
-			COALESCE(SUM(credit - debit), 0) as opening_balance
-		FROM 
-			`tabGL Entry`
-		WHERE 
-			{where_clause}
-			AND is_cancelled = 0
+def get_opening_balances(suppliers, from_date, company):
 	"""
+	Calculate opening balances before from_date for all suppliers from the
+	nearest month-end Party Balance Snapshot plus the GL entries after it
+	For supplier: Credit increases payable (what we owe them), so the
+	snapshot's debit - credit balance is negated
 
-	result = frappe.db.sql(
-		query, {"supplier": supplier, "company": company, "from_date": from_date}, as_dict=1
+	Returns:
+		dict of supplier → opening balance (suppliers without entries are absent)
+	"""
+	from shiva_erp.shiva_business_erp.doctype.party_balance_snapshot.party_balance_snapshot import (
+		get_party_opening_balances,
 	)
 
-	return flt(result[0].opening_balance) if result else 0.0
+	balances = get_party_opening_balances("Supplier", suppliers, company, from_date)
+	return {supplier: -flt(balance) for supplier, balance in balances.items()}
+
 
+def get_supplier_transactions(suppliers, from_date, to_date, company):
+	"""
+	Get all GL transactions of the suppliers in period with one ordered scan
 
-def get_transactions(supplier, from_date, to_date, company):
-	"""Get all GL transactions for supplier in period"""
-	conditions = ["party_type = 'Supplier'", "party = %(supplier)s", "company = %(company)s"]
+	Returns:
+		dict of supplier → transactions in posting order
+	"""
+	conditions = ["party_type = 'Supplier'", "party IN %(suppliers)s", "company = %(company)s"]
 
 	if from_date:
 		conditions.append("posting_date >= %(from_date)s")
@@ -245,7 +360,8 @@ def get_transactions(supplier, from_date, to_date, company):
 	where_clause = " AND ".join(conditions)
 
 	query = f"""
-		SELECT 
+		SELECT
+			party,
 			posting_date,
 			voucher_type,
 			voucher_no,
@@ -253,130 +369,62 @@ def get_transactions(supplier, from_date, to_date, company):
 			debit,
 			credit,
 			against_voucher
-		FROM 
+		FROM
 			`tabGL Entry`
-		WHERE 
+		WHERE
 			{where_clause}
 			AND is_cancelled = 0
-		ORDER BY 
+		ORDER BY
+			party ASC,
 			posting_date ASC,
 			creation ASC
 	"""
 
-	return frappe.db.sql(
+	transactions = {}
+	for row in frappe.db.sql(
 		query,
-		{"supplier": supplier, "company": company, "from_date": from_date, "to_date": to_date},
+		{"suppliers": suppliers, "company": company, "from_date": from_date, "to_date": to_date},
 		as_dict=1,
-	)
+	):
+		transactions.setdefault(row.pop("party"), []).append(row)
+
+	return transactions
 
 
 def get_item_details(transactions):
-	"""Get item details for Purchase Receipt, Purchase Invoice"""
-	item_details = {}
+	"""
+	Get item details for Purchase Receipt, Purchase Invoice
+
+	Voucher numbers are grouped by type and each child table is read with one
+	query (parent IN ...); items are merged per voucher in idx order.
 
+	Returns:
+		dict of voucher_no → list of item rows
+	"""
+	vouchers = {}
 	for txn in transactions:
-		voucher_type = txn.voucher_type
-		voucher_no = txn.voucher_no
-
-		items = []
-
-		if voucher_type == "Purchase Invoice":
-			items = frappe.db.sql(
-				"""
-				SELECT 
-					pii.item_code,
-					pii.item_name,
-					pii.qty,
-					COALESCE(pri.custom_total_weight_kg, 0) as weight_kg,
-					pii.rate,
-					pii.amount
-				FROM `tabPurchase Invoice Item` pii
-				LEFT JOIN `tabPurchase Receipt Item` pri ON pri.name = pii.pr_detail
-				WHERE pii.parent = %(voucher_no)s
-				ORDER BY pii.idx
-			""",
-				{"voucher_no": voucher_no},
-				as_dict=1,
-			)
+		if txn.voucher_type in ITEM_DETAIL_QUERIES:
+			vouchers.setdefault(txn.voucher_type, set()).add(txn.voucher_no)
 
-		elif voucher_type == "Purchase Receipt":
-			try:
-				items = frappe.db.sql(
-					"""
-					SELECT 
-						item_code,
-						item_name,
-						qty,
-						COALESCE(custom_total_weight_kg, 0) as weight_kg,
-						rate,
-						amount
-					FROM `tabPurchase Receipt Item`
-					WHERE parent = %(voucher_no)s
-					ORDER BY idx
-				""",
-					{"voucher_no": voucher_no},
-					as_dict=1,
-				)
-			except Exception:
-				items = frappe.db.sql(
-					"""
-					SELECT 
-						item_code,
-						item_name,
-						qty,
-						0 as weight_kg,
-						rate,
-						amount
-					FROM `tabPurchase Receipt Item`
-					WHERE parent = %(voucher_no)s
-					ORDER BY idx
-				""",
-					{"voucher_no": voucher_no},
-					as_dict=1,
-				)
+	item_details = {}
 
-		elif voucher_type == "Purchase Order":
-			try:
-				items = frappe.db.sql(
-					"""
-					SELECT 
-						item_code,
-						item_name,
-						qty,
-						COALESCE(custom_total_weight_kg, 0) as weight_kg,
-						rate,
-						amount
-					FROM `tabPurchase Order Item`
-					WHERE parent = %(voucher_no)s
-					ORDER BY idx
-				""",
-					{"voucher_no": voucher_no},
-					as_dict=1,
-				)
-			except Exception:
-				items = frappe.db.sql(
-					"""
-					SELECT 
-						item_code,
-						item_name,
-						qty,
-						0 as weight_kg,
-						rate,
-						amount
-					FROM `tabPurchase Order Item`
-					WHERE parent = %(voucher_no)s
-					ORDER BY idx
-				""",
-					{"voucher_no": voucher_no},
-					as_dict=1,
-				)
+	for voucher_type, voucher_nos in vouchers.items():
+		query = ITEM_DETAIL_QUERIES[voucher_type].format(weight_kg=get_weight_field(voucher_type))
 
-		if items:
-			item_details[voucher_no] = items
+		for item in frappe.db.sql(query, {"voucher_nos": list(voucher_nos)}, as_dict=1):
+			item_details.setdefault(item.pop("parent"), []).append(item)
 
 	return item_details
 
 
+def get_weight_field(voucher_type):
+	"""Weight column of a voucher type's items; 0 where the custom field is not installed"""
+	if frappe.db.has_column(f"{voucher_type} Item", "custom_total_weight_kg"):
+		return "COALESCE(custom_total_weight_kg, 0)"
+
+	return "0"
+
+
 def get_summary(filters, data):
 	"""Generate summary cards showing key metrics"""
 	if not data:
@@ -391,10 +439,11 @@ def get_summary(filters, data):
 	total_amount = 0
 
 	for row in data:
+		# Summed over suppliers in multi-supplier mode
 		if row.get("is_opening"):
-			opening_balance = flt(row.get("balance", 0))
+			opening_balance += flt(row.get("balance", 0))
 		elif row.get("is_closing"):
-			closing_balance = flt(row.get("balance", 0))
+			closing_balance += flt(row.get("balance", 0))
 		else:
 			total_debit += flt(row.get("debit", 0))
 			total_credit += flt(row.get("credit", 0))
@@ -476,3 +525,32 @@ def get_chart(filters, data):
 		"axisOptions": {"xIsSeries": 1},
 		"lineOptions": {"regionFill": 1, "hideDots": 0},
 	}
+
+
+def get_supplier_chart(data):
+	"""Generate chart of the closing balance per supplier (multi-supplier mode)"""
+	suppliers = []
+	balances = []
+
+	for row in data:
+		if row.get("is_supplier"):
+			suppliers.append(row["supplier"])
+		elif row.get("is_closing"):
+			balances.append(flt(row.get("balance", 0)))
+
+	if not suppliers:
+		return None
+
+	return {
+		"data": {
+			"labels": suppliers,
+			"datasets": [
+				{
+					"name": _("Outstanding Balance"),
+					"values": balances,
+				}
+			],
+		},
+		"type": "bar",
+		"colors": ["#fc4f51"],
+	}
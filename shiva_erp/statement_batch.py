@@ -0,0 +1,280 @@
+"""
+Batch Customer Statements for Shiva ERP
+
+Month-end statements for every customer of a territory (or a given list of
+customers) in one background job instead of one report run per shop.
+
+Customers are processed in chunks of STATEMENT_CHUNK_SIZE. For each chunk,
+openings, GL transactions and item details are loaded with a few set-based
+queries (openings from the month-end Party Balance Snapshots, one
+transaction query, one item query per voucher type). The statements of the
+chunk are then rendered (CSV data and PDF) in a process pool and written to
+a private folder, which is zipped into one File when the batch is done.
+
+Progress is published to the requesting user over STATEMENT_BATCH_EVENT.
+"""
+
+import csv
+import multiprocessing
+import os
+import re
+import shutil
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import frappe
+from frappe import _
+from frappe.utils import add_months, getdate, today
+
+STATEMENT_BATCH_EVENT = "customer_statement_batch"
+
+STATEMENT_TEMPLATE = "templates/statements/customer_statement.html"
+
+# Customers whose data is loaded and rendered together
+STATEMENT_CHUNK_SIZE = 100
+
+# Worker processes rendering statements (PDF rendering is CPU bound)
+STATEMENT_WORKERS = max(1, min(8, (os.cpu_count() or 2) - 1))
+
+# RQ timeout for a batch (seconds)
+STATEMENT_JOB_TIMEOUT = 4 * 60 * 60
+
+
+@frappe.whitelist()
+def generate_statements(territory=None, customers=None, from_date=None, to_date=None, company=None):
+	"""
+	Queue Customer Statements for all customers of a territory (including
+	child territories) or for a list of customers
+
+	Args:
+		territory: Territory whose customers get a statement
+		customers: List (or JSON list) of customers, instead of a territory
+		from_date: Statement start (default: one month ago)
+		to_date: Statement end (default: today)
+		company: Company (default: user default)
+
+	Returns:
+		dict with batch_id and the number of customers
+	"""
+	frappe.has_permission("GL Entry", "read", throw=True)
+
+	customers = frappe.parse_json(customers) if customers else get_territory_customers(territory)
+	if not customers:
+		frappe.throw(_("No active customers found for Territory {0}").format(territory))
+
+	batch_id = frappe.generate_hash(length=10)
+
+	frappe.enqueue(
+		"shiva_erp.statement_batch.run_statement_batch",
+		queue="long",
+		timeout=STATEMENT_JOB_TIMEOUT,
+		job_id=f"customer_statement_batch::{batch_id}",
+		batch_id=batch_id,
+		customers=customers,
+		from_date=str(getdate(from_date or add_months(today(), -1))),
+		to_date=str(getdate(to_date or today())),
+		company=company or frappe.defaults.get_user_default("Company"),
+		user=frappe.session.user,
+	)
+
+	return {"batch_id": batch_id, "customers": len(customers)}
+
+
+def get_territory_customers(territory):
+	"""Active customers of a territory and its child territories (nested set range)"""
+	if not territory:
+		frappe.throw(_("Please select a Territory or Customers"))
+
+	lft, rgt = frappe.db.get_value("Territory", territory, ["lft", "rgt"])
+
+	return frappe.db.sql_list(
+		"""
+		SELECT c.name
+		FROM `tabCustomer` c
+		INNER JOIN `tabTerritory` t ON t.name = c.territory
+		WHERE t.lft >= %(lft)s AND t.rgt <= %(rgt)s AND c.disabled = 0
+		ORDER BY c.name
+	""",
+		{"lft": lft, "rgt": rgt},
+	)
+
+
+def run_statement_batch(batch_id, customers, from_date, to_date, company, user):
+	"""
+	Background job: load, render and write the statements of all customers,
+	then zip them into one private File
+
+	A customer whose statement fails is logged and skipped.
+	"""
+	folder = frappe.get_site_path("private", "files", "customer_statements", batch_id)
+	os.makedirs(folder, exist_ok=True)
+
+	total = len(customers)
+	done = 0
+	failed = []
+
+	context = multiprocessing.get_context("spawn")
+	with ProcessPoolExecutor(
+		max_workers=STATEMENT_WORKERS,
+		mp_context=context,
+		initializer=init_worker,
+		initargs=(frappe.local.site, frappe.local.sites_path, user),
+	) as pool:
+		for start in range(0, total, STATEMENT_CHUNK_SIZE):
+			chunk = customers[start : start + STATEMENT_CHUNK_SIZE]
+			statements = load_statements(chunk, from_date, to_date, company)
+
+			futures = {
+				pool.submit(render_statement, folder, statement): statement["customer"]
+				for statement in statements
+			}
+
+			for future in as_completed(futures):
+				try:
+					future.result()
+				except Exception:
+					failed.append(futures[future])
+					frappe.log_error(title=_("Customer Statement failed for {0}").format(futures[future]))
+
+				done += 1
+				publish_progress(batch_id, user, done, total)
+
+	file_url = write_archive(batch_id, folder)
+	frappe.publish_realtime(
+		STATEMENT_BATCH_EVENT,
+		{"batch_id": batch_id, "status": "Completed", "file_url": file_url, "failed": failed},
+		user=user,
+	)
+
+
+def load_statements(customers, from_date, to_date, company):
+	"""
+	Statement rows and summary for a chunk of customers, from set-based queries
+
+	Returns:
+		list of dicts with customer, filters, data and summary
+	"""
+	from shiva_erp.shiva_business_erp.doctype.party_balance_snapshot.party_balance_snapshot import (
+		get_party_opening_balances,
+	)
+	from shiva_erp.shiva_business_erp.report.customer_statement.customer_statement import (
+		build_statement,
+		get_item_details,
+		get_summary,
+	)
+
+	params = {"customers": customers, "company": company, "from_date": from_date, "to_date": to_date}
+
+	openings = get_party_opening_balances("Customer", customers, company, from_date)
+
+	rows = frappe.db.sql(
+		"""
+		SELECT
+			party,
+			posting_date,
+			voucher_type,
+			voucher_no,
+			debit,
+			credit,
+			remarks
+		FROM `tabGL Entry`
+		WHERE party_type = 'Customer'
+			AND party IN %(customers)s
+			AND company = %(company)s
+			AND posting_date BETWEEN %(from_date)s AND %(to_date)s
+			AND is_cancelled = 0
+		ORDER BY party, posting_date, creation
+	""",
+		params,
+		as_dict=1,
+	)
+
+	transactions = {}
+	for row in rows:
+		transactions.setdefault(row.pop("party"), []).append(row)
+
+	item_details = get_item_details(rows)
+
+	statements = []
+	for customer in customers:
+		filters = frappe._dict(customer=customer, company=company, from_date=from_date, to_date=to_date)
+		data = build_statement(
+			from_date, float(openings.get(customer) or 0), transactions.get(customer, []), item_details
+		)
+		statements.append(
+			{"customer": customer, "filters": filters, "data": data, "summary": get_summary(filters, data)}
+		)
+
+	return statements
+
+
+def init_worker(site, sites_path, user):
+	"""Process pool initializer: connect the worker process to the site"""
+	frappe.init(site=site, sites_path=sites_path)
+	frappe.connect()
+	frappe.set_user(user)
+
+
+def render_statement(folder, statement):
+	"""
+	Pool task: write one customer's statement as CSV data and PDF
+
+	Returns:
+		The customer
+	"""
+	from frappe.utils.pdf import get_pdf
+
+	from shiva_erp.shiva_business_erp.report.customer_statement.customer_statement import get_columns
+
+	columns = get_columns()
+	path = os.path.join(folder, get_file_stem(statement["customer"]))
+
+	with open(f"{path}.csv", "w", newline="", encoding="utf-8") as f:
+		writer = csv.writer(f)
+		writer.writerow([column["label"] for column in columns])
+		for row in statement["data"]:
+			writer.writerow([row.get(column["fieldname"]) for column in columns])
+
+	html = frappe.render_template(STATEMENT_TEMPLATE, {**statement, "columns": columns})
+	with open(f"{path}.pdf", "wb") as f:
+		f.write(get_pdf(html))
+
+	return statement["customer"]
+
+
+def get_file_stem(customer):
+	"""File name (without extension) for a customer's statement"""
+	return re.sub(r"[^\w\-]+", "_", customer).strip("_") or "customer"
+
+
+def publish_progress(batch_id, user, done, total):
+	"""Publish batch progress every 10 statements and at the end"""
+	if done % 10 and done != total:
+		return
+
+	frappe.publish_realtime(
+		STATEMENT_BATCH_EVENT,
+		{"batch_id": batch_id, "status": "Running", "done": done, "total": total},
+		user=user,
+	)
+
+
+def write_archive(batch_id, folder):
+	"""Zip the batch folder into a private File and remove the folder"""
+	file_name = f"customer_statements_{batch_id}.zip"
+	archive = shutil.make_archive(
+		frappe.get_site_path("private", "files", file_name[: -len(".zip")]), "zip", folder
+	)
+	shutil.rmtree(folder, ignore_errors=True)
+
+	file_doc = frappe.get_doc(
+		{
+			"doctype": "File",
+			"file_name": file_name,
+			"file_url": f"/private/files/{file_name}",
+			"file_size": os.path.getsize(archive),
+			"is_private": 1,
+		}
+	).insert(ignore_permissions=True)
+	frappe.db.commit()
+
+	return file_doc.file_url
@@ -9,6 +9,26 @@ import frappe
 from frappe import _
 from frappe.utils import flt
 
+# Columns logged for ledger rows deleted on cancel, read by the incremental
+# refresh of the ledger reports (report_cache.log_deleted_rows)
+DELETED_LEDGER_FIELDS = [
+	"name",
+	"posting_date",
+	"creation",
+	"modified",
+	"transaction_type",
+	"voucher_type",
+	"voucher_no",
+	"item_code",
+	"warehouse",
+	"batch_no",
+	"stock_qty",
+	"weight_kg",
+	"qty_change",
+	"weight_change",
+	"value_amount",
+]
+
 
 def update_weight_ledger(doc, method):
 	"""
@@ -125,13 +145,7 @@ def reverse_weight_ledger(doc, method):
 		method: on_cancel hook method
 	"""
 	# Delete all ledger entries for this voucher
-	deleted_count = frappe.db.sql(
-		"""
-		DELETE FROM `tabStock Weight Ledger`
-		WHERE voucher_type = %s AND voucher_no = %s
-	""",
-		(doc.doctype, doc.name),
-	)
+	deleted_count = delete_weight_ledger_entries(doc.name, doc.doctype)
 
 	frappe.msgprint(
 		_("Reversed {0} Stock Weight Ledger entries for {1} {2}").format(
@@ -141,6 +155,32 @@ def reverse_weight_ledger(doc, method):
 	)
 
 
+def delete_weight_ledger_entries(voucher_no, voucher_type=None):
+	"""
+	Delete the Stock Weight Ledger entries of a voucher and log them so cached
+	ledger reports can fold the cancellation in instead of rebuilding.
+
+	Args:
+		voucher_no: Voucher name
+		voucher_type: Voucher DocType (optional)
+
+	Returns:
+		Number of entries deleted
+	"""
+	from shiva_erp.report_cache import log_deleted_rows
+
+	filters = {"voucher_no": voucher_no}
+	if voucher_type:
+		filters["voucher_type"] = voucher_type
+
+	rows = frappe.get_all("Stock Weight Ledger", filters=filters, fields=DELETED_LEDGER_FIELDS)
+	if rows:
+		frappe.db.delete("Stock Weight Ledger", filters)
+		log_deleted_rows("Stock Weight Ledger", rows)
+
+	return len(rows)
+
+
 @frappe.whitelist()
 def validate_stock_availability(item_code, warehouse, required_qty, required_weight_kg, batch_no=None):
 	"""
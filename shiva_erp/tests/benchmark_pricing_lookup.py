@@ -0,0 +1,144 @@
+# Copyright (c) 2026, Gopalakrishna Reddy Gogulamudi and Contributors
+# See license.txt
+
+"""
+Benchmark for the as-of pricing lookups over a large price history.
+
+Loads `rows` historical Item Price Type and Shop Discount rows (non-overlapping
+10-day validity windows per key), times get_base_price / get_shop_discount
+for random keys and dates, prints the query plans and rolls everything back.
+
+Usage:
+	bench --site <site> execute shiva_erp.tests.benchmark_pricing_lookup.run
+	bench --site <site> execute shiva_erp.tests.benchmark_pricing_lookup.run --kwargs "{'rows': 100000}"
+"""
+
+import random
+import time
+
+import frappe
+from frappe.utils import add_days, getdate
+
+from shiva_erp.shiva_business_erp.doctype.item_price_type import item_price_type
+from shiva_erp.shiva_business_erp.doctype.shop_discount import shop_discount
+
+PERIODS_PER_KEY = 100
+PERIOD_DAYS = 10
+START_DATE = "2023-01-01"
+
+
+def run(rows=100_000, lookups=2_000):
+	"""
+	Run the benchmark and print average lookup times.
+
+	Args:
+		rows: Historical rows to load per pricing table
+		lookups: Number of timed lookups per query
+
+	Returns:
+		dict with average milliseconds per lookup
+	"""
+	keys = max(1, rows // PERIODS_PER_KEY)
+	start = getdate(START_DATE)
+
+	try:
+		_load_history(keys, start)
+
+		results = {
+			"get_base_price_ms": _time_lookups(
+				lookups,
+				lambda key, date: item_price_type.get_base_price(
+					f"BENCH-ITEM-{key}", "BENCH-TERRITORY", date
+				),
+				keys,
+				start,
+			),
+			"get_shop_discount_ms": _time_lookups(
+				lookups,
+				lambda key, date: shop_discount.get_shop_discount("BENCH-SHOP", f"BENCH-ITEM-{key}", date),
+				keys,
+				start,
+			),
+		}
+
+		sample = {
+			"item_code": "BENCH-ITEM-0",
+			"territories": ["BENCH-TERRITORY"],
+			"shop": "BENCH-SHOP",
+			"posting_date": add_days(start, PERIOD_DAYS * PERIODS_PER_KEY // 2),
+		}
+		print(
+			"Item Price Type plan:",
+			frappe.db.sql(f"EXPLAIN {item_price_type.BASE_PRICE_QUERY}", sample, as_dict=True),
+		)
+		print(
+			"Shop Discount plan:",
+			frappe.db.sql(f"EXPLAIN {shop_discount.SHOP_DISCOUNT_QUERY}", sample, as_dict=True),
+		)
+		print(f"{rows} rows per table, {lookups} lookups:", results)
+
+		return results
+	finally:
+		frappe.db.rollback()
+
+
+def _load_history(keys, start):
+	ipt_fields = [
+		"name",
+		"item_code",
+		"territory",
+		"base_price_per_kg",
+		"currency",
+		"is_active",
+		"valid_from",
+		"valid_till",
+		"modified",
+	]
+	sd_fields = ["name", "shop", "item_code", "discount_per_kg", "is_active", "valid_from", "valid_till"]
+
+	for key in range(keys):
+		ipt_rows = []
+		sd_rows = []
+
+		for period in range(PERIODS_PER_KEY):
+			valid_from = add_days(start, period * PERIOD_DAYS)
+			valid_till = add_days(valid_from, PERIOD_DAYS - 1)
+
+			ipt_rows.append(
+				[
+					f"BENCH-IPT-{key}-{period}",
+					f"BENCH-ITEM-{key}",
+					"BENCH-TERRITORY",
+					100 + period,
+					"INR",
+					1,
+					valid_from,
+					valid_till,
+					valid_from,
+				]
+			)
+			sd_rows.append(
+				[
+					f"BENCH-SD-{key}-{period}",
+					"BENCH-SHOP",
+					f"BENCH-ITEM-{key}",
+					period % 10,
+					1,
+					valid_from,
+					valid_till,
+				]
+			)
+
+		frappe.db.bulk_insert("Item Price Type", ipt_fields, ipt_rows)
+		frappe.db.bulk_insert("Shop Discount", sd_fields, sd_rows)
+
+
+def _time_lookups(lookups, fn, keys, start):
+	span = PERIOD_DAYS * PERIODS_PER_KEY
+	args = [(random.randrange(keys), add_days(start, random.randrange(span))) for _ in range(lookups)]
+
+	began = time.perf_counter()
+	for key, date in args:
+		fn(key, date)
+
+	return round((time.perf_counter() - began) * 1000 / lookups, 3)
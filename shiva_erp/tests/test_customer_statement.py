@@ -0,0 +1,109 @@
+# Copyright (c) 2026, Gopalakrishna Reddy Gogulamudi and Contributors
+# See license.txt
+
+from unittest.mock import patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from shiva_erp import statement_batch
+from shiva_erp.shiva_business_erp.report.customer_statement import customer_statement
+
+SNAPSHOT_OPENINGS = "shiva_erp.shiva_business_erp.doctype.party_balance_snapshot.party_balance_snapshot.get_party_opening_balances"
+
+
+def item_row(parent, item_code, qty):
+	return frappe._dict(
+		parent=parent,
+		item_code=item_code,
+		item_name=item_code,
+		qty=qty,
+		weight_kg=0,
+		rate=10,
+		amount=qty * 10,
+	)
+
+
+class TestCustomerStatement(FrappeTestCase):
+	"""Test cases for the Customer Statement report"""
+
+	def test_item_details_one_query_per_voucher_type(self):
+		"""Test that item details are read with one query per child table and merged in idx order"""
+		transactions = [
+			frappe._dict(voucher_type="Sales Invoice", voucher_no="SINV-1"),
+			frappe._dict(voucher_type="Payment Entry", voucher_no="PE-1"),
+			frappe._dict(voucher_type="Sales Invoice", voucher_no="SINV-2"),
+			frappe._dict(voucher_type="Sales Invoice", voucher_no="SINV-1"),
+			frappe._dict(voucher_type="Delivery Note", voucher_no="DN-1"),
+		]
+		results = [
+			[
+				item_row("SINV-1", "Broiler", 5),
+				item_row("SINV-1", "Layer", 2),
+				item_row("SINV-2", "Broiler", 1),
+			],
+			[item_row("DN-1", "Broiler", 3)],
+		]
+
+		with (
+			patch("frappe.db.sql", side_effect=results) as sql,
+			patch("frappe.db.has_column", return_value=False),
+		):
+			item_details = customer_statement.get_item_details(transactions)
+
+		self.assertEqual(sql.call_count, 2)
+		self.assertEqual(sorted(sql.call_args_list[0][0][1]["voucher_nos"]), ["SINV-1", "SINV-2"])
+		self.assertIn("0 as weight_kg", sql.call_args_list[1][0][0])
+
+		self.assertEqual([item.item_code for item in item_details["SINV-1"]], ["Broiler", "Layer"])
+		self.assertEqual(len(item_details["SINV-2"]), 1)
+		self.assertEqual(item_details["DN-1"][0].qty, 3)
+		self.assertNotIn("PE-1", item_details)
+		self.assertNotIn("parent", item_details["DN-1"][0])
+
+	def test_batch_statements_from_set_based_queries(self):
+		"""Test that a chunk of statements is loaded with snapshot openings and one query each for GL and items"""
+		openings = {"Shop A": 1000.0}
+		gl_entries = [
+			frappe._dict(
+				party="Shop A",
+				posting_date="2026-10-02",
+				voucher_type="Sales Invoice",
+				voucher_no="SINV-1",
+				debit=50,
+				credit=0,
+				remarks="",
+			),
+			frappe._dict(
+				party="Shop B",
+				posting_date="2026-10-03",
+				voucher_type="Payment Entry",
+				voucher_no="PE-1",
+				debit=0,
+				credit=200,
+				remarks="Cash",
+			),
+		]
+		items = [item_row("SINV-1", "Broiler", 5)]
+
+		with (
+			patch(SNAPSHOT_OPENINGS, return_value=openings),
+			patch("frappe.db.sql", side_effect=[gl_entries, items]) as sql,
+		):
+			statements = statement_batch.load_statements(
+				["Shop A", "Shop B", "Shop C"], "2026-10-01", "2026-10-31", "Shiva Poultry"
+			)
+
+		self.assertEqual(sql.call_count, 2)
+		self.assertEqual([statement["customer"] for statement in statements], ["Shop A", "Shop B", "Shop C"])
+
+		closing = {statement["customer"]: statement["data"][-1]["balance"] for statement in statements}
+		self.assertEqual(closing, {"Shop A": 1050, "Shop B": -200, "Shop C": 0})
+
+		# Voucher header row followed by its item row
+		self.assertEqual(statements[0]["data"][2]["item_code"], "Broiler")
+
+	def test_statement_file_stem(self):
+		self.assertEqual(
+			statement_batch.get_file_stem("Sri Balaji Chicken / Shop 2"), "Sri_Balaji_Chicken_Shop_2"
+		)
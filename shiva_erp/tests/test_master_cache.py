@@ -0,0 +1,95 @@
+# Copyright (c) 2026, Gopalakrishna Reddy Gogulamudi and Contributors
+# See license.txt
+
+import time
+import unittest
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from shiva_erp.master_cache import LRUCache
+
+
+class TestLRUCache(unittest.TestCase):
+	"""Test cases for the process-local cache tier"""
+
+	def test_evicts_least_recently_used(self):
+		cache = LRUCache(maxsize=2, ttl=60)
+		cache.set("a", 1)
+		cache.set("b", 2)
+		cache.get("a")
+		cache.set("c", 3)
+
+		self.assertEqual(cache.get("a"), (True, 1))
+		self.assertEqual(cache.get("b"), (False, None))
+		self.assertEqual(cache.get("c"), (True, 3))
+
+	def test_entries_expire(self):
+		cache = LRUCache(maxsize=2, ttl=0.01)
+		cache.set("a", 1)
+		time.sleep(0.02)
+
+		self.assertEqual(cache.get("a"), (False, None))
+
+	def test_delete_doctype(self):
+		cache = LRUCache()
+		cache.set(("Item", "A"), 1)
+		cache.set(("Customer", "A"), 2)
+		cache.delete_doctype("Item")
+
+		self.assertEqual(cache.get(("Item", "A")), (False, None))
+		self.assertEqual(cache.get(("Customer", "A")), (True, 2))
+
+
+class TestMasterCache(FrappeTestCase):
+	"""Test cases for cached master lookups"""
+
+	def setUp(self):
+		if not frappe.db.exists("Customer", "Test Shop A"):
+			frappe.get_doc(
+				{
+					"doctype": "Customer",
+					"customer_name": "Test Shop A",
+					"customer_type": "Company",
+					"territory": "All Territories",
+				}
+			).insert(ignore_if_duplicate=True)
+
+	def test_customer_save_invalidates_cache(self):
+		"""Test that saving a Customer drops its cached fields"""
+		from shiva_erp.master_cache import get_master_value
+
+		customer = frappe.get_doc("Customer", "Test Shop A")
+		self.assertEqual(get_master_value("Customer", customer.name, "territory"), customer.territory)
+
+		customer.customer_group = (
+			frappe.db.get_value("Customer Group", {"is_group": 0}) or customer.customer_group
+		)
+		customer.save()
+
+		# Invalidated once the save commits
+		frappe.db.after_commit.run()
+		self.assertEqual(
+			get_master_value("Customer", customer.name, "customer_group"), customer.customer_group
+		)
+
+	def test_missing_record(self):
+		"""Test that unknown records resolve to None"""
+		from shiva_erp.master_cache import get_master, get_party_account
+
+		self.assertIsNone(get_master("Customer", "Missing Shop XYZ"))
+		self.assertIsNone(get_party_account("Customer", "Missing Shop XYZ", "Any Company"))
+
+	def test_value_loaded_before_invalidation_not_cached(self):
+		"""Test that a value read before a change committed is not cached after its invalidation"""
+		from shiva_erp.master_cache import MASTER_CACHE_KEY, _get, clear_master_cache
+
+		clear_master_cache("Customer", "Test Shop A")
+
+		def load_then_change():
+			# The change commits (and invalidates) while this stale value is being loaded
+			clear_master_cache("Customer", "Test Shop A")
+			return {"territory": "Stale Territory"}
+
+		self.assertEqual(_get("Customer", "Test Shop A", load_then_change), {"territory": "Stale Territory"})
+		self.assertIsNone(frappe.cache().hget(MASTER_CACHE_KEY.format("Customer"), "Test Shop A"))
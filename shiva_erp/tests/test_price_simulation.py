@@ -0,0 +1,135 @@
+# Copyright (c) 2026, Gopalakrishna Reddy Gogulamudi and Contributors
+# See license.txt
+
+from unittest.mock import patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from frappe.utils import add_days, today
+
+
+class TestPriceSimulation(FrappeTestCase):
+	"""Test cases for the price change revenue simulation"""
+
+	def test_revenue_deltas(self):
+		"""Test shop and territory deltas over the shop x item matrix"""
+		from shiva_erp.bulk_pricing_utils import simulate_price_change_impact
+
+		prices = [
+			frappe._dict(item_code="Broiler", territory="North", base_price_per_kg=100),
+			frappe._dict(item_code="Broiler", territory="South", base_price_per_kg=120),
+		]
+		volumes = [
+			frappe._dict(shop="Shop A", territory="North", item_code="Broiler", weight_kg=10),
+			frappe._dict(shop="Shop B", territory="South", item_code="Broiler", weight_kg=5),
+			frappe._dict(shop="Shop C", territory="North", item_code="Broiler", weight_kg=4),
+		]
+		# Shop C's discount exceeds the new price too: effective price stays 0
+		discounts = [
+			frappe._dict(shop="Shop A", item_code="Broiler", discount_per_kg=10),
+			frappe._dict(shop="Shop C", item_code="Broiler", discount_per_kg=150),
+		]
+
+		with (
+			patch("frappe.db.sql", side_effect=[volumes, discounts]),
+			patch("shiva_erp.master_cache.get_territory_chain", side_effect=lambda territory: [territory]),
+		):
+			result = simulate_price_change_impact(prices, percentage_change=10)
+
+		shops = {row["shop"]: row for row in result["shops"]}
+		self.assertEqual(shops["Shop A"]["current"], 900)
+		self.assertEqual(shops["Shop A"]["delta"], 100)
+		self.assertEqual(shops["Shop B"]["delta"], 60)
+		self.assertEqual(shops["Shop C"]["delta"], 0)
+		self.assertEqual(result["shops"][0]["shop"], "Shop A")
+
+		territories = {row["territory"]: row for row in result["territories"]}
+		self.assertEqual(territories["North"]["shops"], 2)
+		self.assertEqual(territories["North"]["delta"], 100)
+		self.assertEqual(result["totals"]["delta"], 160)
+
+	def test_price_from_parent_territory(self):
+		"""Test that a shop in a territory without a price is simulated with its parent's price"""
+		from shiva_erp.bulk_pricing_utils import simulate_price_change_impact
+
+		prices = [
+			frappe._dict(item_code="Broiler", territory="North", base_price_per_kg=100),
+			frappe._dict(item_code="Broiler", territory="North City", base_price_per_kg=120),
+		]
+		volumes = [
+			frappe._dict(shop="Shop A", territory="North Village", item_code="Broiler", weight_kg=10),
+			frappe._dict(shop="Shop B", territory="North City", item_code="Broiler", weight_kg=5),
+		]
+		chains = {
+			"North Village": ["North Village", "North", "All Territories"],
+			"North City": ["North City", "North", "All Territories"],
+		}
+
+		with (
+			patch("frappe.db.sql", side_effect=[volumes, []]),
+			patch("shiva_erp.master_cache.get_territory_chain", side_effect=chains.get),
+		):
+			result = simulate_price_change_impact(prices, percentage_change=10)
+
+		shops = {row["shop"]: row for row in result["shops"]}
+		self.assertEqual(shops["Shop A"]["current"], 1000)
+		self.assertEqual(shops["Shop A"]["delta"], 100)
+		self.assertEqual(shops["Shop B"]["current"], 600)
+		self.assertEqual(shops["Shop B"]["delta"], 60)
+
+		territories = {row["territory"]: row for row in result["territories"]}
+		self.assertEqual(territories["North Village"]["shops"], 1)
+		self.assertEqual(territories["North Village"]["delta"], 100)
+
+	def test_no_sales(self):
+		"""Test that a change without recent sales projects no impact"""
+		from shiva_erp.bulk_pricing_utils import simulate_price_change_impact
+
+		result = simulate_price_change_impact([], percentage_change=10)
+
+		self.assertEqual(result["shops"], [])
+		self.assertEqual(result["totals"]["delta"], 0)
+
+	def test_preview_selects_real_price_records(self):
+		"""Test that the preview selects Item Price Type records by territory and item, skipping expired ones"""
+		from shiva_erp.bulk_pricing_utils import preview_price_update
+
+		if not frappe.db.exists("Item", "Test Broiler"):
+			frappe.get_doc(
+				{
+					"doctype": "Item",
+					"item_code": "Test Broiler",
+					"item_name": "Test Broiler Chicken",
+					"item_group": "Products",
+					"stock_uom": "Nos",
+				}
+			).insert(ignore_if_duplicate=True)
+
+		for valid_from, valid_till, base_price in (
+			(add_days(today(), -10), None, 150),
+			(add_days(today(), -60), add_days(today(), -11), 140),
+		):
+			frappe.get_doc(
+				{
+					"doctype": "Item Price Type",
+					"item_code": "Test Broiler",
+					"territory": "All Territories",
+					"base_price_per_kg": base_price,
+					"valid_from": valid_from,
+					"valid_till": valid_till,
+					"is_active": 1,
+				}
+			).insert()
+
+		result = preview_price_update(
+			territory="All Territories", item_codes="Test Broiler", percentage_change=10, simulate=1
+		)
+
+		self.assertEqual(len(result["items"]), 1)
+		self.assertEqual(result["items"][0]["old_price"], 150)
+		self.assertEqual(result["items"][0]["new_price"], 165)
+		self.assertIn("totals", result)
+
+	def tearDown(self):
+		"""Clean up test data"""
+		frappe.db.delete("Item Price Type", {"item_code": "Test Broiler"})
@@ -0,0 +1,138 @@
+# Copyright (c) 2026, Gopalakrishna Reddy Gogulamudi and Contributors
+# See license.txt
+
+from unittest.mock import patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+# Rows as returned by PRICING_DASHBOARD_QUERY
+AGGREGATE_ROWS = [
+	frappe._dict(
+		section="prices",
+		territory="North",
+		bucket=None,
+		records=2,
+		keys_count=2,
+		total=300,
+		minimum=140,
+		maximum=160,
+	),
+	frappe._dict(
+		section="discounts",
+		territory="North",
+		bucket=None,
+		records=3,
+		keys_count=2,
+		total=45,
+		minimum=10,
+		maximum=20,
+	),
+	frappe._dict(
+		section="changes",
+		territory=None,
+		bucket="0% to 5%",
+		records=4,
+		keys_count=None,
+		total=10,
+		minimum=1,
+		maximum=4,
+	),
+]
+
+
+class TestPricingDashboard(FrappeTestCase):
+	"""Test cases for the cached pricing dashboard"""
+
+	def setUp(self):
+		from shiva_erp.pricing_cache import clear_price_cache
+
+		clear_price_cache()
+		frappe.db.after_commit.run()
+
+	def test_sections(self):
+		"""Test that the aggregate rows are folded into dashboard sections"""
+		from shiva_erp.bulk_pricing_utils import PRICE_CHANGE_BUCKETS, get_pricing_dashboard_data
+
+		with patch("frappe.db.sql", return_value=AGGREGATE_ROWS), patch("frappe.get_all", return_value=[]):
+			data = get_pricing_dashboard_data()
+
+		self.assertEqual(data["total_base_prices"], 2)
+		self.assertEqual(data["total_shop_discounts"], 3)
+
+		north = data["territories"]["North"]
+		self.assertEqual(north["average_price"], 150)
+		self.assertEqual(north["average_discount"], 15)
+		self.assertEqual(north["discount_depth_pct"], 10)
+
+		distribution = {row["bucket"]: row for row in data["price_change_distribution"]}
+		self.assertEqual(len(distribution), len(PRICE_CHANGE_BUCKETS))
+		self.assertEqual(distribution["0% to 5%"]["count"], 4)
+		self.assertEqual(distribution["0% to 5%"]["average_change_pct"], 2.5)
+		self.assertEqual(distribution["No change"]["count"], 0)
+
+	def test_cached_per_price_version(self):
+		"""Test that the aggregate query runs once per price version"""
+		from shiva_erp.bulk_pricing_utils import get_pricing_dashboard_data
+		from shiva_erp.pricing_cache import clear_price_cache
+
+		with (
+			patch("frappe.db.sql", return_value=AGGREGATE_ROWS) as sql,
+			patch("frappe.get_all", return_value=[]),
+		):
+			get_pricing_dashboard_data()
+			get_pricing_dashboard_data()
+			self.assertEqual(sql.call_count, 1)
+
+			clear_price_cache()
+			frappe.db.after_commit.run()
+			get_pricing_dashboard_data()
+			self.assertEqual(sql.call_count, 2)
+
+	def test_distribution_from_price_history(self):
+		"""Test that logged base price changes are banded by change versus the previous value"""
+		from frappe.utils import getdate, today
+
+		from shiva_erp.bulk_pricing_utils import _build_pricing_dashboard
+		from shiva_erp.shiva_business_erp.doctype.price_history_entry.price_history_entry import (
+			record_price_history,
+		)
+
+		def counts():
+			data = _build_pricing_dashboard(0, getdate(today()))
+			return {row["bucket"]: row["count"] for row in data["price_change_distribution"]}
+
+		before = counts()
+		record_price_history(
+			[
+				{
+					"reference_doctype": "Item Price Type",
+					"reference_name": "Test Dashboard Price",
+					"field_name": "base_price_per_kg",
+					"value": value,
+					"previous_value": previous_value,
+				}
+				for value, previous_value in ((103, 100), (112, 100), (100, 100))
+			]
+			# Discount changes are not base price changes
+			+ [
+				{
+					"reference_doctype": "Shop Discount",
+					"reference_name": "Test Dashboard Discount",
+					"field_name": "discount_per_kg",
+					"value": 20,
+					"previous_value": 10,
+				}
+			]
+		)
+		after = counts()
+
+		self.assertEqual(after["0% to 5%"] - before["0% to 5%"], 1)
+		self.assertEqual(after["Above 10%"] - before["Above 10%"], 1)
+		self.assertEqual(after["No change"] - before["No change"], 1)
+
+	def tearDown(self):
+		frappe.db.delete(
+			"Price History Entry",
+			{"reference_name": ("in", ["Test Dashboard Price", "Test Dashboard Discount"])},
+		)
@@ -0,0 +1,89 @@
+# Copyright (c) 2026, Gopalakrishna Reddy Gogulamudi and Contributors
+# See license.txt
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+
+class TestPricingImport(FrappeTestCase):
+	"""Test cases for the streaming pricing sheet importer"""
+
+	def setUp(self):
+		"""Create test data"""
+		if not frappe.db.exists("Customer", "Test Shop A"):
+			frappe.get_doc(
+				{
+					"doctype": "Customer",
+					"customer_name": "Test Shop A",
+					"customer_type": "Company",
+					"territory": "All Territories",
+				}
+			).insert(ignore_if_duplicate=True)
+
+		if not frappe.db.exists("Item", "Test Broiler"):
+			frappe.get_doc(
+				{
+					"doctype": "Item",
+					"item_code": "Test Broiler",
+					"item_name": "Test Broiler Chicken",
+					"item_group": "Products",
+					"stock_uom": "Nos",
+				}
+			).insert(ignore_if_duplicate=True)
+
+	def test_validate_chunk(self):
+		"""Test that bad rows are rejected in memory with their sheet row number"""
+		from shiva_erp.pricing_import import map_columns, validate_chunk
+
+		columns = map_columns(
+			"Shop Discount", ["Shop", "Item Code", "Discount per Kg", "valid_from", "Notes"]
+		)
+		self.assertEqual(set(columns.values()), {"shop", "item_code", "discount_per_kg", "valid_from"})
+
+		chunk = [
+			(2, ["Test Shop A", "Test Broiler", "10", "2026-01-01", ""]),
+			(3, ["Test Shop A", "Test Broiler", "-5", "", ""]),
+			(4, ["Test Shop A", "No Such Item", "5", "", ""]),
+			(5, ["Test Shop A", "Test Broiler", "12", "2026-02-01", ""]),
+			(6, ["", "", "", "", ""]),
+		]
+
+		valid, errors = validate_chunk("Shop Discount", columns, chunk)
+
+		self.assertEqual([row.idx for row in valid], [2])
+		self.assertEqual([error[0] for error in errors], [3, 4, 5])
+		self.assertIn("negative", errors[0][2])
+		self.assertIn("No Such Item", errors[1][2])
+
+	def test_import_csv(self):
+		"""Test that a CSV sheet is bulk inserted and failed rows go to the error file"""
+		from shiva_erp.pricing_import import import_pricing_sheet
+
+		file_doc = frappe.get_doc(
+			{
+				"doctype": "File",
+				"file_name": "test_item_prices.csv",
+				"content": "Item Code,Territory,Base Price per Kg\n"
+				"Test Broiler,All Territories,150\n"
+				"Test Broiler,No Such Territory,140\n",
+				"is_private": 1,
+			}
+		).insert()
+
+		result = import_pricing_sheet("Item Price Type", file_doc.file_url)
+
+		self.assertEqual(result["imported"], 1)
+		self.assertEqual(result["failed"], 1)
+		self.assertTrue(result["error_file"])
+
+		price = frappe.get_doc(
+			"Item Price Type", {"item_code": "Test Broiler", "territory": "All Territories"}
+		)
+		self.assertEqual(price.base_price_per_kg, 150)
+		self.assertEqual(price.item_name, "Test Broiler Chicken")
+		self.assertEqual(price.is_active, 1)
+
+	def tearDown(self):
+		"""Clean up test data"""
+		frappe.db.delete("Item Price Type", {"item_code": "Test Broiler"})
+		frappe.db.delete("Shop Discount", {"shop": "Test Shop A"})
@@ -0,0 +1,54 @@
+# Copyright (c) 2026, Gopalakrishna Reddy Gogulamudi and Contributors
+# See license.txt
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from shiva_erp.shiva_business_erp.doctype.item_price_type import item_price_type
+from shiva_erp.shiva_business_erp.doctype.shop_discount import shop_discount
+
+
+class TestPricingIndexes(FrappeTestCase):
+	"""
+	Regression tests for the covering indexes of the as-of pricing lookups
+
+	The indexes are checked with SHOW INDEX rather than EXPLAIN: on a small
+	test table the optimizer may prefer a full scan, so query plans are not
+	stable enough to assert on.
+	"""
+
+	def setUp(self):
+		"""Make sure the indexes exist"""
+		item_price_type.on_doctype_update()
+		shop_discount.on_doctype_update()
+
+	def get_index_columns(self, doctype, index_name):
+		rows = frappe.db.sql(
+			f"SHOW INDEX FROM `tab{doctype}` WHERE Key_name = %(index_name)s",
+			{"index_name": index_name},
+			as_dict=True,
+		)
+		return [row.Column_name for row in sorted(rows, key=lambda row: row.Seq_in_index)]
+
+	def test_base_price_lookup_index(self):
+		"""get_base_price's filters, ORDER BY and selected columns are all in the index"""
+		self.assertEqual(
+			self.get_index_columns("Item Price Type", "item_territory_validity_index"),
+			[
+				"item_code",
+				"territory",
+				"is_active",
+				"valid_from",
+				"valid_till",
+				"modified",
+				"base_price_per_kg",
+				"currency",
+			],
+		)
+
+	def test_shop_discount_lookup_index(self):
+		"""get_shop_discount's filters and selected columns are all in the index"""
+		self.assertEqual(
+			self.get_index_columns("Shop Discount", "shop_item_validity_index"),
+			["shop", "item_code", "is_active", "valid_from", "valid_till", "discount_per_kg"],
+		)
@@ -0,0 +1,89 @@
+# Copyright (c) 2026, Gopalakrishna Reddy Gogulamudi and Contributors
+# See license.txt
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from frappe.utils import add_days, today
+
+from shiva_erp.pricing_validation import find_overlaps, validate_bulk_overlaps
+
+
+class TestPricingValidation(FrappeTestCase):
+	"""Test cases for validity overlap checks"""
+
+	def test_find_overlaps_in_memory(self):
+		"""Test the sorted sweep over a batch"""
+		keys = ("shop", "item_code")
+		rows = [
+			{"idx": 1, "shop": "A", "item_code": "X", "valid_from": "2026-01-01", "valid_till": "2026-01-31"},
+			{"idx": 2, "shop": "A", "item_code": "X", "valid_from": "2026-02-01", "valid_till": "2026-02-28"},
+			{"idx": 3, "shop": "A", "item_code": "X", "valid_from": "2026-01-15", "valid_till": "2026-01-20"},
+			{"idx": 4, "shop": "B", "item_code": "X", "valid_from": "2026-01-15", "valid_till": "2026-01-20"},
+		]
+
+		overlaps = find_overlaps(rows, keys)
+
+		self.assertEqual([(row["idx"], other["idx"]) for row, other in overlaps], [(3, 1)])
+
+	def test_open_ended_rows_overlap(self):
+		"""Test that missing dates are treated as open-ended"""
+		keys = ("item_code", "territory")
+		rows = [
+			{"idx": 1, "item_code": "X", "territory": "T", "valid_from": "2026-03-01"},
+			{"idx": 2, "item_code": "X", "territory": "T", "valid_till": "2026-02-28"},
+			{"idx": 3, "item_code": "X", "territory": "T", "valid_till": "2026-03-05"},
+			{"idx": 4, "item_code": "X", "territory": "T", "valid_from": "2026-04-01", "is_active": 0},
+		]
+
+		overlaps = find_overlaps(rows, keys)
+
+		self.assertEqual(sorted((row["idx"], other["idx"]) for row, other in overlaps), [(1, 3), (3, 2)])
+
+	def test_bulk_validation_against_existing(self):
+		"""Test that batch rows are checked against saved records"""
+		if not frappe.db.exists("Item", "Test Broiler"):
+			frappe.get_doc(
+				{
+					"doctype": "Item",
+					"item_code": "Test Broiler",
+					"item_name": "Test Broiler Chicken",
+					"item_group": "Products",
+					"stock_uom": "Nos",
+				}
+			).insert(ignore_if_duplicate=True)
+
+		existing = frappe.get_doc(
+			{
+				"doctype": "Item Price Type",
+				"item_code": "Test Broiler",
+				"territory": "All Territories",
+				"base_price_per_kg": 150.00,
+				"valid_from": today(),
+				"valid_till": add_days(today(), 10),
+				"is_active": 1,
+			}
+		).insert()
+
+		errors = validate_bulk_overlaps(
+			"Item Price Type",
+			[
+				{
+					"item_code": "Test Broiler",
+					"territory": "All Territories",
+					"valid_from": add_days(today(), 5),
+				},
+				{
+					"item_code": "Test Broiler",
+					"territory": "All Territories",
+					"valid_till": add_days(today(), -1),
+				},
+			],
+		)
+
+		self.assertEqual(len(errors), 1)
+		self.assertEqual(errors[0]["idx"], 1)
+		self.assertIn(existing.name, errors[0]["message"])
+
+	def tearDown(self):
+		"""Clean up test data"""
+		frappe.db.delete("Item Price Type", {"item_code": "Test Broiler"})
@@ -0,0 +1,195 @@
+# Copyright (c) 2026, Gopalakrishna Reddy Gogulamudi and Contributors
+# See license.txt
+
+from unittest.mock import patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from frappe.utils import cint
+
+from shiva_erp import report_cache
+
+BUILDER = "shiva_erp.tests.test_report_cache.build_test_report"
+INCREMENTAL_BUILDER = "shiva_erp.tests.test_report_cache.build_incremental_test_report"
+REFRESH = "shiva_erp.tests.test_report_cache.refresh_test_report"
+COLUMNS = [{"fieldname": "item_code", "label": "Item Code"}]
+
+builds = []
+
+
+def build_test_report(filters):
+	builds.append(filters)
+	return COLUMNS, [{"item_code": "Broiler"}]
+
+
+def build_incremental_test_report(filters):
+	builds.append(filters)
+	return {"result": [COLUMNS, [{"item_code": "Broiler"}]], "state": {"rows": 1}}
+
+
+def refresh_test_report(filters, cached, changes):
+	rows = cached["state"]["rows"] + len(changes["Stock Weight Ledger"].inserted)
+	return {"result": [COLUMNS, [{"item_code": "Broiler"}] * rows], "state": {"rows": rows}}
+
+
+class TestReportCache(FrappeTestCase):
+	"""Test cases for the watermarked report result cache"""
+
+	filters = frappe._dict(from_date="2026-10-01", to_date="2026-10-31")
+
+	def setUp(self):
+		builds.clear()
+		frappe.cache().delete_value(report_cache.get_cache_key("Test Report", self.filters))
+		frappe.cache().delete_value(report_cache.DELETION_LOG_KEY.format("Test Source"))
+
+	def test_cache_key_normalizes_filters(self):
+		"""Test that filter order and empty filters do not change the key"""
+		self.assertEqual(
+			report_cache.get_cache_key("Test Report", {"to_date": "2026-10-31", "from_date": "2026-10-01"}),
+			report_cache.get_cache_key(
+				"Test Report", {"from_date": "2026-10-01", "to_date": "2026-10-31", "item_code": ""}
+			),
+		)
+
+	def test_served_until_watermark_changes(self):
+		"""Test that the result is rebuilt only after new postings"""
+		watermarks = [{"Stock Weight Ledger": [10, "2026-10-19 10:00:00"]}] * 2 + [
+			{"Stock Weight Ledger": [11, "2026-10-19 11:00:00"]}
+		]
+
+		counters = [{"Stock Weight Ledger": i} for i in range(3)]
+
+		with (
+			patch.object(report_cache, "get_change_counters", side_effect=counters),
+			patch.object(report_cache, "get_watermark", side_effect=watermarks),
+		):
+			for _i in range(3):
+				result = report_cache.get_cached_report(
+					"Test Report", self.filters, BUILDER, ("Stock Weight Ledger",), COLUMNS
+				)
+
+		self.assertEqual(len(builds), 2)
+		self.assertEqual(result[1], [{"item_code": "Broiler"}])
+
+	def test_served_from_change_counters(self):
+		"""Test that the watermark is not read while the change counters are unchanged"""
+		with patch.object(
+			report_cache,
+			"get_watermark",
+			return_value={"Stock Weight Ledger": [10, "2026-10-19 10:00:00", 0]},
+		) as get_watermark:
+			for _i in range(3):
+				report_cache.get_cached_report(
+					"Test Report", self.filters, BUILDER, ("Stock Weight Ledger",), COLUMNS
+				)
+
+			self.assertEqual(get_watermark.call_count, 1)
+
+			# A committed write moves the counter
+			report_cache.mark_source_changed("Stock Weight Ledger")
+			frappe.db.after_commit.run()
+			report_cache.get_cached_report(
+				"Test Report", self.filters, BUILDER, ("Stock Weight Ledger",), COLUMNS
+			)
+
+		self.assertEqual(get_watermark.call_count, 2)
+		# The watermark itself did not move, so the result was not rebuilt
+		self.assertEqual(len(builds), 1)
+
+	def test_refreshed_incrementally(self):
+		"""Test that changed rows are folded into the cached result instead of rebuilding"""
+		watermarks = [
+			{"Stock Weight Ledger": [10, "2026-10-19 10:00:00", 0]},
+			{"Stock Weight Ledger": [11, "2026-10-19 11:00:00", 0]},
+			{"Stock Weight Ledger": [12, "2026-10-19 12:00:00", 0]},
+		]
+		changes = [
+			{"Stock Weight Ledger": frappe._dict(inserted=[{"name": "SWL-11"}], deleted=[])},
+			None,
+		]
+
+		with (
+			patch.object(
+				report_cache,
+				"get_change_counters",
+				side_effect=[{"Stock Weight Ledger": i} for i in range(3)],
+			),
+			patch.object(report_cache, "get_watermark", side_effect=watermarks),
+			patch.object(report_cache, "get_changes", side_effect=changes),
+		):
+			results = [
+				report_cache.get_cached_report(
+					"Test Report",
+					self.filters,
+					INCREMENTAL_BUILDER,
+					("Stock Weight Ledger",),
+					COLUMNS,
+					refresh=REFRESH,
+				)
+				for _i in range(3)
+			]
+
+		# Built, refreshed, then rebuilt once the changes could not be accounted for
+		self.assertEqual(len(builds), 2)
+		self.assertEqual([len(result[1]) for result in results], [1, 2, 1])
+
+	def test_deletion_log(self):
+		"""Test that logged deletions are returned only while the log covers the range"""
+		report_cache._append_deletions("Test Source", [{"name": "SWL-1", "modified": "2026-10-19 10:00:00"}])
+		report_cache._append_deletions("Test Source", [{"name": "SWL-2", "modified": "2026-10-19 10:00:00"}])
+		seq = cint(
+			frappe.cache().get(frappe.cache().make_key(report_cache.DELETION_SEQ_KEY.format("Test Source")))
+		)
+
+		deleted = report_cache.get_deleted_rows("Test Source", seq - 2, seq)
+		self.assertEqual([row.name for row in deleted], ["SWL-1", "SWL-2"])
+		self.assertEqual(len(report_cache.get_deleted_rows("Test Source", seq - 1, seq)), 1)
+
+		# An entry not (or no longer) in the log
+		self.assertIsNone(report_cache.get_deleted_rows("Test Source", seq - 2, seq + 1))
+
+	def test_changes(self):
+		"""Test that inserted rows are returned and edited rows force a rebuild, even at the same count"""
+		old = {"Stock Weight Ledger": [10, "2026-10-19 10:00:00", 0]}
+		inserted = frappe._dict(name="SWL-11", creation="2026-10-19 10:30:00", modified="2026-10-19 10:30:00")
+		edited = frappe._dict(name="SWL-5", creation="2026-10-19 09:00:00", modified="2026-10-19 10:45:00")
+
+		with patch.object(report_cache, "get_deleted_rows", return_value=[]):
+			with patch("frappe.db.sql", return_value=[inserted]):
+				changes = report_cache.get_changes(
+					("Stock Weight Ledger",), old, {"Stock Weight Ledger": [11, "2026-10-19 10:30:00", 0]}
+				)
+			self.assertEqual(changes["Stock Weight Ledger"].inserted, [inserted])
+
+			# Same count, later modified: an edit
+			with patch("frappe.db.sql", return_value=[edited]) as sql:
+				changes = report_cache.get_changes(
+					("Stock Weight Ledger",), old, {"Stock Weight Ledger": [10, "2026-10-19 10:45:00", 0]}
+				)
+			sql.assert_called_once()
+			self.assertIsNone(changes)
+
+			# An insert alongside an edit
+			with patch("frappe.db.sql", return_value=[inserted, edited]):
+				changes = report_cache.get_changes(
+					("Stock Weight Ledger",), old, {"Stock Weight Ledger": [11, "2026-10-19 10:45:00", 0]}
+				)
+			self.assertIsNone(changes)
+
+	def test_large_range_prepared_in_background(self):
+		"""Test that large ranges are queued and an empty report is returned meanwhile"""
+		with patch("frappe.enqueue") as enqueue:
+			result = report_cache.get_cached_report(
+				"Test Report", self.filters, BUILDER, ("Stock Weight Ledger",), COLUMNS, background=True
+			)
+
+		enqueue.assert_called_once()
+		self.assertEqual(builds, [])
+		self.assertEqual(result[0], COLUMNS)
+		self.assertEqual(result[1], [])
+		self.assertTrue(result[2])
+
+	def test_is_large_range(self):
+		self.assertFalse(report_cache.is_large_range(self.filters))
+		self.assertTrue(report_cache.is_large_range({"from_date": "2026-01-01", "to_date": "2026-10-31"}))
+		self.assertTrue(report_cache.is_large_range({}))
@@ -3,7 +3,7 @@
 
 import frappe
 from frappe.tests.utils import FrappeTestCase
-from frappe.utils import today
+from frappe.utils import getdate, today
 
 
 class TestSalesIntegration(FrappeTestCase):
@@ -148,6 +148,186 @@ class TestSalesIntegration(FrappeTestCase):
 		# Should return 0 when no base price
 		self.assertEqual(price_data.get("effective_price_per_kg"), 0.00)
 
+	def test_batch_item_pricing(self):
+		"""Test that the batch endpoint prices every row in one call"""
+		if not frappe.db.exists(
+			"Item Price Type", {"item_code": "Test Broiler", "territory": "All Territories", "is_active": 1}
+		):
+			frappe.get_doc(
+				{
+					"doctype": "Item Price Type",
+					"item_code": "Test Broiler",
+					"territory": "All Territories",
+					"base_price_per_kg": 150.00,
+					"is_active": 1,
+				}
+			).insert(ignore_permissions=True)
+
+		from shiva_erp.sales_integration import get_item_pricing, get_items_pricing
+
+		result = get_items_pricing(
+			customer="Test Shop A",
+			posting_date=today(),
+			items=frappe.as_json(
+				[
+					{"row_id": "row-1", "item_code": "Test Broiler", "weight_kg": 10},
+					{"row_id": "row-2", "item_code": "Test Broiler", "weight_kg": 2.5},
+					{"row_id": "row-3", "item_code": None, "weight_kg": 5},
+				]
+			),
+		)
+
+		self.assertEqual(set(result), {"row-1", "row-2"})
+		self.assertEqual(result["row-1"]["effective_price"], 140.00)
+		self.assertEqual(result["row-1"]["amount"], 1400.00)
+		self.assertEqual(result["row-2"]["amount"], 350.00)
+		self.assertEqual(
+			result["row-1"], get_item_pricing("Test Shop A", "Test Broiler", today(), weight_kg=10)
+		)
+
+	def test_price_book(self):
+		"""Test that the shop price book matches per-item pricing and tracks the price version"""
+		if not frappe.db.exists(
+			"Item Price Type", {"item_code": "Test Broiler", "territory": "All Territories", "is_active": 1}
+		):
+			frappe.get_doc(
+				{
+					"doctype": "Item Price Type",
+					"item_code": "Test Broiler",
+					"territory": "All Territories",
+					"base_price_per_kg": 150.00,
+					"is_active": 1,
+				}
+			).insert(ignore_permissions=True)
+
+		from shiva_erp.pricing_cache import clear_price_cache
+		from shiva_erp.sales_integration import get_item_pricing, get_price_book, get_price_version
+
+		book = get_price_book("Test Shop A", today())
+		pricing = get_item_pricing("Test Shop A", "Test Broiler", today())
+
+		self.assertEqual(book["version"], get_price_version())
+		self.assertEqual(
+			book["prices"]["Test Broiler"],
+			[pricing["base_price"], pricing["discount"], pricing["effective_price"]],
+		)
+
+		# Cleared once the change commits
+		clear_price_cache()
+		self.assertEqual(get_price_version(), book["version"])
+		frappe.db.after_commit.run()
+		self.assertGreater(get_price_version(), book["version"])
+		self.assertEqual(get_price_book("Test Shop A", today())["version"], get_price_version())
+
+	def test_stale_price_book_not_served(self):
+		"""Test that a book tagged with an older price version is rebuilt and never cached"""
+		from unittest.mock import patch
+
+		from shiva_erp import pricing_cache
+
+		key = f"Test Shop A|{getdate(today())}"
+		version = pricing_cache.get_price_version()
+
+		# A book cached by a build that read prices before a change committed
+		frappe.cache().hset(pricing_cache.PRICE_BOOK_CACHE_KEY, key, {"version": version - 1, "prices": {}})
+		self.assertEqual(pricing_cache.get_price_book("Test Shop A", today())["version"], version)
+
+		# A build that raced a change is returned but not cached
+		frappe.cache().hdel(pricing_cache.PRICE_BOOK_CACHE_KEY, key)
+		with patch.object(
+			pricing_cache, "_build_price_book", return_value={"version": version - 1, "prices": {}}
+		):
+			pricing_cache.get_price_book("Test Shop A", today())
+
+		self.assertIsNone(frappe.cache().hget(pricing_cache.PRICE_BOOK_CACHE_KEY, key))
+
+	def test_lookup_racing_a_price_change_not_cached(self):
+		"""Test that a price read before a change committed is returned but not cached after the clear"""
+		from unittest.mock import patch
+
+		from shiva_erp import pricing_cache
+
+		key = f"Test Broiler|Test Territory|{getdate(today())}"
+		frappe.cache().hdel(pricing_cache.BASE_PRICE_CACHE_KEY, key)
+
+		def read_then_change(*args):
+			# The change commits and clears the cache while the old price is being read
+			pricing_cache._clear_price_cache()
+			return {"base_price_per_kg": 140.00}
+
+		with patch(
+			"shiva_erp.shiva_business_erp.doctype.item_price_type.item_price_type.get_base_price",
+			side_effect=read_then_change,
+		):
+			price = pricing_cache.get_cached_base_price("Test Broiler", "Test Territory", today())
+
+		self.assertEqual(price["base_price_per_kg"], 140.00)
+		self.assertIsNone(frappe.cache().hget(pricing_cache.BASE_PRICE_CACHE_KEY, key))
+
+	def test_pricing_fingerprint_skips_repricing(self):
+		"""Test that an unchanged invoice is not priced twice"""
+		from unittest.mock import patch
+
+		from shiva_erp.sales_integration import apply_shop_pricing
+
+		doc = frappe.get_doc(
+			{
+				"doctype": "Sales Invoice",
+				"customer": "Test Shop A",
+				"posting_date": today(),
+				"items": [{"item_code": "Test Broiler", "qty": 1, "custom_total_weight_kg": 10}],
+			}
+		)
+
+		apply_shop_pricing(doc)
+		self.assertTrue(doc.custom_pricing_fingerprint)
+
+		with patch(
+			"shiva_erp.pricing_cache.get_cached_base_price", return_value={"base_price_per_kg": 150.00}
+		) as lookup:
+			apply_shop_pricing(doc)
+			lookup.assert_not_called()
+
+			doc.items[0].custom_total_weight_kg = 12
+			apply_shop_pricing(doc)
+			lookup.assert_called_once()
+
+			apply_shop_pricing(doc, force=True)
+			self.assertEqual(lookup.call_count, 2)
+
+	def test_structured_pricing_result(self):
+		"""Test that pricing returns rows and warnings instead of one message per row"""
+		from unittest.mock import patch
+
+		from shiva_erp.sales_integration import apply_shop_pricing
+
+		doc = frappe.get_doc(
+			{
+				"doctype": "Sales Invoice",
+				"customer": "Test Shop A",
+				"posting_date": today(),
+				"items": [
+					{"item_code": "Test Broiler", "qty": 1, "custom_total_weight_kg": 10},
+					{"item_code": "Test Item No Price", "qty": 1, "custom_total_weight_kg": 5},
+				],
+			}
+		)
+		for idx, item in enumerate(doc.items, 1):
+			item.idx = idx
+
+		def base_price(item_code, territory, posting_date):
+			return {"base_price_per_kg": 150.00} if item_code == "Test Broiler" else None
+
+		messages = len(frappe.local.message_log)
+		with patch("shiva_erp.pricing_cache.get_cached_base_price", side_effect=base_price):
+			result = apply_shop_pricing(doc, quiet=True)
+
+		self.assertEqual(len(frappe.local.message_log), messages)
+		self.assertEqual([row["idx"] for row in result.rows], [1])
+		self.assertEqual(result.rows[0]["amount"], 1400.00)
+		self.assertEqual([warning["idx"] for warning in result.warnings], [2])
+		self.assertFalse(result.errors)
+
 	def tearDown(self):
 		"""Clean up test data"""
 		frappe.db.delete("Shop Discount", {"shop": "Test Shop A"})
@@ -0,0 +1,42 @@
+# Copyright (c) 2026, Gopalakrishna Reddy Gogulamudi and Contributors
+# See license.txt
+
+from unittest.mock import patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from shiva_erp.shiva_business_erp.report.shop_sales_analysis import shop_sales_analysis
+
+
+class TestShopSalesAnalysis(FrappeTestCase):
+	"""Test cases for the Shop Sales Analysis report"""
+
+	def test_rolls_up_daily_facts(self):
+		"""Test that the report reads the daily facts instead of the invoice items"""
+		filters = frappe._dict(territory="Guntur", from_date="2026-01-01", to_date="2026-10-31")
+		facts = [
+			frappe._dict(
+				customer="Shop A",
+				territory="Guntur",
+				item_code="Broiler",
+				total_qty=120,
+				total_weight_kg=250,
+				avg_price_per_kg=200,
+				total_discount=500,
+				total_revenue=50000,
+				invoice_count=12,
+			)
+		]
+
+		with (
+			patch("frappe.db.sql", return_value=facts) as sql,
+			patch("shiva_erp.master_cache.get_master_value", return_value="Sri Balaji Chicken Centre"),
+		):
+			data = shop_sales_analysis.get_data(filters)
+
+		query, params = sql.call_args[0]
+		self.assertIn("`tabDaily Sales Fact`", query)
+		self.assertNotIn("`tabSales Invoice Item`", query)
+		self.assertEqual(params["territory"], "Guntur")
+		self.assertEqual(data[0].customer_name, "Sri Balaji Chicken Centre")
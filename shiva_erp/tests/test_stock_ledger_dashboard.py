@@ -0,0 +1,64 @@
+# Copyright (c) 2026, Gopalakrishna Reddy Gogulamudi and Contributors
+# See license.txt
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from shiva_erp.shiva_business_erp.page.stock_ledger_dashboard import stock_ledger_dashboard as dashboard
+from shiva_erp.tests.test_stock_weight_ledger_report import ledger_row
+
+
+class TestStockLedgerDashboard(FrappeTestCase):
+	"""Test cases for the incrementally refreshed stock ledger dashboard"""
+
+	filters = frappe._dict(from_date="2026-10-01", to_date="2026-10-31")
+
+	def setUp(self):
+		self.rows = [
+			ledger_row("2026-10-02", "IN", 50, 100, 15000, creation="2026-10-02 09:00:00"),
+			ledger_row("2026-10-03", "OUT", 20, 40, 6000, creation="2026-10-03 09:00:00"),
+		]
+
+		state = {
+			"opening": {"weight": 200.0, "value": 30000.0},
+			"dates": {},
+			"items": {},
+			"warehouses": {},
+			"recent": list(self.rows),
+		}
+		for row in self.rows:
+			dashboard.fold_row(state, row)
+		state["warehouses"]["Stores"].update(balance_weight=260.0, balance_value=39000.0)
+
+		self.cached = {"result": dashboard.render_dashboard(state), "state": state}
+
+	def refresh(self, inserted=(), deleted=()):
+		changes = {"Stock Weight Ledger": frappe._dict(inserted=list(inserted), deleted=list(deleted))}
+		return dashboard.refresh_dashboard(self.filters, self.cached, changes)
+
+	def test_new_rows_folded_in(self):
+		"""Test that a posting updates totals, charts, warehouse balance and recent transactions"""
+		row = ledger_row("2026-10-04", "OUT", 10, 20, 3000, creation="2026-10-19 09:00:00")
+		result = self.refresh(inserted=[row])["result"]
+
+		self.assertEqual(result["summary"]["total_transactions"], 3)
+		self.assertEqual(result["summary"]["closing_weight"], 240)
+		self.assertEqual(result["chart_data"]["balance_trend"]["labels"][-1], "2026-10-04")
+		self.assertEqual(result["details"]["warehouse_summary"][0]["balance_weight"], 240)
+		self.assertEqual(result["details"]["recent_transactions"][0].name, row.name)
+
+	def test_opening_rows_folded_in(self):
+		"""Test that a posting before from_date moves the opening, not the period totals"""
+		row = ledger_row("2026-09-30", "IN", 10, 20, 3000, creation="2026-10-19 09:00:00")
+		result = self.refresh(inserted=[row])["result"]
+
+		self.assertEqual(result["summary"]["opening_weight"], 220)
+		self.assertEqual(result["summary"]["total_transactions"], 2)
+		self.assertEqual(result["details"]["warehouse_summary"][0]["balance_weight"], 280)
+
+	def test_rebuild_needed(self):
+		"""Test that a new warehouse or a cancelled recent transaction asks for a rebuild"""
+		self.assertIsNone(
+			self.refresh(inserted=[ledger_row("2026-10-04", "IN", 10, 20, 3000, warehouse="Shop 1")])
+		)
+		self.assertIsNone(self.refresh(deleted=[self.rows[1]]))
@@ -0,0 +1,231 @@
+# Copyright (c) 2026, Gopalakrishna Reddy Gogulamudi and Contributors
+# See license.txt
+
+from unittest.mock import patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from shiva_erp.shiva_business_erp.report.stock_weight_ledger_detailed import (
+	stock_weight_ledger_detailed as report,
+)
+
+
+def ledger_row(posting_date, transaction_type, qty, weight, value, batch_no=None, **kwargs):
+	factor = 1 if transaction_type == "IN" else -1
+	return frappe._dict(
+		name=kwargs.get("name") or f"SWL-{posting_date}-{transaction_type}-{qty}",
+		posting_date=posting_date,
+		transaction_type=transaction_type,
+		item_code=kwargs.get("item_code", "Broiler"),
+		warehouse=kwargs.get("warehouse", "Stores"),
+		batch_no=batch_no,
+		stock_qty=qty,
+		weight_kg=weight,
+		qty_change=qty * factor,
+		weight_change=weight * factor,
+		value_amount=value,
+		creation=kwargs.get("creation"),
+	)
+
+
+class TestStockWeightLedgerReport(FrappeTestCase):
+	"""Test cases for the Stock Weight Ledger Detailed report"""
+
+	filters = frappe._dict(from_date="2026-10-01", to_date="2026-10-31")
+
+	def test_openings_in_one_query(self):
+		"""Test that all openings come from one grouped query up to the report's from_date"""
+		openings = [
+			frappe._dict(
+				item_code="Broiler",
+				warehouse="Stores",
+				batch_no="",
+				opening_qty=100,
+				opening_weight=200,
+				opening_value=30000,
+			),
+			frappe._dict(
+				item_code="Broiler",
+				warehouse="Stores",
+				batch_no="B-1",
+				opening_qty=10,
+				opening_weight=20,
+				opening_value=3000,
+			),
+		]
+
+		with patch("frappe.db.sql", return_value=openings) as sql:
+			result = report.get_opening_balances(self.filters)
+
+		self.assertEqual(sql.call_count, 1)
+		self.assertEqual(sql.call_args[0][1]["from_date"], "2026-10-01")
+		self.assertEqual(result["Broiler|Stores|"]["qty"], 100)
+		self.assertEqual(result["Broiler|Stores|B-1"]["value"], 3000)
+
+	def test_running_balance_from_openings(self):
+		"""Test that running balances start from the grouped openings"""
+		entries = [
+			ledger_row("2026-10-02", "IN", 50, 100, 15000),
+			ledger_row("2026-10-03", "OUT", 20, 40, 6000),
+			ledger_row("2026-10-03", "IN", 5, 10, 1500, batch_no="B-2"),
+		]
+		openings = {"Broiler|Stores|": {"qty": 100.0, "weight": 200.0, "value": 30000.0}}
+
+		data = report.calculate_running_balance(entries, openings)
+
+		self.assertEqual([row.balance_qty for row in data], [150, 130, 5])
+		self.assertEqual(data[1].balance_value, 39000)
+		# The openings themselves are not mutated
+		self.assertEqual(openings["Broiler|Stores|"]["qty"], 100)
+
+	def test_window_function_mode(self):
+		"""Test that the database mode computes balances and openings in one windowed query"""
+		rows = [ledger_row("2026-10-02", "IN", 50, 100, 15000)]
+		rows[0].update(balance_qty=150, balance_weight=300, balance_value=45000)
+
+		filters = frappe._dict(self.filters, balance_engine="Database")
+		with (
+			patch("frappe.db.sql", return_value=rows) as sql,
+			patch("shiva_erp.master_cache.get_master_value", return_value="Broiler Chicken"),
+		):
+			data = report.get_data(filters)
+
+		self.assertEqual(sql.call_count, 1)
+		query = sql.call_args[0][0]
+		self.assertIn("OVER (", query)
+		self.assertIn("LEFT JOIN", query)
+		self.assertEqual(data[0].balance_qty, 150)
+		self.assertEqual(data[0].item_name, "Broiler Chicken")
+
+	def test_python_fallback(self):
+		"""Test that engines without window functions replay balances in Python"""
+		filters = frappe._dict(self.filters, balance_engine="Auto")
+
+		with (
+			patch.object(report, "supports_window_functions", return_value=False),
+			patch("shiva_erp.master_cache.get_master_value", return_value="Broiler Chicken"),
+			patch("frappe.db.sql", side_effect=[[ledger_row("2026-10-02", "IN", 50, 100, 15000)], []]) as sql,
+		):
+			data = report.get_data(filters)
+
+		self.assertNotIn("OVER (", sql.call_args_list[0][0][0])
+		self.assertEqual(data[0].balance_qty, 50)
+
+	def test_keyset_pages_carry_balances(self):
+		"""Test that the cursor continues running balances on the next page"""
+		openings = [
+			frappe._dict(
+				item_code="Broiler",
+				warehouse="Stores",
+				batch_no="",
+				opening_qty=100,
+				opening_weight=200,
+				opening_value=0,
+			)
+		]
+		first_page = [
+			ledger_row("2026-10-02", "IN", 50, 100, 0, creation="2026-10-02 09:00:00"),
+			ledger_row("2026-10-02", "OUT", 20, 40, 0, creation="2026-10-02 10:00:00"),
+		]
+		second_page = [ledger_row("2026-10-03", "OUT", 30, 60, 0, creation="2026-10-03 09:00:00")]
+
+		with (
+			patch("frappe.db.sql", side_effect=[openings, first_page, second_page]) as sql,
+			patch("shiva_erp.master_cache.get_master_value", return_value="Broiler Chicken"),
+		):
+			page = report.get_ledger_page(self.filters, page_size=2)
+			self.assertEqual([row.balance_qty for row in page["rows"]], [150, 130])
+			self.assertEqual(page["cursor"]["name"], first_page[-1].name)
+
+			page = report.get_ledger_page(self.filters, cursor=frappe.as_json(page["cursor"]), page_size=2)
+
+		self.assertEqual(page["rows"][0].balance_qty, 100)
+		self.assertIsNone(page["cursor"])
+		self.assertEqual(sql.call_args[0][1]["cursor_name"], first_page[-1].name)
+
+	def test_summary_from_totals(self):
+		"""Test that summary cards and chart come from aggregates, not report rows"""
+		totals = frappe._dict(
+			transactions=3,
+			in_transactions=1,
+			out_transactions=2,
+			in_qty=50,
+			in_weight=100,
+			out_qty=50,
+			out_weight=100,
+			items=1,
+			warehouses=1,
+			batches=0,
+			opening_qty=100,
+			opening_weight=200,
+		)
+
+		summary = {card["label"]: card["value"] for card in report.get_summary(totals, self.filters)}
+		self.assertEqual(summary["Closing Qty (Nos)"], 100)
+		self.assertEqual(summary["Avg Weight/Bird (Kg)"], 2)
+
+		per_date = {
+			"2026-10-02": {"in_qty": 50, "out_qty": 20, "net_qty": 30, "transactions": 2},
+			"2026-10-03": {"in_qty": 0, "out_qty": 30, "net_qty": -30, "transactions": 1},
+		}
+		chart = report.build_chart(per_date, totals.opening_qty)
+
+		self.assertEqual(chart["data"]["datasets"][2]["values"], [130, 100])
+
+	def test_incremental_refresh(self):
+		"""Test that new and cancelled rows are folded into a cached result"""
+		openings = {"Broiler|Stores|": {"qty": 100.0, "weight": 200.0, "value": 0.0}}
+		rows = [
+			ledger_row("2026-10-02", "IN", 50, 100, 0, creation="2026-10-02 09:00:00"),
+			ledger_row("2026-10-03", "OUT", 20, 40, 0, creation="2026-10-03 09:00:00"),
+			ledger_row("2026-10-03", "IN", 5, 10, 0, batch_no="B-2", creation="2026-10-03 10:00:00"),
+		]
+
+		state = {"openings": openings, "keys": {}, "dates": {}, "paged": False}
+		for row in rows:
+			report.fold_ledger_row(state, row)
+
+		data = report.calculate_running_balance([frappe._dict(row) for row in rows], openings)
+		cached = {"result": report.make_result(self.filters, data, state), "state": state}
+
+		def refresh(inserted=(), deleted=()):
+			changes = {"Stock Weight Ledger": frappe._dict(inserted=list(inserted), deleted=list(deleted))}
+			with patch("shiva_erp.master_cache.get_master_value", return_value="Broiler Chicken"):
+				return report.refresh_report(self.filters, cached, changes)
+
+		# A new posting continues the running balance of its key
+		refreshed = refresh(
+			inserted=[ledger_row("2026-10-04", "OUT", 10, 20, 0, creation="2026-10-19 09:00:00")]
+		)
+		data = refreshed["result"][1]
+		summary = {card["label"]: card["value"] for card in refreshed["result"][4]}
+
+		self.assertEqual([row.balance_qty for row in data], [150, 130, 5, 120])
+		self.assertEqual(summary["Total Transactions"], 4)
+		self.assertEqual(summary["Closing Qty (Nos)"], 125)
+		self.assertEqual(refreshed["result"][3]["data"]["labels"][-1], "2026-10-04")
+
+		# Rows after to_date are ignored
+		refreshed = refresh(
+			inserted=[ledger_row("2026-11-02", "IN", 10, 20, 0, creation="2026-10-19 09:00:00")]
+		)
+		self.assertEqual(len(refreshed["result"][1]), 3)
+
+		# Cancelling the last row of a key drops it
+		refreshed = refresh(deleted=[rows[2]])
+		summary = {card["label"]: card["value"] for card in refreshed["result"][4]}
+		self.assertEqual(len(refreshed["result"][1]), 2)
+		self.assertNotIn("Unique Batches", summary)
+
+		# Backdated changes inside the cached range need a full rebuild
+		self.assertIsNone(refresh(deleted=[rows[0]]))
+		self.assertIsNone(
+			refresh(inserted=[ledger_row("2026-10-02", "IN", 1, 2, 0, creation="2026-10-19 09:00:00")])
+		)
+		self.assertIsNone(
+			refresh(inserted=[ledger_row("2026-09-30", "IN", 1, 2, 0, creation="2026-10-19 09:00:00")])
+		)
+
+		# The cached entry itself is left untouched
+		self.assertEqual(len(cached["result"][1]), 3)
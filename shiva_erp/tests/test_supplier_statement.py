@@ -0,0 +1,83 @@
+# Copyright (c) 2026, Gopalakrishna Reddy Gogulamudi and Contributors
+# See license.txt
+
+from unittest.mock import patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from shiva_erp.shiva_business_erp.report.supplier_statement import supplier_statement
+
+SNAPSHOT_OPENINGS = "shiva_erp.shiva_business_erp.doctype.party_balance_snapshot.party_balance_snapshot.get_party_opening_balances"
+
+GL_ENTRIES = [
+	{
+		"party": "Farm A",
+		"voucher_type": "Purchase Invoice",
+		"voucher_no": "PINV-1",
+		"debit": 0,
+		"credit": 500,
+	},
+	{"party": "Farm A", "voucher_type": "Payment Entry", "voucher_no": "PE-1", "debit": 300, "credit": 0},
+	{"party": "Farm B", "voucher_type": "Purchase Receipt", "voucher_no": "PR-1", "debit": 0, "credit": 200},
+]
+
+
+class TestSupplierStatement(FrappeTestCase):
+	"""Test cases for the Supplier Statement report"""
+
+	def test_multi_supplier_mode(self):
+		"""Test that all suppliers share the snapshot openings, one GL and one item query per voucher type"""
+		filters = frappe._dict(
+			supplier_group="Farms", company="Shiva Poultry", from_date="2026-10-01", to_date="2026-10-07"
+		)
+		# Snapshot balances are debit - credit
+		openings = {"Farm A": -1000, "Farm C": -50}
+		gl_entries = [frappe._dict(entry, posting_date="2026-10-02", remarks="") for entry in GL_ENTRIES]
+		invoice_items = [
+			frappe._dict(
+				parent="PINV-1",
+				item_code="Broiler",
+				item_name="Broiler",
+				qty=100,
+				weight_kg=200,
+				rate=2.5,
+				amount=500,
+			)
+		]
+		receipt_items = [
+			frappe._dict(
+				parent="PR-1",
+				item_code="Layer",
+				item_name="Layer",
+				qty=50,
+				weight_kg=80,
+				rate=2.5,
+				amount=200,
+			)
+		]
+
+		with (
+			patch.object(
+				supplier_statement, "get_suppliers", return_value=["Farm A", "Farm B", "Farm C", "Farm D"]
+			),
+			patch(SNAPSHOT_OPENINGS, return_value=openings),
+			patch("frappe.db.sql", side_effect=[gl_entries, invoice_items, receipt_items]) as sql,
+			patch("frappe.db.has_column", return_value=True),
+		):
+			data = supplier_statement.get_data(filters)
+
+		self.assertEqual(sql.call_count, 3)
+
+		# Farm D has neither an opening balance nor transactions
+		headings = [row["supplier"] for row in data if row.get("is_supplier")]
+		self.assertEqual(headings, ["Farm A", "Farm B", "Farm C"])
+
+		closing = [row["balance"] for row in data if row.get("is_closing")]
+		self.assertEqual(closing, [1200, 200, 50])
+
+		summary = {card["label"]: card["value"] for card in supplier_statement.get_summary(filters, data)}
+		self.assertEqual(summary["Outstanding Balance"], 1450)
+		self.assertEqual(
+			supplier_statement.get_supplier_chart(data)["data"]["datasets"][0]["values"], closing
+		)